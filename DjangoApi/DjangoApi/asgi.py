@@ -3,14 +3,27 @@ ASGI config for DjangoApi project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+With API_ASYNC=True the task list, detail and create endpoints are served
+by coroutines (app.async_views); run it with an ASGI server, e.g.
+``API_ASYNC=True uvicorn DjangoApi.asgi:application``.
+Static files (Swagger UI assets) are served by ASGIStaticFilesHandler; a
+reverse proxy in front of the app may serve STATIC_ROOT instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DjangoApi.settings')
 
 application = get_asgi_application()
+
+# WhiteNoise (WSGI-only) is not installed under API_ASYNC; static files are
+# served before the middleware chain, which stays fully asynchronous.
+if 'whitenoise.middleware.WhiteNoiseMiddleware' not in settings.MIDDLEWARE:
+    application = ASGIStaticFilesHandler(application)
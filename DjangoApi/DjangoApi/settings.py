@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -28,9 +30,14 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
+# DEBUG включается только явно (DEBUG=True в .env): в этом режиме Django хранит
+# все SQL-запросы каждого соединения в памяти (connection.queries)
+DEBUG = os.getenv('DEBUG', 'False').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = ['*']
-DEBUG = True
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(',')
+
+# Асинхронные представления задач (app.async_views) для запуска под ASGI
+API_ASYNC = os.getenv('API_ASYNC', 'False').lower() in ('1', 'true', 'yes')
 
 
 # Application definition
@@ -51,6 +58,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.PerformanceMiddleware',
+    'app.middleware.CompressionMiddleware',
+    'app.middleware.QueryCheckMiddleware',
+    'app.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +95,13 @@ WSGI_APPLICATION = 'DjangoApi.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Соединения: DB_CONN_MAX_AGE - сколько секунд держать соединение между запросами
+# (0 - новое на каждый запрос), DB_CONN_HEALTH_CHECKS - проверять его перед повторным
+# использованием. DB_POOL - пул соединений psycopg 3 (poetry install -E pool) вместо
+# постоянных соединений. За PgBouncer в режиме transaction нужен
+# DB_DISABLE_SERVER_SIDE_CURSORS=True.
+DB_POOL = os.getenv('DB_POOL', 'False').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -92,9 +110,81 @@ DATABASES = {
         'PORT': os.getenv('DB_PORT'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('1', 'true', 'yes'),
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', 'False'
+        ).lower() in ('1', 'true', 'yes'),
+        'OPTIONS': {},
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
+
+# Реплики для чтения (app.routers): DB_REPLICAS=host1,host2:5433 - хосты с теми же
+# DB_NAME/DB_USER/DB_PASSWORD, что у основной базы. Чтения пользователя идут на основную
+# базу DB_REPLICA_STICKY_SECONDS после его записи (отметка хранится в кеше
+# TASKS_CACHE_ALIAS, поэтому при нескольких воркерах он должен быть общим);
+# недоступная реплика исключается на DB_REPLICA_RETRY_SECONDS.
+DB_REPLICA_ALIASES = []
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DB_REPLICA_ALIASES.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['app.routers.ReplicaRouter'] if DB_REPLICA_ALIASES else []
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+DB_REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', 30))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Число процессов-воркеров сервера (gunicorn.conf.py записывает сюда итоговое значение)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+# Кеш ответов списка и карточки задач: алиас кеша и время жизни ответа в секундах.
+# Инвалидация видна всем воркерам только в общем кеше (Redis, Memcached): с LocMemCache
+# и несколькими воркерами кеш по умолчанию выключен, а явный TASKS_CACHE=True - ошибка
+TASKS_CACHE_ALIAS = os.getenv('TASKS_CACHE_ALIAS', 'default')
+TASKS_CACHE_TIMEOUT = int(os.getenv('TASKS_CACHE_TIMEOUT', 300))
+TASKS_CACHE_SHARED = WEB_CONCURRENCY == 1 or CACHES.get(TASKS_CACHE_ALIAS, {}).get('BACKEND') != \
+    'django.core.cache.backends.locmem.LocMemCache'
+TASKS_CACHE_ENABLED = os.getenv('TASKS_CACHE', str(TASKS_CACHE_SHARED)).lower() in ('1', 'true', 'yes')
+if TASKS_CACHE_ENABLED and not TASKS_CACHE_SHARED:
+    raise ImproperlyConfigured(
+        f'TASKS_CACHE требует общего кеша при WEB_CONCURRENCY={WEB_CONCURRENCY}: задайте REDIS_URL'
+    )
+if DB_REPLICA_ALIASES and not TASKS_CACHE_SHARED:
+    raise ImproperlyConfigured(
+        f'DB_REPLICAS требует общего кеша при WEB_CONCURRENCY={WEB_CONCURRENCY}: задайте REDIS_URL'
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -114,6 +204,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хеширование паролей (app.hashers): алгоритм новых хешей (pbkdf2, scrypt, argon2)
+# и его стоимость. Хеши остальных алгоритмов проверяются и перехешируются при входе
+PASSWORD_HASH_ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'pbkdf2')
+PASSWORD_HASH_ALGORITHMS = {
+    'pbkdf2': 'app.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'app.hashers.ScryptPasswordHasher',
+    'argon2': 'app.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASH_ALGORITHMS[PASSWORD_HASH_ALGORITHM]] + [
+    hasher for algorithm, hasher in PASSWORD_HASH_ALGORITHMS.items() if algorithm != PASSWORD_HASH_ALGORITHM
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 8))
+
+# Пул потоков хеширования паролей на процесс (0 - в потоке запроса) и ожидание
+# результата в секундах, после которого запрос получает 503. Пул у каждого воркера
+# свой, поэтому по умолчанию процесс получает свою долю ядер: ядра // WEB_CONCURRENCY
+PASSWORD_HASH_WORKERS = int(os.getenv(
+    'PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -134,6 +249,19 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# Сюда collectstatic собирает статику при сборке образа; в продакшене под WSGI ее отдает
+# WhiteNoise (сжатые копии, без обращения к Django-представлениям). WhiteNoise синхронный
+# и под ASGI перевел бы всю цепочку middleware в поток, поэтому с API_ASYNC статику
+# отдает обертка DjangoApi/asgi.py до middleware (или прокси перед приложением)
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+if find_spec('whitenoise') is not None and not API_ASYNC:
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'whitenoise.middleware.WhiteNoiseMiddleware')
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage'},
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -152,15 +280,74 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.throttling.SlidingWindowThrottle',
+    ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '10/minute',
-        'user': '20/minute',
+        'anon': os.getenv('THROTTLE_RATE_ANON', '10/minute'),
+        'user': os.getenv('THROTTLE_RATE_USER', '20/minute'),
+        'token': os.getenv('THROTTLE_RATE_TOKEN', '10/minute'),
+        'docs': os.getenv('THROTTLE_RATE_DOCS', '120/minute'),
+        'tasks_read': os.getenv('THROTTLE_RATE_TASKS_READ', '600/minute'),
+        'tasks_write': os.getenv('THROTTLE_RATE_TASKS_WRITE', '120/minute'),
     },
 }
 
+# MessagePack (app.renderers, app.parsers): тела запросов и ответы application/msgpack
+# наравне с JSON, если установлен msgpack (poetry install -E msgpack)
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'app.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('app.parsers.MessagePackParser')
+
+# Сжатие ответов (app.compression): gzip, а с пакетами brotli и zstandard
+# (poetry install -E compression) и br, zstd; ответы меньше порога (байт) не сжимаются
+API_COMPRESSION = os.getenv('API_COMPRESSION', 'True').lower() in ('1', 'true', 'yes')
+API_COMPRESSION_MIN_SIZE = int(os.getenv('API_COMPRESSION_MIN_SIZE', 1024))
+
+# Лимиты запросов (app.throttling): включение и алиас кеша счетчиков.
+# Для общего лимита на все воркеры кеш должен быть общим (REDIS_URL)
+API_THROTTLE = os.getenv('API_THROTTLE', 'True').lower() in ('1', 'true', 'yes')
+API_THROTTLE_CACHE_ALIAS = os.getenv('API_THROTTLE_CACHE_ALIAS', 'default')
+
+# Пагинация списков: размер страницы по умолчанию и верхняя граница ?page_size=
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+
+# Быстрый список задач: строки .values() по плану полей TaskSerializer без сериализатора
+TASKS_FAST_LIST = os.getenv('TASKS_FAST_LIST', 'True').lower() in ('1', 'true', 'yes')
+
+# Пакетные операции с задачами: максимум элементов в запросе и размер пачки SQL
+TASKS_BULK_MAX_ITEMS = int(os.getenv('TASKS_BULK_MAX_ITEMS', 5000))
+TASKS_BULK_BATCH_SIZE = int(os.getenv('TASKS_BULK_BATCH_SIZE', 500))
+
+# Синхронизация задач: размер пачки строк при потоковой выдаче изменений
+TASKS_SYNC_CHUNK_SIZE = int(os.getenv('TASKS_SYNC_CHUNK_SIZE', 1000))
+
+# Потоковая выгрузка задач: строк в пачке чтения из БД и записи в ответ
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv('TASKS_EXPORT_CHUNK_SIZE', 2000))
+
+# Метрики запросов (app.metrics): Server-Timing и /metrics/ в формате Prometheus;
+# если задан API_METRICS_TOKEN, /metrics/ требует Authorization: Bearer <токен>
+API_METRICS = os.getenv('API_METRICS', 'False').lower() in ('1', 'true', 'yes')
+API_METRICS_TOKEN = os.getenv('API_METRICS_TOKEN', '')
+# Каталог снимков метрик процессов: /metrics/ суммирует метрики всех воркеров
+# (gunicorn.conf.py задает его при нескольких воркерах); '' - метрики только процесса
+API_METRICS_DIR = os.getenv('API_METRICS_DIR', '')
+API_METRICS_FLUSH_SECONDS = float(os.getenv('API_METRICS_FLUSH_SECONDS', 1))
+
+# Детектор N+1 и медленных запросов (app.querycheck) для разработки и тестов:
+# '' - выключен, warn - в лог, strict - исключение (проваливает тест)
+QUERY_CHECK = os.getenv('QUERY_CHECK', '')
+QUERY_CHECK_REPEAT = int(os.getenv('QUERY_CHECK_REPEAT', 5))
+QUERY_CHECK_SLOW_MS = int(os.getenv('QUERY_CHECK_SLOW_MS', 100))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -185,7 +372,7 @@ SIMPLE_JWT = {
 
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
-    "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_USER_CLASS": "app.authentication.TaskTokenUser",
 
     "JTI_CLAIM": "jti",
 
@@ -193,7 +380,7 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "app.serializers.TaskTokenObtainPairSerializer",
     "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
@@ -201,6 +388,11 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# Кеш флагов is_active/is_staff для StatelessJWTAuthentication:
+# время жизни записи в секундах (0 - доверять токену) и размер кеша процесса
+JWT_USER_STATE_TTL = int(os.getenv('JWT_USER_STATE_TTL', 30))
+JWT_USER_STATE_CACHE_SIZE = int(os.getenv('JWT_USER_STATE_CACHE_SIZE', 10000))
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -210,5 +402,11 @@ SWAGGER_SETTINGS = {
             'description': 'JWT token: Bearer <token>'
         }
     },
-    'USE_SESSION_AUTH': False
+    'USE_SESSION_AUTH': False,
+    # Описание API для команды generate_swagger
+    'DEFAULT_INFO': 'DjangoApi.yasg.API_INFO',
 }
+
+# Готовая схема OpenAPI (JSON), собранная при сборке образа командой
+# python manage.py generate_swagger -o -f json <файл>; пусто - схема строится в памяти
+API_SCHEMA_FILE = os.getenv('API_SCHEMA_FILE', '')
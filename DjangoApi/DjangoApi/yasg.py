@@ -1,21 +1,108 @@
 """
 YASG для DjangoApi
 Выгрузка документации API Swagger и Redoc.
+
+Схема OpenAPI не строится заново на каждый запрос: CachedSchemaView
+отдает готовый документ из памяти процесса с ETag (повторный запрос с
+If-None-Match получает 304). Документ берется из файла API_SCHEMA_FILE,
+собранного при сборке образа командой generate_swagger, а без файла
+строится один раз при первом запросе или заранее (warm_schema() в
+мастере gunicorn до fork). Новый релиз - новые процессы и новый файл,
+поэтому устаревшая схема не отдается, а ETag меняется вместе с ней.
+
+Страницы /swagger/ и /redoc/ схему API не разбирают (drf-yasg строит
+для них пустую), документ они загружают по ?format=openapi.
 """
 
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from django.urls import path
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer, _SpecRenderer
 from rest_framework import permissions
 
+from app import conditional
+from app.throttling import RateLimitHeadersMixin
+
+
+API_INFO = openapi.Info(
+    title="Task Management API",
+    default_version='v1',
+    description="API for managing users and tasks",
+)
 
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Task Management API",
-        default_version='v1',
-        description="API for managing users and tasks",
-    ),
+    API_INFO,
     public=True,
     permission_classes=(permissions.AllowAny,),
 
 )
+
+
+"""
+Документы схемы процесса по формату рендерера: (тело, ETag).
+"""
+_documents = {}
+
+
+def build_schema():
+    """Схема OpenAPI всех эндпоинтов (без запроса: хост берется клиентом из адреса страницы)."""
+    generator = schema_view.generator_class(API_INFO)
+    return generator.get_schema(request=None, public=True)
+
+
+def read_schema_file(renderer):
+    """Тело JSON-документа из API_SCHEMA_FILE или None, если файла нет или формат другой."""
+    if not settings.API_SCHEMA_FILE or not isinstance(renderer, (OpenAPIRenderer, SwaggerJSONRenderer)):
+        return None
+    path = Path(settings.API_SCHEMA_FILE)
+    return path.read_bytes() if path.is_file() else None
+
+
+def get_document(renderer):
+    """Документ схемы в формате renderer: (тело, ETag); строится один раз на процесс."""
+    document = _documents.get(renderer.format)
+    if document is None:
+        content = read_schema_file(renderer)
+        if content is None:
+            content = renderer.render(build_schema())
+        etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        document = _documents[renderer.format] = (content, etag)
+    return document
+
+
+def warm_schema():
+    """Строит документы всех форматов заранее (до fork воркеров)."""
+    for renderer_class in schema_view.renderer_classes:
+        get_document(renderer_class())
+
+
+def forget_schema():
+    """Сбрасывает документы процесса (тесты)."""
+    _documents.clear()
+
+
+class CachedSchemaView(RateLimitHeadersMixin, schema_view):
+    """Схема OpenAPI из памяти процесса с ETag.
+
+    Документ не зависит от пользователя и запроса (схема публичная,
+    хост не указывается), поэтому один на все запросы. Cache-Control:
+    no-cache - браузер и прокси хранят документ, но сверяют ETag.
+    Лимит запросов - своя область docs, а не anon: открытие страницы
+    документации - несколько запросов подряд."""
+    throttle_scope = 'docs'
+
+    def get(self, request, version='', format=None):
+        """Документ схемы или 304; страницы UI - как в drf-yasg."""
+        if not isinstance(request.accepted_renderer, _SpecRenderer):
+            return super().get(request, version, format)
+        content, etag = get_document(request.accepted_renderer)
+        response = conditional.evaluate(request, etag, None)
+        if response is None:
+            response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
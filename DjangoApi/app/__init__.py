@@ -8,7 +8,27 @@
     - Модуль admin - регистрация моделей в админке
     - Модуль api - регистрация маршрутов API для взаимодействия пользователей и задач
     - Модуль apps - регистрация приложения
+    - Модуль async_views - асинхронные представления задач для ASGI
+    - Модуль authentication - JWT-аутентификация без запроса пользователя к БД
+    - Модуль bench - утилиты замеров и микробенчмарки для команд-бенчмарков
+    - Модуль cache - кеш ответов задач по пользователю
+    - Модуль compression - сжатие ответов (gzip, brotli, zstd)
+    - Модуль conditional - условные запросы (ETag / Last-Modified)
+    - Модуль export - потоковая выгрузка задач в NDJSON и CSV
+    - Модуль fieldsets - выборочные поля ответа (?fields= / ?omit=)
+    - Модуль filters - фильтры списка задач
+    - Модуль hashers - хешеры паролей с настраиваемой стоимостью и пулом потоков
+    - Модуль metrics - метрики производительности запросов (Prometheus, Server-Timing)
+    - Модуль middleware - middleware замеров запросов и проверки SQL
+    - Модуль querycheck - детектор N+1 и медленных SQL-запросов
+    - Модуль pagination - курсорная пагинация списков
+    - Модуль parsers - разбор тел запросов в MessagePack
+    - Модуль renderers - быстрый JSON-рендерер (orjson) и MessagePack
+    - Модуль routers - маршрутизация чтений на реплики БД
+    - Модуль search - полнотекстовый поиск задач
     - Модуль serializers - регистрация сериализаторов для задач и пользователей
+    - Модуль signals - обработчики сигналов моделей
+    - Модуль throttling - лимиты частоты запросов (скользящее окно в кеше)
     - Модуль tests - тесты для проверки корректности работы приложения
     - Модуль urls - маршруты приложения
 """
\ No newline at end of file
@@ -6,27 +6,97 @@
 - UserSet: управление пользователями (администраторский функционал)
 """
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_http_date_safe
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from .serializers import TaskSerializer, UserSerializer
-from .models import Task
+from rest_framework_simplejwt import views as jwt_views
+from . import cache, conditional, export, fieldsets
+from .authentication import StatelessJWTAuthentication
+from .conditional import ConditionalMixin
+from .fieldsets import SparseFieldsetMixin
+from .serializers import TASK_ROW_PLAN, TaskSerializer, UserSerializer, is_task_id
+from .models import Task, TaskSyncState, TaskTombstone, UserDataVersion
+from .pagination import IdCursorPagination
+from .filters import TaskFilter
+from .routers import ReplicaRoutingMixin
+from .throttling import RateLimitHeadersMixin, tasks_scope
 
 
-class TaskSet(ModelViewSet):
+"""
+Параметр формата потоковой выгрузки задач для документации.
+"""
+EXPORT_TYPE_PARAMETER = openapi.Parameter(
+    'type', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(export.FORMATS), default='ndjson',
+    description='Формат выгрузки',
+)
+
+"""
+Параметры выборочных полей ответа для документации (app.fieldsets).
+"""
+FIELDS_PARAMETERS = [
+    openapi.Parameter(
+        fieldsets.FIELDS_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Только перечисленные через запятую поля (id возвращается всегда)',
+    ),
+    openapi.Parameter(
+        fieldsets.OMIT_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Все поля, кроме перечисленных через запятую',
+    ),
+]
+
+
+"""
+Ответ статистики задач для документации: число задач по статусам и всего.
+"""
+STATS_RESPONSE = openapi.Response('Число задач по статусам', openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        name: openapi.Schema(type=openapi.TYPE_INTEGER)
+        for name in [*TaskSyncState.statuses(), 'total']
+    },
+))
+
+
+@method_decorator(name='retrieve', decorator=swagger_auto_schema(manual_parameters=FIELDS_PARAMETERS))
+class TaskSet(
+    ReplicaRoutingMixin, RateLimitHeadersMixin, ConditionalMixin, SparseFieldsetMixin, ModelViewSet
+):
     """ ViewSet для операций CRUD с задачами.
 
     Особенности:
-    - Использует JWT-аутентификацию
+    - Использует JWT-аутентификацию без загрузки пользователя из БД
     - Требует аутентификации для доступа
     - Фильтрует задачи по текущему пользователю
     - Автоматически назначает владельца при создании
+    - Список отдается страницами по курсору (?cursor=, ?page_size=)
+    - Список фильтруется по статусу, префиксу названия и диапазону id (TaskFilter)
+    - Полнотекстовый поиск ?search= по названию и описанию с ранжированием (app.search)
+    - Выборочные поля ответа ?fields=/?omit= с чтением из БД только их колонок (app.fieldsets)
+    - Ответы списка и карточки кешируются по пользователю (app.cache)
+    - Чтения в GET-запросах идут на реплики БД, если они настроены (app.routers)
+    - Поддерживает ETag/Last-Modified: 304 для GET, 412 для изменений по If-Match
+    - Чтение и изменение задач ограничены отдельными лимитами (tasks_read, tasks_write)
 
     Поддерживаемые методы:
     GET /api/tasks/ - список задач пользователя
     POST /api/tasks/ - создание новой задачи
     GET/PUT/PATCH/DELETE /api/tasks/{id}/ - работа с конкретной задачей
+    POST/PATCH/DELETE /api/tasks/bulk/ - пакетные операции с задачами
+    GET /api/tasks/changes/?since=<token> - изменения задач после токена синхронизации
+    GET /api/tasks/export/?type=ndjson|csv - потоковая выгрузка задач пользователя
+    GET /api/tasks/stats/ - число задач пользователя по статусам
 
     Поля задачи:
     - title (строка): название задачи
@@ -34,9 +104,18 @@ class TaskSet(ModelViewSet):
     - status (выбор): new/in_progress/completed
     - owner (readonly): владелец задачи """
     serializer_class = TaskSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    filterset_class = TaskFilter
     queryset = Task.objects.none()
+    # revision и updated_at нужны валидаторам условных запросов при любом наборе полей
+    sparse_columns = ('revision', 'updated_at')
+
+    @property
+    def throttle_scope(self):
+        """Область лимита: чтение или изменение задач."""
+        return tasks_scope(self.request)
 
     def get_queryset(self):
         """Возвращает кверисет задач, отфильтрованный по текущему пользователю.
@@ -46,7 +125,78 @@ class TaskSet(ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             # Для генерации схемы Swagger
             return Task.objects.none()
-        return Task.objects.filter(owner=self.request.user)
+        return Task.objects.filter(owner_id=self.request.user.pk)
+
+    def get_serializer_context(self):
+        """Добавляет в контекст владельца задач.
+
+        Все задачи в выдаче принадлежат request.user, поэтому имя владельца
+        берется из него один раз, а не отдельным запросом на каждую задачу."""
+        context = super().get_serializer_context()
+        if not getattr(self, 'swagger_fake_view', False):
+            context['owner'] = self.request.user
+        return context
+
+    def get_list_validators(self):
+        """ETag списка по версии задач пользователя (TaskSyncState) и имени владельца.
+
+        Фильтры и курсор входят в вариант ETag (полный путь). Last-Modified у
+        списка нет: удаление задачи не меняет время изменения оставшихся."""
+        version = TaskSyncState.version(self.request.user.pk).first()
+        return conditional.make_etag(self.request, version, self.request.user.username), None
+
+    def get_object_validators(self):
+        """ETag задачи по ее id, ревизии и имени владельца, Last-Modified - по updated_at."""
+        task = self.get_object()
+        etag = conditional.make_etag(self.request, task.pk, task.revision, self.request.user.username)
+        return etag, conditional.to_timestamp(task.updated_at)
+
+    def conditional_response(self, validators, handler, request, *args, **kwargs):
+        """Условный ответ через кеш ответов пользователя.
+
+        ETag и Last-Modified хранятся в кеше вместе с данными, поэтому
+        попадание в кеш, в том числе ответ 304, обходится без запросов к БД.
+        Заголовок X-Cache сообщает, был ли ответ взят из кеша (HIT) или нет (MISS).
+        Без TASKS_CACHE_ENABLED ответ строится как в ConditionalMixin."""
+        if not settings.TASKS_CACHE_ENABLED:
+            return super().conditional_response(validators, handler, request, *args, **kwargs)
+        key = cache.response_key(request.user.pk, cache.request_variant(request))
+        entry = cache.get_response(key)
+        if entry is not None:
+            response = conditional.evaluate(request, entry['etag'], entry['last_modified'])
+            if response is None:
+                response = Response(entry['data'])
+            response['X-Cache'] = 'HIT'
+            return conditional.add_validators(response, entry['etag'], entry['last_modified'])
+        response = super().conditional_response(validators, handler, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set_response(key, {
+                'data': response.data,
+                'etag': response['ETag'],
+                'last_modified': parse_http_date_safe(response.get('Last-Modified', '')),
+            })
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @swagger_auto_schema(manual_parameters=FIELDS_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        """Список задач; с TASKS_FAST_LIST строится без TaskSerializer (fast_list)."""
+        if not settings.TASKS_FAST_LIST:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            self.get_list_validators, self.fast_list, request, *args, **kwargs
+        )
+
+    def fast_list(self, request, *args, **kwargs):
+        """Страница задач из строк .values() по плану полей TaskSerializer.
+
+        Ответ совпадает с ответом через сериализатор, но модели и поля
+        сериализатора на каждую строку не создаются. С ?fields=/?omit=
+        план урезается до выбранных полей."""
+        plan = TASK_ROW_PLAN.select(self.get_sparse_fields())
+        queryset = plan.values(self.filter_queryset(self.get_queryset()), owner=request.user)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(plan.rows(page, owner=request.user))
 
     def perform_create(self, serializer):
         """Создает задачу с автоматическим назначением владельца.
@@ -54,11 +204,155 @@ class TaskSet(ModelViewSet):
         Параметры:
         - serializer: экземпляр TaskSerializer с валидированными данными
 
-        Автоматически добавляет текущего пользователя в поле owner перед сохранением."""
-        serializer.save(owner=self.request.user)
+        Автоматически добавляет текущего пользователя в поле owner перед сохранением
+        и сбрасывает кеш ответов пользователя."""
+        serializer.save(owner_id=self.request.user.pk)
+        cache.invalidate_user(self.request.user.pk)
 
+    def get_bulk_items(self):
+        """Возвращает список элементов пакетного запроса с проверкой размера."""
+        items = self.request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'error': ['Ожидается непустой список.']})
+        if len(items) > settings.TASKS_BULK_MAX_ITEMS:
+            raise ValidationError(
+                {'error': [f'Не больше {settings.TASKS_BULK_MAX_ITEMS} элементов в запросе.']}
+            )
+        return items
 
-class UserSet(ModelViewSet):
+    @swagger_auto_schema(methods=['post', 'patch'], request_body=TaskSerializer(many=True))
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """Пакетные операции с задачами в одной транзакции.
+
+        POST - создание: список задач, ответ - созданные задачи.
+        PATCH - частичное обновление: список задач с id, ответ - обновленные задачи.
+        DELETE - удаление: список id, ответ - [{"id": ..., "deleted": true/false}].
+
+        При ошибке валидации ничего не сохраняется, ответ 400 содержит
+        ошибки каждого невалидного элемента с его позицией в запросе."""
+        if request.method == 'DELETE':
+            return self.bulk_destroy()
+        items = self.get_bulk_items()
+        if request.method == 'PATCH':
+            return self.bulk_update(items)
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(owner_id=request.user.pk)
+            cache.invalidate_user(request.user.pk)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        """Обновляет задачи пользователя, загрузив их одним запросом."""
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        ids = [task_id for task_id in ids if is_task_id(task_id)]
+        if len(ids) != len(set(ids)):
+            raise ValidationError({'error': ['Повторяющиеся id в запросе.']})
+        with transaction.atomic():
+            tasks = self.get_queryset().select_for_update().in_bulk(ids)
+            serializer = self.get_serializer(tasks, data=items, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            cache.invalidate_user(self.request.user.pk)
+        return Response(serializer.data)
+
+    def bulk_destroy(self):
+        """Удаляет задачи пользователя пачками по TASKS_BULK_BATCH_SIZE id."""
+        ids = serializers.ListField(
+            child=serializers.IntegerField(min_value=1),
+            allow_empty=False,
+            max_length=settings.TASKS_BULK_MAX_ITEMS,
+        ).run_validation(self.request.data)
+        batch_size = settings.TASKS_BULK_BATCH_SIZE
+        deleted = set()
+        with transaction.atomic():
+            for start in range(0, len(ids), batch_size):
+                rows = list(
+                    self.get_queryset().filter(id__in=ids[start:start + batch_size])
+                    .values_list('id', 'owner_id', 'status')
+                )
+                Task.objects.delete_rows(rows)
+                deleted.update(task_id for task_id, _, _ in rows)
+        return Response([{'id': task_id, 'deleted': task_id in deleted} for task_id in ids])
+
+    @swagger_auto_schema(manual_parameters=[openapi.Parameter(
+        'since', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+        description='sync_token из предыдущего ответа; без него - полная синхронизация',
+    )])
+    @action(detail=False, methods=['get'], url_path='changes', filter_backends=[], pagination_class=None)
+    def changes(self, request):
+        """Изменения задач пользователя после токена синхронизации.
+
+        Ответ: {"sync_token": "...", "upserted": [задачи], "deleted": [id]}.
+        В upserted - задачи, созданные или измененные после since, в deleted -
+        id задач, удаленных после since. sync_token передается в следующий
+        запрос как since. Ответ отдается потоком, строки читаются из БД
+        пачками по TASKS_SYNC_CHUNK_SIZE, поэтому стоимость синхронизации
+        пропорциональна числу изменений, а не числу задач.
+
+        Без since (или с since=0) выполняется полная синхронизация: все задачи,
+        включая созданные до появления ревизий, и пустой deleted."""
+        since = request.query_params.get('since', '0')
+        if not since.isdigit():
+            raise ValidationError({'since': ['Ожидается токен синхронизации.']})
+        since, upper = int(since), TaskSyncState.current(request.user.pk)
+        return export.streaming_response(
+            request, self.stream_changes(since, upper), content_type='application/json'
+        )
+
+    def stream_changes(self, since, upper):
+        """Генерирует JSON ответа changes по частям."""
+        owner_id, username = self.request.user.pk, self.request.user.username
+        chunk_size = settings.TASKS_SYNC_CHUNK_SIZE
+        encode = JSONEncoder(ensure_ascii=False).encode
+        yield '{"sync_token": %s, "upserted": [' % encode(str(upper))
+        rows = self.get_queryset().filter(revision__lte=upper).order_by()
+        if since:
+            rows = rows.filter(revision__gt=since)
+        separator = ''
+        for row in rows.values('id', 'title', 'description', 'status').iterator(chunk_size=chunk_size):
+            row['owner'] = username
+            yield separator + encode(row)
+            separator = ', '
+        yield '], "deleted": ['
+        if since:
+            task_ids = TaskTombstone.objects.filter(
+                owner_id=owner_id, revision__gt=since, revision__lte=upper
+            ).values_list('task_id', flat=True).order_by()
+            separator = ''
+            for task_id in task_ids.iterator(chunk_size=chunk_size):
+                yield separator + encode(task_id)
+                separator = ', '
+        yield ']}'
+
+    @swagger_auto_schema(manual_parameters=[EXPORT_TYPE_PARAMETER])
+    @action(
+        detail=False, methods=['get'], url_path='export', pagination_class=None,
+        content_negotiation_class=export.ExportContentNegotiation,
+    )
+    def export(self, request):
+        """Потоковая выгрузка задач пользователя в NDJSON или CSV.
+
+        Учитывает фильтры списка (TaskFilter), но не пагинацию."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return export.export_tasks(request, queryset, 'tasks', owner=request.user.username)
+
+    @swagger_auto_schema(responses={200: STATS_RESPONSE})
+    @action(detail=False, methods=['get'], url_path='stats', filter_backends=[], pagination_class=None)
+    def stats(self, request):
+        """Число задач пользователя по статусам и всего.
+
+        Читается из счетчиков строки TaskSyncState пользователя, без
+        подсчета задач."""
+        return Response(TaskSyncState.stats(request.user.pk))
+
+
+@method_decorator(name='list', decorator=swagger_auto_schema(manual_parameters=FIELDS_PARAMETERS))
+@method_decorator(name='retrieve', decorator=swagger_auto_schema(manual_parameters=FIELDS_PARAMETERS))
+class UserSet(
+    ReplicaRoutingMixin, RateLimitHeadersMixin, ConditionalMixin, SparseFieldsetMixin, ModelViewSet
+):
     """ Администраторский ViewSet для управления пользователями.
 
     Особенности:
@@ -66,11 +360,16 @@ class UserSet(ModelViewSet):
     - Использует JWT-аутентификацию
     - Пароли хранятся в хешированном виде
     - Поле password доступно только для записи
+    - Список отдается страницами по курсору (?cursor=, ?page_size=)
+    - Выборочные поля ответа ?fields=/?omit= (app.fieldsets)
+    - Поддерживает ETag: 304 для GET, 412 для изменений по If-Match
 
     Поддерживаемые методы:
     GET /api/users/ - список всех пользователей
     POST /api/users/ - создание нового пользователя
     GET/PUT/PATCH/DELETE /api/users/{id}/ - работа с конкретным пользователем
+    GET /api/users/tasks-export/?type=ndjson|csv - выгрузка задач всех пользователей (админ)
+    GET /api/users/tasks-stats/ - число задач всех пользователей по статусам (админ)
 
     Поля пользователя:
     - username (строка): уникальный логин
@@ -81,6 +380,15 @@ class UserSet(ModelViewSet):
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+
+    def get_list_validators(self):
+        """ETag списка по версии данных пользователей из БД (UserDataVersion)."""
+        return conditional.make_etag(self.request, UserDataVersion.current()), None
+
+    def get_object_validators(self):
+        """ETag пользователя по его id и версии данных пользователей из БД (UserDataVersion)."""
+        return conditional.make_etag(self.request, self.kwargs[self.lookup_field], UserDataVersion.current()), None
 
     def get_permissions(self):
         """
@@ -90,3 +398,34 @@ class UserSet(ModelViewSet):
         if self.action == 'destroy':
             return [IsAdminUser() & IsAuthenticated()]
         return super().get_permissions()
+
+    @swagger_auto_schema(manual_parameters=[EXPORT_TYPE_PARAMETER])
+    @action(
+        detail=False, methods=['get'], url_path='tasks-export', pagination_class=None,
+        permission_classes=[IsAdminUser], content_negotiation_class=export.ExportContentNegotiation,
+    )
+    def tasks_export(self, request):
+        """Потоковая выгрузка задач всех пользователей в NDJSON или CSV (только админ)."""
+        return export.export_tasks(request, Task.objects.all(), 'all-tasks')
+
+    @swagger_auto_schema(responses={200: STATS_RESPONSE})
+    @action(
+        detail=False, methods=['get'], url_path='tasks-stats', pagination_class=None,
+        permission_classes=[IsAdminUser],
+    )
+    def tasks_stats(self, request):
+        """Число задач всех пользователей по статусам и всего (только админ)."""
+        return Response(TaskSyncState.stats())
+
+
+class TokenObtainView(RateLimitHeadersMixin, jwt_views.TokenObtainPairView):
+    """ Получение пары JWT по логину и паролю.
+
+    Ограничено лимитом token по IP клиента: подбор пароля упирается
+    в лимит, а проверка пароля (дорогой хеш) не выполняется сверх него. """
+    throttle_scope = 'token'
+
+
+class TokenRefreshView(RateLimitHeadersMixin, jwt_views.TokenRefreshView):
+    """ Обновление access-токена по refresh-токену (лимит token). """
+    throttle_scope = 'token'
@@ -9,3 +9,7 @@ class AppConfig(AppConfig):
     """Регистрация приложения."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        """Подключение обработчиков сигналов."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,225 @@
+"""
+Асинхронные представления задач для ASGI (включаются настройкой API_ASYNC).
+
+Список, карточка и создание задачи обрабатываются корутинами: строки
+читаются асинхронным ORM, поэтому один воркер ASGI обслуживает много
+одновременных медленных клиентов. Остальные методы (PUT/PATCH/DELETE,
+HEAD, OPTIONS) передаются синхронному TaskSet через sync_to_async.
+
+Фильтры, сериализация, пагинация, кеш ответов и ETag берутся из TaskSet,
+поэтому ответы совпадают с синхронными байт в байт и разделяют с ними
+кеш и лимиты запросов (app.throttling). Формат ответа выбирается по
+Accept и ?format= из рендереров TaskSet (JSON, MessagePack), кроме
+Browsable API: HTML-страниц у асинхронных представлений нет.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import path
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, Throttled
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from . import cache, conditional, routers, throttling
+from .api import TaskSet
+from .authentication import StatelessJWTAuthentication
+from .models import TaskSyncState
+from .renderers import FastJSONRenderer
+from .serializers import TASK_ROW_PLAN
+
+
+def render_response(request, data, status_code=status.HTTP_200_OK):
+    """Ответ в выбранном для запроса формате, отрендеренный так же, как в DRF.
+
+    До выбора рендерера (и при ошибке выбора) ответ - в JSON."""
+    renderer = getattr(request, 'accepted_renderer', None) or FastJSONRenderer()
+    media_type = getattr(request, 'accepted_media_type', None) or renderer.media_type
+    content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+    response = HttpResponse(renderer.render(data, media_type), content_type=content_type, status=status_code)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def lookup_response(request):
+    """Ключ и закешированный ответ (или None) пользователя на запрос.
+
+    Без TASKS_CACHE_ENABLED ключа нет: ответ не ищется и не сохраняется."""
+    if not settings.TASKS_CACHE_ENABLED:
+        return None, None
+    key = cache.response_key(request.user.pk, cache.request_variant(request))
+    return key, cache.get_response(key)
+
+
+class AsyncTaskView(View):
+    """Базовое асинхронное представление задач.
+
+    Методы из async_methods обрабатываются корутинами наследника,
+    остальные - синхронным TaskSet с действиями sync_actions."""
+    async_methods = ()
+    sync_actions = {}
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        """Представление без CSRF (аутентификация по JWT) с синхронным запасным путем."""
+        view = super().as_view(sync_view=TaskSet.as_view(cls.sync_actions), **initkwargs)
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """Аутентифицирует запрос и вызывает обработчик метода."""
+        method = request.method.lower()
+        if method not in self.async_methods:
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            self.perform_content_negotiation(request)
+            request.user = await sync_to_async(self.authenticate)(request)
+            await sync_to_async(self.check_throttles)(request)
+            routers.bind_user(request.user.pk)
+            response = await getattr(self, method)(request, *args, **kwargs)
+        except Http404 as exc:
+            response = self.handle_exception(request, NotFound(*exc.args))
+        except APIException as exc:
+            response = self.handle_exception(request, exc)
+        return throttling.add_headers(request, response)
+
+    @property
+    def throttle_scope(self):
+        """Область лимита, как у TaskSet: чтение или изменение задач."""
+        return throttling.tasks_scope(self.request)
+
+    def perform_content_negotiation(self, request):
+        """Выбирает рендерер ответа по Accept и ?format=, как TaskSet (без Browsable API)."""
+        renderers = [
+            renderer() for renderer in TaskSet.renderer_classes
+            if not issubclass(renderer, BrowsableAPIRenderer)
+        ]
+        negotiator = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+        request.accepted_renderer, request.accepted_media_type = negotiator.select_renderer(request, renderers)
+
+    def authenticate(self, request):
+        """Пользователь из JWT, как в TaskSet (StatelessJWTAuthentication)."""
+        result = StatelessJWTAuthentication().authenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        return result[0]
+
+    def check_throttles(self, request):
+        """Лимиты запросов DEFAULT_THROTTLE_CLASSES, как в TaskSet."""
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                raise Throttled(throttle.wait())
+
+    def handle_exception(self, request, exc):
+        """Ответ с ошибкой в формате обработчика исключений DRF."""
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = render_response(request, data, exc.status_code)
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = StatelessJWTAuthentication().authenticate_header(request)
+        if getattr(exc, 'wait', None) is not None:
+            response['Retry-After'] = str(int(exc.wait))
+        return response
+
+    def get_task_set(self, request, action, **kwargs):
+        """Экземпляр TaskSet для запроса: фильтры, сериализатор, пагинация."""
+        return TaskSet(request=request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+
+    async def conditional_response(self, request, validators, render):
+        """Условный ответ через кеш ответов, как TaskSet.conditional_response.
+
+        validators - корутина, возвращающая (etag, last_modified),
+        render - корутина, возвращающая данные ответа."""
+        key, entry = await sync_to_async(lookup_response)(request)
+        if entry is not None:
+            response = conditional.evaluate(request, entry['etag'], entry['last_modified'])
+            if response is None:
+                response = render_response(request, entry['data'])
+            response['X-Cache'] = 'HIT'
+            return conditional.add_validators(response, entry['etag'], entry['last_modified'])
+        etag, last_modified = await validators()
+        response = conditional.evaluate(request, etag, last_modified)
+        if response is None:
+            data = await render()
+            response = render_response(request, data)
+            if key is not None:
+                await sync_to_async(cache.set_response)(key, {
+                    'data': data, 'etag': etag, 'last_modified': last_modified,
+                })
+        if key is not None:
+            response['X-Cache'] = 'MISS'
+        return conditional.add_validators(response, etag, last_modified)
+
+
+class AsyncTaskListView(AsyncTaskView):
+    """GET /api/tasks/ и POST /api/tasks/ на асинхронном ORM."""
+    async_methods = ('get', 'post')
+    sync_actions = {'get': 'list', 'post': 'create'}
+
+    async def get(self, request):
+        """Страница задач пользователя с фильтрами TaskFilter."""
+        task_set = self.get_task_set(request, 'list')
+        queryset = task_set.filter_queryset(task_set.get_queryset())
+
+        async def validators():
+            version = await TaskSyncState.version(request.user.pk).afirst()
+            return conditional.make_etag(request, version, request.user.username), None
+
+        async def render():
+            if not settings.TASKS_FAST_LIST:
+                page = await task_set.paginator.apaginate_queryset(queryset, request, task_set)
+                data = task_set.get_serializer(page, many=True).data
+            else:
+                plan = TASK_ROW_PLAN.select(task_set.get_sparse_fields())
+                rows = plan.values(queryset, owner=request.user)
+                page = await task_set.paginator.apaginate_queryset(rows, request, task_set)
+                data = plan.rows(page, owner=request.user)
+            return task_set.get_paginated_response(data).data
+
+        return await self.conditional_response(request, validators, render)
+
+    async def post(self, request):
+        """Создание задачи; запись выполняется в потоке, как в TaskSet."""
+        task_set = self.get_task_set(request, 'create')
+        serializer = task_set.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(task_set.perform_create)(serializer)
+        return render_response(request, serializer.data, status.HTTP_201_CREATED)
+
+
+class AsyncTaskDetailView(AsyncTaskView):
+    """GET /api/tasks/{id}/ на асинхронном ORM, изменения - через TaskSet."""
+    async_methods = ('get',)
+    sync_actions = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+    async def get(self, request, pk):
+        """Задача пользователя по id."""
+        task_set = self.get_task_set(request, 'retrieve', pk=pk)
+        task = None
+
+        async def validators():
+            nonlocal task
+            task = await aget_object_or_404(task_set.get_queryset(), pk=pk)
+            etag = conditional.make_etag(request, task.pk, task.revision, request.user.username)
+            return etag, conditional.to_timestamp(task.updated_at)
+
+        async def render():
+            return task_set.get_serializer(task).data
+
+        return await self.conditional_response(request, validators, render)
+
+
+"""
+Маршруты асинхронных представлений; подключаются перед роутером DRF.
+"""
+urlpatterns = [
+    path('api/tasks/', AsyncTaskListView.as_view(), name='task-list'),
+    path('api/tasks/<int:pk>/', AsyncTaskDetailView.as_view(), name='task-detail'),
+]
@@ -0,0 +1,99 @@
+"""
+Аутентификация по JWT без загрузки пользователя из БД.
+
+Подписанный access-токен уже содержит id пользователя (USER_ID_CLAIM),
+а TaskTokenObtainPairSerializer добавляет в него username, is_staff и
+is_superuser. Поэтому для большинства запросов пользователь строится
+прямо из токена (TOKEN_USER_CLASS), без запроса к auth_user.
+
+Чтобы отзыв доступа (is_active=False), снятие прав администратора и
+смена имени (owner в ответах задач) срабатывали раньше истечения
+токена, флаги и имя пользователя кешируются в памяти процесса на
+JWT_USER_STATE_TTL секунд: другие процессы видят изменение не позже
+чем через TTL, процесс, сохранивший пользователя, - сразу (сигнал
+сбрасывает запись). TTL = 0 отключает проверку: токену доверяют
+полностью, и имя остается прежним до истечения токена.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+"""
+Кеш состояния пользователей: id -> (момент истечения, is_active, is_staff, is_superuser, username).
+"""
+_user_states = {}
+
+
+def get_user_state(user_id):
+    """Возвращает (is_active, is_staff, is_superuser, username) пользователя.
+
+    Значение берется из кеша процесса, а при его отсутствии или
+    истечении - одним запросом к БД. Удаленный пользователь неактивен."""
+    now = time.monotonic()
+    cached = _user_states.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1:]
+    state = get_user_model().objects.filter(pk=user_id).values_list(
+        'is_active', 'is_staff', 'is_superuser', get_user_model().USERNAME_FIELD
+    ).first() or (False, False, False, None)
+    if len(_user_states) >= settings.JWT_USER_STATE_CACHE_SIZE:
+        _user_states.clear()
+    _user_states[user_id] = (now + settings.JWT_USER_STATE_TTL, *state)
+    return state
+
+
+def forget_user_state(user_id=None):
+    """Удаляет состояние пользователя из кеша (или весь кеш, если id не указан)."""
+    if user_id is None:
+        _user_states.clear()
+    else:
+        _user_states.pop(user_id, None)
+
+
+class TaskTokenUser(TokenUser):
+    """Пользователь, построенный из access-токена.
+
+    Данные, которых нет в токене, загружаются из БД только при обращении."""
+    @cached_property
+    def id(self):
+        """id пользователя, приведенный к типу первичного ключа модели."""
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def username(self):
+        """Имя пользователя из токена или, для старых токенов, из БД."""
+        if 'username' in self.token:
+            return self.token['username']
+        return self.user.username
+
+    @cached_property
+    def user(self):
+        """Полная модель пользователя для представлений, которым она нужна."""
+        return get_user_model().objects.get(pk=self.pk)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT-аутентификация без запроса пользователя на каждый запрос.
+
+    Возвращает TOKEN_USER_CLASS, построенный из токена. Если задан
+    JWT_USER_STATE_TTL, проверяет активность пользователя и берет
+    флаги прав и имя из кеша процесса, а не из токена."""
+    def get_user(self, validated_token):
+        """Строит пользователя из токена и применяет актуальные флаги и имя."""
+        user = super().get_user(validated_token)
+        if settings.JWT_USER_STATE_TTL > 0:
+            is_active, is_staff, is_superuser, username = get_user_state(user.pk)
+            if not is_active:
+                raise AuthenticationFailed('User is inactive', code='user_inactive')
+            user.is_staff = is_staff
+            user.is_superuser = is_superuser
+            user.username = username
+        return user
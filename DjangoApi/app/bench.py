@@ -0,0 +1,148 @@
+"""
+Утилиты замеров производительности для команд-бенчмарков.
+
+Замеры выполняются на данных, созданных внутри транзакции, которая
+откатывается в конце (см. seeded), поэтому бенчмарки можно запускать
+на рабочей базе разработчика.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import StatelessJWTAuthentication
+from .models import Task, update_status_counters
+from .renderers import FastJSONRenderer
+from .serializers import TASK_ROW_PLAN, TaskSerializer, TaskTokenObtainPairSerializer
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(timings):
+    """Статистика списка времен в мс: min, median, mean, p90, p99, max."""
+    timings = sorted(timings)
+    return {
+        'min': timings[0],
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'p90': percentile(timings, 0.9),
+        'p99': percentile(timings, 0.99),
+        'max': timings[-1],
+    }
+
+
+def measure(func, repeat=5, warmup=1, number=1):
+    """Вызывает func warmup + repeat * number раз и возвращает статистику
+    времени одного вызова в мс (как timeit: number вызовов на замер)."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) * 1000 / number)
+    return summarize(timings)
+
+
+def create_tasks(owners, tasks_per_user, batch_size=5000):
+    """Создает задачи пользователям bulk_create-ом (без ревизий синхронизации)
+    и заполняет счетчики статусов."""
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    Task.objects.bulk_create(
+        (
+            Task(
+                title=f'Task {n}',
+                description=f'Description of task {n}',
+                status=statuses[n % len(statuses)],
+                owner=owner,
+            )
+            for owner in owners
+            for n in range(tasks_per_user)
+        ),
+        batch_size=batch_size,
+    )
+    update_status_counters(
+        (owner.pk, statuses[n % len(statuses)], 1) for owner in owners for n in range(tasks_per_user)
+    )
+
+
+@contextmanager
+def seeded(users, tasks_per_user, prefix='bench'):
+    """Создает пользователей и задачи в транзакции и откатывает ее на выходе.
+
+    Возвращает список созданных пользователей."""
+    with transaction.atomic():
+        owners = User.objects.bulk_create(
+            User(username=f'{prefix}_{i}', password='!') for i in range(max(users, 1))
+        )
+        create_tasks(owners, tasks_per_user)
+        try:
+            yield owners
+        finally:
+            transaction.set_rollback(True)
+
+
+"""
+Микробенчмарки: имя -> функция подготовки. Функция получает владельца
+задач и возвращает вызываемый объект без аргументов, время которого
+замеряется. Регистрируются декоратором micro.
+"""
+MICRO_BENCHMARKS = {}
+
+
+def micro(name):
+    """Регистрирует микробенчмарк под именем name."""
+    def register(setup):
+        MICRO_BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@micro('serialize_page_serializer')
+def bench_serializer_page(owner):
+    """Страница из 100 задач через TaskSerializer (модели уже загружены)."""
+    tasks = list(Task.objects.filter(owner=owner).order_by('id')[:100])
+    return lambda: TaskSerializer(tasks, many=True, context={'owner': owner}).data
+
+
+@micro('serialize_page_plan')
+def bench_plan_page(owner):
+    """Страница из 100 задач через TASK_ROW_PLAN (строки уже загружены)."""
+    queryset = Task.objects.filter(owner=owner).order_by('id')
+    rows = list(TASK_ROW_PLAN.values(queryset, owner=owner)[:100])
+    return lambda: TASK_ROW_PLAN.rows(rows, owner=owner)
+
+
+@micro('render_page_json')
+def bench_render_json(owner):
+    """JSON страницы из 100 задач стандартным JSONRenderer."""
+    rows = list(Task.objects.filter(owner=owner).order_by('id').values()[:100])
+    return lambda: JSONRenderer().render(rows)
+
+
+@micro('render_page_fast_json')
+def bench_render_fast_json(owner):
+    """JSON страницы из 100 задач FastJSONRenderer."""
+    rows = list(Task.objects.filter(owner=owner).order_by('id').values()[:100])
+    return lambda: FastJSONRenderer().render(rows)
+
+
+@micro('jwt_authenticate')
+def bench_jwt_authenticate(owner):
+    """Проверка access-токена и построение пользователя (флаги в кеше)."""
+    raw = str(TaskTokenObtainPairSerializer.get_token(owner).access_token).encode()
+    authentication = StatelessJWTAuthentication()
+
+    def authenticate():
+        authentication.get_user(authentication.get_validated_token(raw))
+    return authenticate
@@ -0,0 +1,94 @@
+"""
+Кеш ответов списка и карточки задач.
+
+Ключ ответа состоит из id пользователя, версии его данных и полного
+пути запроса (с параметрами фильтров и курсором). Версия хранится в
+кеше отдельным ключом; инвалидация удаляет этот ключ, после чего все
+ответы пользователя становятся недостижимыми и вытесняются по таймауту.
+Данные других пользователей при этом не затрагиваются.
+
+Бэкенд задается алиасом TASKS_CACHE_ALIAS в CACHES: locmem для
+разработки и тестов, Redis или Memcached для продакшена.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from . import metrics
+
+
+"""
+Счетчик попаданий и промахов кеша в реестре метрик (/metrics/).
+"""
+STATS_METRIC = 'api_cache_requests_total'
+
+
+def get_cache():
+    """Возвращает кеш ответов задач."""
+    return caches[settings.TASKS_CACHE_ALIAS]
+
+
+def version_key(user_id):
+    """Ключ версии данных пользователя."""
+    return f'tasks:version:{user_id}'
+
+
+def get_version(key):
+    """Возвращает версию по ключу, создавая новую при отсутствии."""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def drop_version(key):
+    """Удаляет версию по ключу.
+
+    Внутри транзакции удаление повторяется после коммита, чтобы ответ,
+    закешированный параллельным запросом до коммита, тоже был вытеснен."""
+    get_cache().delete(key)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def get_user_version(user_id):
+    """Возвращает текущую версию данных задач пользователя."""
+    return get_version(version_key(user_id))
+
+
+def request_variant(request):
+    """Вариант запроса для ключа ответа: полный путь и заголовок Accept."""
+    return f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+
+
+def response_key(user_id, variant):
+    """Ключ ответа пользователя на вариант запроса (путь, Accept).
+
+    Ключ содержит версию на момент вызова: ответ, построенный по данным,
+    которые изменились во время обработки запроса, сохранится под уже
+    устаревшей версией и не будет отдан."""
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f'tasks:response:{user_id}:{get_user_version(user_id)}:{digest}'
+
+
+def get_response(key):
+    """Возвращает закешированный ответ или None и обновляет счетчик метрик."""
+    entry = get_cache().get(key)
+    metrics.REGISTRY.increment(STATS_METRIC, 'result="miss"' if entry is None else 'result="hit"')
+    return entry
+
+
+def set_response(key, entry):
+    """Сохраняет ответ в кеш."""
+    get_cache().set(key, entry, settings.TASKS_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    """Сбрасывает все закешированные ответы задач пользователя."""
+    drop_version(version_key(user_id))
@@ -0,0 +1,203 @@
+"""
+Сжатие ответов API (CompressionMiddleware, включается настройкой API_COMPRESSION).
+
+Кодировка выбирается по заголовку Accept-Encoding из доступных: zstd
+(пакет zstandard), br (пакет brotli) и gzip (стандартная библиотека);
+при равном q предпочтение в этом порядке. Ответы меньше
+API_COMPRESSION_MIN_SIZE байт не сжимаются: выигрыш меньше затрат CPU
+и заголовков. Потоковые ответы (выгрузка, синхронизация) сжимаются по
+мере отдачи пачек, каждая пачка доходит до клиента сразу.
+
+Уровни сжатия подобраны для динамических ответов: быстрые, но с
+почти максимальной для JSON степенью сжатия (python manage.py bench_wire_formats).
+ETag сжатого ответа становится слабым (W/"...", RFC 9110, 8.8.3): тело
+побайтно отличается от несжатого. If-None-Match сравнивается слабо и
+дает 304 для обоих вариантов, а If-Match сверяет тег состояния объекта
+(app.conditional), который от сжатия не зависит.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli не обязателен
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard не обязателен
+    zstandard = None
+
+
+"""
+Уровни сжатия кодировок.
+"""
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class GzipCompressor:
+    """Потоковое сжатие gzip."""
+    encoding = 'gzip'
+    available = True
+
+    def __init__(self):
+        """Новый поток gzip."""
+        self.stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        """Сжимает очередную часть данных (результат может быть буферизован)."""
+        return self.stream.compress(data)
+
+    def flush(self):
+        """Выталкивает буферизованные данные, не завершая поток."""
+        return self.stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """Завершает поток."""
+        return self.stream.flush()
+
+
+class BrotliCompressor(GzipCompressor):
+    """Потоковое сжатие brotli."""
+    encoding = 'br'
+    available = brotli is not None
+
+    def __init__(self):
+        """Новый поток brotli."""
+        self.stream = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        """Сжимает очередную часть данных."""
+        return self.stream.process(data)
+
+    def flush(self):
+        """Выталкивает буферизованные данные."""
+        return self.stream.flush()
+
+    def finish(self):
+        """Завершает поток."""
+        return self.stream.finish()
+
+
+class ZstdCompressor(GzipCompressor):
+    """Потоковое сжатие zstd."""
+    encoding = 'zstd'
+    available = zstandard is not None
+
+    def __init__(self):
+        """Новый поток zstd."""
+        self.stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def flush(self):
+        """Выталкивает буферизованные данные законченным блоком."""
+        return self.stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        """Завершает поток."""
+        return self.stream.flush()
+
+
+"""
+Доступные кодировки в порядке предпочтения: кодировка -> класс компрессора.
+"""
+COMPRESSORS = {
+    cls.encoding: cls for cls in (ZstdCompressor, BrotliCompressor, GzipCompressor) if cls.available
+}
+
+
+def choose_encoding(accept_encoding):
+    """Кодировка ответа по Accept-Encoding или None, если сжимать нельзя."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in COMPRESSORS:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """Сжимает данные целиком."""
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает итератор пачек, отдавая сжатую пачку сразу после исходной."""
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    """Асинхронный вариант compress_stream для потоковых ответов ASGI."""
+    compressor = COMPRESSORS[encoding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def weaken_etag(response):
+    """Делает ETag ответа слабым."""
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['ETag'] = f'W/{etag}'
+
+
+def compress_response(request, response):
+    """Сжимает ответ, если клиент это допускает и ответ достаточно велик.
+
+    304 тела не имеет, но его ETag должен совпадать с ETag ответа 200,
+    который этот клиент получил бы сжатым, поэтому тоже ослабляется."""
+    if response.has_header('Content-Encoding'):
+        return response
+    if response.status_code == 304:
+        if choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', '')) is not None:
+            weaken_etag(response)
+        return response
+    if not response.streaming and len(response.content) < settings.API_COMPRESSION_MIN_SIZE:
+        return response
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = acompress_stream(response.streaming_content, encoding)
+        else:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+        del response.headers['Content-Length']
+    else:
+        with metrics.span('compress'):
+            content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response.headers['Content-Length'] = str(len(content))
+    response.headers['Content-Encoding'] = encoding
+    weaken_etag(response)
+    return response
@@ -0,0 +1,180 @@
+"""
+Условные запросы (ETag / Last-Modified) для ViewSet.
+
+Валидаторы ответа вычисляются по данным БД без сериализации строк:
+для списка задач - COUNT и MAX(updated_at) по отфильтрованному кверисету,
+для задачи - ее id и ревизия. GET с совпадающим If-None-Match или
+If-Modified-Since получает 304, а PUT/PATCH/DELETE с устаревшим
+If-Match или If-Unmodified-Since - 412 (оптимистическая блокировка).
+
+ETag состоит из двух частей: тега состояния (хеш состояния ресурса) и
+через точку тега варианта (хеш пути с параметрами и Accept).
+If-None-Match сравнивается со всем ETag: у каждого представления
+(?fields=, формат ответа) свой кеш у клиента. If-Match сравнивается
+только с тегом состояния: изменение разрешено с ETag любого
+представления того же состояния объекта, в том числе слабым (W/,
+ответ со сжатием), потому что тег состояния от представления не зависит.
+"""
+
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import quote_etag
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """Объект изменился после получения клиентом его ETag."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Объект был изменен, получите актуальную версию.'
+    default_code = 'precondition_failed'
+
+
+"""
+Разделитель тега состояния и тега варианта в ETag.
+"""
+TAG_SEPARATOR = '.'
+
+"""
+Длина тега варианта (символов sha1).
+"""
+VARIANT_LENGTH = 16
+
+
+def digest(*parts):
+    """sha1 от частей в hex."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def make_etag(request, *parts):
+    """Строит сильный ETag: тег состояния по частям и тег варианта по пути и Accept."""
+    variant = digest(request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))[:VARIANT_LENGTH]
+    return quote_etag(f'{digest(*parts)}{TAG_SEPARATOR}{variant}')
+
+
+def opaque_tag(etag):
+    """ETag без признака слабого сравнения W/."""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def state_tag(etag):
+    """Тег состояния ETag (без W/, кавычек и тега варианта)."""
+    return opaque_tag(etag).strip('"').partition(TAG_SEPARATOR)[0]
+
+
+def matches_state(etag, tags):
+    """If-Match: какой-либо из tags описывает то же состояние, что etag."""
+    if etag is None:
+        return False
+    return '*' in tags or state_tag(etag) in {state_tag(tag) for tag in tags}
+
+
+def matches_representation(etag, tags):
+    """If-None-Match: слабое сравнение etag с tags (RFC 9110, 13.1.2)."""
+    if etag is None:
+        return False
+    return '*' in tags or opaque_tag(etag) in {opaque_tag(tag) for tag in tags}
+
+
+def to_timestamp(value):
+    """Переводит datetime в секунды эпохи для Last-Modified."""
+    return int(value.timestamp()) if value is not None else None
+
+
+def precondition_failed():
+    """Ответ 412 на невыполненное условие запроса."""
+    return HttpResponse(status=status.HTTP_412_PRECONDITION_FAILED)
+
+
+def evaluate(request, etag, last_modified):
+    """Возвращает ответ 304/412, если условия запроса это требуют, иначе None.
+
+    Порядок проверок - RFC 9110, 13.2.2, как в django.utils.cache.get_conditional_response;
+    отличается только сравнение If-Match (по тегу состояния)."""
+    if_match = parse_etags(request.META.get('HTTP_IF_MATCH', ''))
+    if_unmodified_since = parse_http_date_safe(request.META.get('HTTP_IF_UNMODIFIED_SINCE', ''))
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    safe = request.method in ('GET', 'HEAD')
+
+    if if_match:
+        if not matches_state(etag, if_match):
+            return precondition_failed()
+    elif None not in (if_unmodified_since, last_modified) and last_modified > if_unmodified_since:
+        return precondition_failed()
+
+    if if_none_match:
+        if matches_representation(etag, if_none_match):
+            return HttpResponseNotModified() if safe else precondition_failed()
+    elif safe and None not in (if_modified_since, last_modified) and last_modified <= if_modified_since:
+        return HttpResponseNotModified()
+    return None
+
+
+def add_validators(response, etag, last_modified):
+    """Добавляет в ответ заголовки ETag и Last-Modified."""
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalMixin:
+    """Поддержка условных запросов для ModelViewSet.
+
+    Наследник реализует get_list_validators() и get_object_validators(),
+    возвращающие пару (etag, last_modified). etag = None отключает
+    проверку условий для запроса."""
+    def get_list_validators(self):
+        """Валидаторы ответа списка."""
+        raise NotImplementedError
+
+    def get_object_validators(self):
+        """Валидаторы ответа объекта."""
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        """Список с поддержкой If-None-Match / If-Modified-Since."""
+        return self.conditional_response(self.get_list_validators, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект с поддержкой If-None-Match / If-Modified-Since."""
+        return self.conditional_response(
+            self.get_object_validators, super().retrieve, request, *args, **kwargs
+        )
+
+    def update(self, request, *args, **kwargs):
+        """Обновление с проверкой If-Match; ответ содержит новый ETag."""
+        self.check_preconditions()
+        response = super().update(request, *args, **kwargs)
+        return add_validators(response, *self.get_object_validators())
+
+    def destroy(self, request, *args, **kwargs):
+        """Удаление с проверкой If-Match."""
+        self.check_preconditions()
+        return super().destroy(request, *args, **kwargs)
+
+    def conditional_response(self, validators, handler, request, *args, **kwargs):
+        """Возвращает 304 по валидаторам или ответ handler с заголовками валидаторов."""
+        etag, last_modified = validators()
+        response = None
+        if etag is not None:
+            response = evaluate(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return add_validators(response, etag, last_modified)
+
+    def check_preconditions(self):
+        """Проверяет If-Match / If-Unmodified-Since перед изменением объекта."""
+        etag, last_modified = self.get_object_validators()
+        if etag is not None and evaluate(self.request, etag, last_modified) is not None:
+            raise PreconditionFailed()
+
+    def get_object(self):
+        """Объект запроса; загружается один раз, даже если нужен и валидаторам, и обработчику."""
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
@@ -0,0 +1,108 @@
+"""
+Выборочные поля ответа (?fields= / ?omit=) для списков и объектов.
+
+?fields=title,status оставляет в ответе только перечисленные поля,
+?omit=description - все поля, кроме перечисленных. id возвращается
+всегда: по нему строится курсор пагинации и клиент ссылается на объект.
+
+Поля отсекаются на уровне SQL: выборка ограничивается колонками
+выбранных полей (.only(), а в быстром списке задач - .values() по
+урезанному плану), поэтому вместе с JSON уменьшается и чтение из БД -
+описание задачи (TextField) без него не читается вовсе.
+
+Параметры действуют для GET списка и объекта; ответы изменений
+(POST/PUT/PATCH) содержат все поля.
+"""
+
+from functools import lru_cache
+
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+"""
+Поле, которое возвращается при любом наборе.
+"""
+REQUIRED_FIELD = 'id'
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    """Поля ответа сериализатора (без write_only) в порядке объявления: {имя: поле}.
+
+    Составляются один раз на класс сериализатора."""
+    return {
+        name: field for name, field in serializer_class().fields.items() if not field.write_only
+    }
+
+
+def requested_fields(request, available):
+    """Поля ответа по ?fields= или ?omit= в порядке available; None без параметров."""
+    params = [param for param in (FIELDS_PARAM, OMIT_PARAM) if param in request.query_params]
+    if not params:
+        return None
+    if len(params) > 1:
+        raise ValidationError({'error': [f'Нельзя указывать {FIELDS_PARAM} и {OMIT_PARAM} вместе.']})
+    param = params[0]
+    names = {name.strip() for name in request.query_params[param].split(',') if name.strip()}
+    unknown = names.difference(available)
+    if unknown:
+        raise ValidationError({param: [f'Неизвестные поля: {", ".join(sorted(unknown))}.']})
+    omit = param == OMIT_PARAM
+    return tuple(
+        name for name in available if name == REQUIRED_FIELD or (name in names) != omit
+    )
+
+
+def model_columns(fields, serializer_fields, model):
+    """Поля модели, нужные для полей ответа: первая часть source, если это поле модели."""
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns = []
+    for name in fields:
+        column = serializer_fields[name].source.split('.')[0]
+        if column in concrete and column not in columns:
+            columns.append(column)
+    return columns
+
+
+class SparseFieldsetMixin:
+    """Выборочные поля ответа для ViewSet.
+
+    Для действий sparse_actions выборка filter_queryset ограничивается
+    колонками выбранных полей, а лишние поля убираются из сериализатора.
+    sparse_columns - поля модели, которые читаются всегда (нужны
+    представлению, например для валидаторов условных запросов)."""
+    sparse_actions = ('list', 'retrieve')
+    sparse_columns = ()
+
+    def get_sparse_fields(self):
+        """Выбранные поля ответа или None, если ответ полный."""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            if self.action in self.sparse_actions and not getattr(self, 'swagger_fake_view', False):
+                self._sparse_fields = requested_fields(
+                    self.request, readable_fields(self.get_serializer_class())
+                )
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        """Отфильтрованная выборка только с колонками выбранных полей."""
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = model_columns(fields, readable_fields(self.get_serializer_class()), queryset.model)
+        return queryset.only(*columns, *self.sparse_columns)
+
+    def get_serializer(self, *args, **kwargs):
+        """Сериализатор только с выбранными полями."""
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            child = getattr(serializer, 'child', serializer)
+            for name, field in list(child.fields.items()):
+                if name not in fields and not field.write_only:
+                    del child.fields[name]
+        return serializer
@@ -0,0 +1,37 @@
+"""
+Фильтры для списка задач.
+
+Все фильтры опираются на составные индексы модели Task, ведущим полем
+которых является owner_id, поэтому фильтрованная и постраничная выдача
+одного пользователя читается диапазонным сканированием индекса.
+Полнотекстовый поиск (?search=) описан в app.search.
+"""
+
+from django_filters import rest_framework as filters
+from .models import Task
+from .search import search_tasks
+
+
+class TaskFilter(filters.FilterSet):
+    """Фильтры задач.
+
+    Параметры запроса:
+    - status: один или несколько статусов (?status=new&status=in_progress)
+    - title__startswith: префикс названия
+    - id__gt / id__gte / id__lt / id__lte: диапазон id
+    - search: слова в названии или описании; результаты упорядочены
+      по релевантности"""
+    status = filters.MultipleChoiceFilter(choices=Task.STATUS_CHOICES)
+    search = filters.CharFilter(method='filter_search', label='Поиск по названию и описанию')
+
+    class Meta:
+        """Конфигурация фильтров."""
+        model = Task
+        fields = {
+            'title': ['startswith'],
+            'id': ['gt', 'gte', 'lt', 'lte'],
+        }
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с рангом search_rank."""
+        return search_tasks(queryset, value)
@@ -0,0 +1,136 @@
+"""
+Хешеры паролей с настраиваемой стоимостью и ограниченным пулом потоков.
+
+Алгоритм новых хешей выбирает настройка PASSWORD_HASH_ALGORITHM
+(pbkdf2, scrypt или argon2), стоимость - PASSWORD_PBKDF2_ITERATIONS,
+PASSWORD_SCRYPT_WORK_FACTOR, PASSWORD_ARGON2_*. Подобрать их под
+сервер помогает команда bench_passwords. Хеши других алгоритмов и с
+прежней стоимостью продолжают проверяться, а при успешном входе пароль
+перехешируется текущими параметрами (check_password с setter в Django).
+
+Хеширование и проверка выполняются в пуле из PASSWORD_HASH_WORKERS
+потоков на процесс: hashlib и argon2-cffi отпускают GIL, поэтому пул
+ограничивает число одновременно занятых хешированием ядер, а остальные
+потоки воркера продолжают обслуживать запросы. Пулы воркеров gunicorn
+независимы, и на сервере хешированием заняты до WEB_CONCURRENCY *
+PASSWORD_HASH_WORKERS потоков; по умолчанию пул процесса - ядра,
+деленные на число воркеров, чтобы вместе они не превышали число ядер. Если хеш не получен за
+PASSWORD_HASH_TIMEOUT секунд (пул перегружен волной входов), запрос
+получает 503 с Retry-After. PASSWORD_HASH_WORKERS=0 - хеширование в
+потоке запроса.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+"""
+Пул хеширования процесса: (pid, пул). После fork пул создается заново.
+"""
+_pool = None
+_pool_lock = threading.Lock()
+
+"""
+Признак потока пула: вложенные вызовы (verify -> encode) выполняются сразу.
+"""
+_local = threading.local()
+
+
+class PasswordHashingBusy(APIException):
+    """Пул хеширования паролей перегружен."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен проверкой паролей, повторите запрос позже.'
+    default_code = 'password_hashing_busy'
+
+    def __init__(self, wait):
+        """Ошибка с паузой до повтора wait секунд (Retry-After)."""
+        super().__init__()
+        self.wait = wait
+
+
+def get_pool():
+    """Пул хеширования текущего процесса."""
+    global _pool
+    pid = os.getpid()
+    with _pool_lock:
+        if _pool is None or _pool[0] != pid:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+            )
+            _pool = (pid, executor)
+        return _pool[1]
+
+
+def in_pool(func, *args, **kwargs):
+    """Выполняет func в потоке пула; в потоке пула и без пула - сразу."""
+    if not settings.PASSWORD_HASH_WORKERS or getattr(_local, 'active', False):
+        return func(*args, **kwargs)
+
+    def call():
+        _local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.active = False
+
+    future = get_pool().submit(call)
+    try:
+        return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise PasswordHashingBusy(settings.PASSWORD_HASH_TIMEOUT) from None
+
+
+class PooledHasherMixin:
+    """Хеширование, проверка и выравнивание времени - в пуле."""
+    def encode(self, *args, **kwargs):
+        """Хеш пароля."""
+        return in_pool(super().encode, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        """Проверка пароля по хешу."""
+        return in_pool(super().verify, password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        """Дополнительная работа для хешей с меньшей стоимостью."""
+        return in_pool(super().harden_runtime, password, encoded)
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций PASSWORD_PBKDF2_ITERATIONS."""
+    @property
+    def iterations(self):
+        """Число итераций новых хешей."""
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    """scrypt с параметром стоимости N = PASSWORD_SCRYPT_WORK_FACTOR."""
+    @property
+    def work_factor(self):
+        """Параметр N новых хешей (степень двойки)."""
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """Argon2id со стоимостью PASSWORD_ARGON2_* (нужен пакет argon2-cffi)."""
+    @property
+    def time_cost(self):
+        """Число проходов."""
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        """Память в КиБ."""
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        """Число потоков одного хеша."""
+        return settings.PASSWORD_ARGON2_PARALLELISM
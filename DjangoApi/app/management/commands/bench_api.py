@@ -0,0 +1,201 @@
+"""
+Команда bench_api.
+
+Воспроизводимый бенчмарк эндпоинтов API в процессе (тестовый клиент
+Django, полный стек middleware и представлений) на настроенной базе:
+SQLite или локальном PostgreSQL. Пользователи и задачи создаются в
+транзакции, которая откатывается в конце. Лимиты запросов
+(API_THROTTLE) на время бенчмарка отключаются.
+
+Для каждого сценария измеряются перцентили задержки, пропускная
+способность (запросы подряд в одном потоке) и число SQL-запросов на
+запрос. --micro добавляет микробенчмарки из app.bench.MICRO_BENCHMARKS.
+Результат печатается таблицей и, с --output, сохраняется в JSON;
+--baseline сравнивает медианы с прошлым результатом и завершается
+ошибкой при регрессии больше --threshold.
+
+Пример:
+    python manage.py bench_api --users 20 --tasks-per-user 1000 --requests 200 --output bench.json
+    python manage.py bench_api --baseline bench.json --threshold 0.2
+"""
+
+import json
+import platform
+import time
+from itertools import cycle
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app import cache
+from app.bench import MICRO_BENCHMARKS, measure, seeded, summarize
+from app.models import Task
+from app.serializers import TaskTokenObtainPairSerializer
+
+
+"""
+Пароль пользователя для сценария получения токена.
+"""
+BENCH_PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    """Бенчмарк эндпоинтов API."""
+    help = 'Измеряет задержки, пропускную способность и число запросов к БД эндпоинтов API.'
+
+    def add_arguments(self, parser):
+        """Объем данных, число запросов, сценарии и файлы результатов."""
+        parser.add_argument('--users', type=int, default=10, help='Количество пользователей')
+        parser.add_argument('--tasks-per-user', type=int, default=1000, help='Задач на пользователя')
+        parser.add_argument('--requests', type=int, default=100, help='Запросов на сценарий')
+        parser.add_argument('--warmup', type=int, default=5, help='Прогревочных запросов на сценарий')
+        parser.add_argument('--scenario', action='append', help='Запустить только указанные сценарии')
+        parser.add_argument('--micro', action='store_true', help='Добавить микробенчмарки')
+        parser.add_argument('--output', help='Файл для результатов в JSON')
+        parser.add_argument('--baseline', help='JSON прошлого запуска для сравнения')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост медианы относительно baseline (доля)')
+
+    def handle(self, *args, **options):
+        """Создает данные, выполняет сценарии, сохраняет и сравнивает результаты."""
+        with override_settings(API_THROTTLE=False), \
+                seeded(options['users'], options['tasks_per_user']) as owners:
+            owner = owners[len(owners) // 2]
+            owner.set_password(BENCH_PASSWORD)
+            owner.is_staff = True
+            owner.save()
+            scenarios = self.get_scenarios(owner)
+            selected = options['scenario'] or list(scenarios)
+            unknown = set(selected) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+            results = {}
+            for name in selected:
+                results[name] = self.run_scenario(*scenarios[name], options['requests'], options['warmup'])
+                self.report(name, results[name])
+            if options['micro']:
+                for name, setup in MICRO_BENCHMARKS.items():
+                    results[f'micro.{name}'] = measure(setup(owner), repeat=5, number=options['requests'])
+                    self.report(f'micro.{name}', results[f'micro.{name}'])
+        document = {'meta': self.get_meta(options), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(document, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+
+    def get_scenarios(self, owner):
+        """Сценарии: имя -> (подготовка перед запросом, запрос, ожидаемый код)."""
+        token = TaskTokenObtainPairSerializer.get_token(owner).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_ACCEPT='application/json')
+        task_ids = cycle(Task.objects.filter(owner=owner).values_list('id', flat=True)[:1000])
+
+        def invalidate():
+            cache.invalidate_user(owner.pk)
+
+        def nothing():
+            pass
+
+        def create():
+            return client.post(
+                reverse('task-list'), {'title': 'Bench', 'description': 'Bench'},
+                content_type='application/json',
+            )
+
+        def update():
+            return client.patch(
+                reverse('task-detail', args=[next(task_ids)]), {'status': 'completed'},
+                content_type='application/json',
+            )
+
+        def obtain_token():
+            return Client().post(
+                reverse('token_obtain_pair'), {'username': owner.username, 'password': BENCH_PASSWORD},
+                content_type='application/json',
+            )
+
+        return {
+            'tasks_list': (invalidate, lambda: client.get(reverse('task-list')), 200),
+            'tasks_list_cached': (nothing, lambda: client.get(reverse('task-list')), 200),
+            'tasks_list_filtered': (
+                invalidate, lambda: client.get(reverse('task-list'), {'status': 'completed'}), 200
+            ),
+            'tasks_detail': (
+                invalidate, lambda: client.get(reverse('task-detail', args=[next(task_ids)])), 200
+            ),
+            'tasks_create': (nothing, create, 201),
+            'tasks_update': (nothing, update, 200),
+            'tasks_changes': (nothing, lambda: client.get(reverse('task-changes')), 200),
+            'users_list': (nothing, lambda: client.get(reverse('user-list')), 200),
+            'token_obtain': (nothing, obtain_token, 200),
+        }
+
+    def run_scenario(self, prepare, request, expected, requests, warmup):
+        """Выполняет сценарий и возвращает статистику задержек и запросов к БД."""
+        for _ in range(warmup):
+            prepare()
+            request()
+        timings, queries, errors = [], [], 0
+        for _ in range(requests):
+            prepare()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = request()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(ctx.captured_queries))
+            errors += response.status_code != expected
+        stats = summarize(timings)
+        stats.update({
+            'requests': requests,
+            'errors': errors,
+            'rps': requests * 1000 / sum(timings),
+            'queries_mean': sum(queries) / len(queries),
+            'queries_max': max(queries),
+        })
+        return stats
+
+    def report(self, name, stats):
+        """Печатает строку результата."""
+        line = (
+            f"{name:<34} p50 {stats['median']:8.2f} мс  p90 {stats['p90']:8.2f}  "
+            f"p99 {stats['p99']:8.2f}"
+        )
+        if 'rps' in stats:
+            line += f"  {stats['rps']:8.1f} rps  SQL {stats['queries_mean']:.1f}"
+            if stats['errors']:
+                line += self.style.ERROR(f"  ошибок {stats['errors']}")
+        self.stdout.write(line)
+
+    def get_meta(self, options):
+        """Окружение и параметры запуска для сравнения между релизами."""
+        return {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'users': options['users'],
+            'tasks_per_user': options['tasks_per_user'],
+            'requests': options['requests'],
+        }
+
+    def compare(self, results, baseline_path, threshold):
+        """Сравнивает медианы с baseline и сообщает о регрессиях."""
+        with open(baseline_path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = []
+        for name, stats in results.items():
+            if name not in baseline:
+                continue
+            change = stats['median'] / baseline[name]['median'] - 1
+            self.stdout.write(f'{name:<34} {change:+.1%}')
+            if change > threshold:
+                regressions.append(f'{name} ({change:+.1%})')
+        if regressions:
+            raise CommandError('Регрессия производительности: ' + ', '.join(regressions))
@@ -0,0 +1,97 @@
+"""
+Команда bench_connections.
+
+Сравнивает задержку запроса к API при разных режимах соединений с БД.
+Запрос моделируется так же, как его обслуживает Django: обработчики
+request_started/request_finished (close_old_connections) закрывают или
+сохраняют соединение по CONN_MAX_AGE и CONN_HEALTH_CHECKS, а между ними
+выполняется --queries запросов. Режимы:
+- per_request - CONN_MAX_AGE=0, новое соединение на каждый запрос;
+- persistent - постоянное соединение без проверок;
+- persistent_checked - постоянное соединение с CONN_HEALTH_CHECKS;
+- pool - пул psycopg 3 (только PostgreSQL с установленным psycopg 3).
+
+Каждый режим использует отдельное соединение с настройками DATABASES
+['default'], поэтому результат не зависит от текущих DB_CONN_MAX_AGE
+и DB_POOL.
+
+Пример:
+    python manage.py bench_connections --requests 500 --queries 2
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.utils import load_backend
+
+from app.bench import measure
+
+
+"""
+Режимы: имя -> изменения настроек соединения.
+"""
+MODES = {
+    'per_request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': False},
+    'persistent_checked': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': True},
+}
+
+
+def pool_available():
+    """Пул соединений Django поддерживает только для psycopg 3."""
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+class Command(BaseCommand):
+    """Бенчмарк режимов соединений с БД."""
+    help = 'Сравнивает задержку запроса при новых, постоянных и пуловых соединениях с БД.'
+
+    def add_arguments(self, parser):
+        """Число запросов и SQL-запросов на запрос."""
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на режим')
+        parser.add_argument('--queries', type=int, default=2, help='SQL-запросов на запрос')
+
+    def handle(self, *args, **options):
+        """Замеряет режимы и печатает задержки относительно per_request."""
+        baseline = None
+        for name, changes in MODES.items():
+            if changes.get('pool') and not pool_available():
+                self.stdout.write(f'{name:<20} пропущен: нужен PostgreSQL и psycopg 3')
+                continue
+            wrapper = self.create_connection(name, changes)
+            try:
+                stats = measure(
+                    lambda: self.request(wrapper, options['queries']),
+                    repeat=options['requests'], warmup=2,
+                )
+            finally:
+                wrapper.close()
+                if changes.get('pool'):
+                    wrapper.close_pool()
+            baseline = baseline or stats['median']
+            self.stdout.write(
+                f"{name:<20} p50 {stats['median']:7.2f} мс  p90 {stats['p90']:7.2f}  "
+                f"p99 {stats['p99']:7.2f}  x{baseline / stats['median']:.1f}"
+            )
+
+    def create_connection(self, name, changes):
+        """Отдельное соединение с настройками default и изменениями режима."""
+        settings_dict = {**connection.settings_dict, 'OPTIONS': dict(connection.settings_dict['OPTIONS'])}
+        settings_dict.update({key: value for key, value in changes.items() if key != 'pool'})
+        settings_dict['OPTIONS'].pop('pool', None)
+        if changes.get('pool'):
+            settings_dict['OPTIONS']['pool'] = {'min_size': 1, 'max_size': 4}
+        return load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, f'bench_{name}')
+
+    @staticmethod
+    def request(wrapper, queries):
+        """Один запрос: close_old_connections, SQL-запросы, close_old_connections."""
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
@@ -0,0 +1,93 @@
+"""
+Команда bench_passwords.
+
+Замеряет стоимость проверки пароля (основная работа при получении
+токена) для алгоритмов PASSWORD_HASH_ALGORITHMS с текущими параметрами:
+- задержку одной проверки и входов в секунду на ядро;
+- пропускную способность --concurrency одновременных входов через пул
+  хеширования (PASSWORD_HASH_WORKERS).
+С --target-ms печатает параметры стоимости, при которых проверка
+занимает около target миллисекунд на этом сервере. Алгоритмы без
+установленной библиотеки (argon2-cffi) пропускаются.
+
+Пример:
+    python manage.py bench_passwords --target-ms 50
+    PASSWORD_HASH_ALGORITHM=scrypt PASSWORD_SCRYPT_WORK_FACTOR=16384 python manage.py bench_passwords
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from app.bench import measure
+
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    """Бенчмарк хеширования паролей."""
+    help = 'Измеряет задержку проверки пароля и число входов в секунду для алгоритмов хеширования.'
+
+    def add_arguments(self, parser):
+        """Алгоритмы, число проверок, параллельность и целевая задержка."""
+        parser.add_argument('--algorithm', action='append', choices=list(settings.PASSWORD_HASH_ALGORITHMS),
+                            help='Только указанные алгоритмы')
+        parser.add_argument('--requests', type=int, default=10, help='Проверок на замер')
+        parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1,
+                            help='Одновременных входов')
+        parser.add_argument('--target-ms', type=float, help='Подобрать стоимость под задержку, мс')
+
+    def handle(self, *args, **options):
+        """Замеряет алгоритмы и печатает задержки, входы в секунду и подбор."""
+        cores = os.cpu_count() or 1
+        self.stdout.write(f'ядер: {cores}, PASSWORD_HASH_WORKERS: {settings.PASSWORD_HASH_WORKERS}')
+        measured = 0
+        for algorithm in options['algorithm'] or settings.PASSWORD_HASH_ALGORITHMS:
+            hasher = import_string(settings.PASSWORD_HASH_ALGORITHMS[algorithm])()
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                self.stdout.write(f'{algorithm:<8} пропущен: {exc}')
+                continue
+            measured += 1
+            latency = measure(lambda: hasher.verify(PASSWORD, encoded), repeat=options['requests'])['median']
+            throughput = self.throughput(encoded, options['requests'] * 2, options['concurrency'])
+            self.stdout.write(
+                f'{algorithm:<8} проверка {latency:7.1f} мс  {1000 / latency:7.1f} входов/с на ядро  '
+                f'{throughput:7.1f} входов/с при {options["concurrency"]} одновременных'
+            )
+            if options['target_ms']:
+                self.stdout.write(f'         {self.tune(algorithm, hasher, latency, options["target_ms"])}')
+        if not measured:
+            raise CommandError('Нет доступных алгоритмов')
+
+    @staticmethod
+    def throughput(encoded, total, concurrency):
+        """Проверок в секунду при concurrency одновременных входах."""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: check_password(PASSWORD, encoded), range(total)))
+        if not all(results):
+            raise CommandError('Проверка пароля не прошла')
+        return total / (time.perf_counter() - started)
+
+    @staticmethod
+    def tune(algorithm, hasher, latency, target):
+        """Настройка стоимости алгоритма для задержки около target мс.
+
+        Время проверки растет линейно с итерациями PBKDF2, числом
+        проходов Argon2 и параметром N scrypt (степень двойки)."""
+        scale = target / latency
+        if algorithm == 'pbkdf2':
+            return f'PASSWORD_PBKDF2_ITERATIONS={max(1000, int(round(hasher.iterations * scale, -3)))}'
+        if algorithm == 'scrypt':
+            power = max(10, round(math.log2(hasher.work_factor * scale)))
+            return f'PASSWORD_SCRYPT_WORK_FACTOR={2 ** power}'
+        return f'PASSWORD_ARGON2_TIME_COST={max(1, round(hasher.time_cost * scale))}'
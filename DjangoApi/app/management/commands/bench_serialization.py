@@ -0,0 +1,60 @@
+"""
+Команда bench_serialization.
+
+Сравнивает построение JSON списка задач двумя путями:
+- serializer: модели + TaskSerializer(many=True) + JSONRenderer DRF;
+- fast: строки .values() по плану TASK_ROW_PLAN + FastJSONRenderer
+  (режим TASKS_FAST_LIST).
+Данные создаются в транзакции, которая откатывается. Перед замерами
+проверяется, что оба пути дают одинаковый JSON.
+
+Пример:
+    python manage.py bench_serialization --rows 1000 10000 100000
+"""
+
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from app.bench import measure, seeded
+from app.models import Task
+from app.renderers import FastJSONRenderer
+from app.serializers import TASK_ROW_PLAN, TaskSerializer
+
+
+class Command(BaseCommand):
+    """Бенчмарк сериализации списка задач."""
+    help = 'Сравнивает TaskSerializer и быстрый путь списка задач на разных объемах.'
+
+    def add_arguments(self, parser):
+        """Объемы выборки и число повторов."""
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Размеры выборки')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов на замер')
+
+    def handle(self, *args, **options):
+        """Создает задачи, сверяет результаты путей и печатает время."""
+        with seeded(1, max(options['rows'])) as (owner,):
+            self.stdout.write(f"{'строк':>8} {'serializer, мс':>15} {'fast, мс':>10} {'ускорение':>10}")
+            for rows in options['rows']:
+                queryset = Task.objects.filter(owner=owner).order_by('id')
+                slow = partial(self.serializer_path, queryset[:rows], owner)
+                fast = partial(self.fast_path, queryset, rows, owner)
+                if slow() != fast():
+                    raise CommandError(f'Результаты путей различаются на {rows} строках')
+                slow_ms = measure(slow, options['repeat'])['median']
+                fast_ms = measure(fast, options['repeat'])['median']
+                self.stdout.write(f'{rows:>8} {slow_ms:>15.1f} {fast_ms:>10.1f} {slow_ms / fast_ms:>9.1f}x')
+
+    @staticmethod
+    def serializer_path(queryset, owner):
+        """JSON списка через модели и TaskSerializer."""
+        data = TaskSerializer(list(queryset), many=True, context={'owner': owner}).data
+        return JSONRenderer().render(data)
+
+    @staticmethod
+    def fast_path(queryset, rows, owner):
+        """JSON списка через план полей и FastJSONRenderer."""
+        page = TASK_ROW_PLAN.values(queryset, owner=owner)[:rows]
+        return FastJSONRenderer().render(TASK_ROW_PLAN.rows(page, owner=owner))
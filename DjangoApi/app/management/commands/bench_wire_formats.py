@@ -0,0 +1,94 @@
+"""
+Команда bench_wire_formats.
+
+Сравнивает форматы ответа списка задач (JSON через FastJSONRenderer и
+MessagePack, если установлен msgpack) без сжатия и со сжатием каждой
+доступной кодировкой app.compression (gzip, br, zstd):
+- байт - размер тела ответа и его доля от несжатого JSON;
+- кодирование - рендеринг и сжатие ответа на сервере, мс;
+- разбор - распаковка и разбор тела парсером API, мс (так же клиент
+  читает ответ, а сервер - тело пакетного запроса).
+Строки берутся быстрым путем списка (TASK_ROW_PLAN) из задач, созданных
+в транзакции, которая откатывается; перед замерами проверяется, что
+разобранный ответ совпадает с исходным.
+
+Пример:
+    python manage.py bench_wire_formats --rows 100 1000 10000
+"""
+
+import gzip
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+
+from app import compression
+from app.bench import measure, seeded
+from app.models import Task
+from app.parsers import MessagePackParser
+from app.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from app.serializers import TASK_ROW_PLAN
+
+
+def decompress(data, encoding):
+    """Распаковывает тело в кодировке app.compression."""
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return compression.brotli.decompress(data)
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class Command(BaseCommand):
+    """Бенчмарк форматов и сжатия ответов."""
+    help = 'Сравнивает размер и время кодирования и разбора списка задач в JSON и MessagePack со сжатием.'
+
+    def add_arguments(self, parser):
+        """Размеры списка и число повторов."""
+        parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000],
+                            help='Число задач в списке')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов на замер')
+
+    def handle(self, *args, **options):
+        """Создает задачи и печатает таблицу по спискам, форматам и кодировкам."""
+        formats = {'json': (FastJSONRenderer(), JSONParser())}
+        if msgpack is not None:
+            formats['msgpack'] = (MessagePackRenderer(), MessagePackParser())
+        encodings = [None, *compression.COMPRESSORS]
+        with seeded(1, max(options['rows'])) as (owner,):
+            self.stdout.write(
+                f"{'строк':>6} {'формат':>8} {'сжатие':>7} {'байт':>10} {'доля':>6} "
+                f"{'кодирование, мс':>16} {'разбор, мс':>11}"
+            )
+            for rows in options['rows']:
+                queryset = Task.objects.filter(owner=owner).order_by('id')
+                data = TASK_ROW_PLAN.rows(TASK_ROW_PLAN.values(queryset, owner=owner)[:rows], owner=owner)
+                baseline = None
+                for name, (renderer, parser) in formats.items():
+                    for encoding in encodings:
+                        body, encode_ms, decode_ms = self.measure(data, renderer, parser, encoding, options)
+                        baseline = baseline or len(body)
+                        self.stdout.write(
+                            f"{rows:>6} {name:>8} {encoding or '-':>7} {len(body):>10} "
+                            f'{len(body) / baseline:>6.0%} {encode_ms:>16.2f} {decode_ms:>11.2f}'
+                        )
+
+    @staticmethod
+    def measure(data, renderer, parser, encoding, options):
+        """Тело ответа, медианы времени кодирования и разбора в мс."""
+        def encode():
+            body = renderer.render(data)
+            return body if encoding is None else compression.compress(body, encoding)
+
+        def decode():
+            raw = body if encoding is None else decompress(body, encoding)
+            return parser.parse(BytesIO(raw))
+
+        body = encode()
+        if decode() != data:
+            raise CommandError(f'Разобранный ответ {renderer.format}/{encoding} не совпадает с исходным')
+        return (
+            body,
+            measure(encode, options['repeat'])['median'],
+            measure(decode, options['repeat'])['median'],
+        )
@@ -0,0 +1,101 @@
+"""
+Команда explain_tasks.
+
+Заполняет таблицу задач тестовыми данными (в транзакции, которая
+откатывается), строит запросы так же, как их строит TaskSet с TaskFilter
+и курсорной пагинацией, и проверяет по EXPLAIN, что планировщик
+использует составные индексы модели Task.
+
+Пример:
+    python manage.py explain_tasks --users 50 --tasks-per-user 200
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app.filters import TaskFilter
+from app.models import Task
+from app.pagination import IdCursorPagination
+
+
+"""
+Сценарии проверки: название, параметры TaskFilter, ожидаемый индекс.
+"""
+SCENARIOS = [
+    ('list', {}, 'task_owner_id_idx'),
+    ('status', {'status': ['in_progress']}, 'task_owner_status_id_idx'),
+    ('status_range', {'status': ['completed'], 'id__gt': '0'}, 'task_owner_status_id_idx'),
+]
+
+"""
+Префиксный поиск по названию использует индекс с varchar_pattern_ops,
+который есть только в PostgreSQL.
+"""
+POSTGRES_SCENARIOS = [
+    ('title_prefix', {'title__startswith': 'Task 1'}, 'task_owner_title_idx'),
+]
+
+
+class Command(BaseCommand):
+    """Проверка планов выполнения запросов к задачам."""
+    help = 'Проверяет по EXPLAIN, что выборки задач используют составные индексы.'
+
+    def add_arguments(self, parser):
+        """Параметры объема тестовых данных."""
+        parser.add_argument('--users', type=int, default=50, help='Количество пользователей')
+        parser.add_argument('--tasks-per-user', type=int, default=200, help='Задач на пользователя')
+        parser.add_argument('--page-size', type=int, default=100, help='Размер страницы')
+
+    def handle(self, *args, **options):
+        """Заполняет данные, выполняет EXPLAIN и откатывает транзакцию."""
+        self.verbosity = options['verbosity']
+        with transaction.atomic():
+            owner = self.seed(options['users'], options['tasks_per_user'])
+            failures = self.check_plans(owner, options['page_size'])
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError('Индексы не используются: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Все выборки используют индексы'))
+
+    def seed(self, users, tasks_per_user):
+        """Создает пользователей и задачи, возвращает одного из владельцев."""
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        owners = User.objects.bulk_create(
+            User(username=f'explain_{i}', password='!') for i in range(max(users, 1))
+        )
+        Task.objects.bulk_create(
+            (
+                Task(
+                    title=f'Task {n}',
+                    description='',
+                    status=statuses[n % len(statuses)],
+                    owner=owner,
+                )
+                for owner in owners
+                for n in range(tasks_per_user)
+            ),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Task._meta.db_table}')
+        return owners[len(owners) // 2]
+
+    def check_plans(self, owner, page_size):
+        """Выполняет EXPLAIN для всех сценариев и возвращает список провалов."""
+        scenarios = SCENARIOS
+        if connection.vendor == 'postgresql':
+            scenarios = SCENARIOS + POSTGRES_SCENARIOS
+        failures = []
+        for name, params, index in scenarios:
+            queryset = TaskFilter(params, queryset=Task.objects.filter(owner=owner)).qs
+            queryset = queryset.order_by(IdCursorPagination.ordering)[:page_size + 1]
+            plan = queryset.explain()
+            used = index in plan
+            if not used:
+                failures.append(name)
+            marker = self.style.SUCCESS('OK') if used else self.style.ERROR('FAIL')
+            self.stdout.write(f'{marker} {name}: ожидается {index}')
+            if self.verbosity >= 2:
+                self.stdout.write(plan)
+        return failures
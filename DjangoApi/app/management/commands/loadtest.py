@@ -0,0 +1,136 @@
+"""
+Команда loadtest.
+
+Нагрузочный тест запущенного сервера: concurrency одновременных
+клиентов выполняют requests GET-запросов к API задач и сообщают
+пропускную способность и перцентили задержки. Клиент написан на
+asyncio и сокетах стандартной библиотеки, одно соединение на запрос.
+
+--client-delay имитирует медленных клиентов: заголовки запроса
+досылаются с задержкой. Синхронный сервер держит на таком клиенте
+поток или воркер, асинхронный (API_ASYNC=True под ASGI) - нет.
+
+Сервер под нагрузкой запускается с API_THROTTLE=False, иначе запросы
+сверх лимита tasks_read получат 429.
+
+Пример сравнения синхронного и асинхронного стека:
+    python manage.py runserver 8000
+    API_ASYNC=True uvicorn DjangoApi.asgi:application --port 8001
+    python manage.py loadtest --url http://127.0.0.1:8000 --username u --password p --client-delay 0.2
+    python manage.py loadtest --url http://127.0.0.1:8001 --username u --password p --client-delay 0.2
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.bench import percentile
+
+
+def decode_body(head, body):
+    """Тело ответа с учетом Transfer-Encoding: chunked."""
+    if b'transfer-encoding: chunked' not in head.lower():
+        return body
+    chunks = []
+    while body:
+        size, _, body = body.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b''.join(chunks)
+
+
+class Command(BaseCommand):
+    """Нагрузочный тест эндпоинтов задач."""
+    help = 'Нагрузочный тест API задач: пропускная способность и задержки.'
+
+    def add_arguments(self, parser):
+        """Адрес сервера, учетные данные и профиль нагрузки."""
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес сервера')
+        parser.add_argument('--path', default='/api/tasks/', help='Путь запроса')
+        parser.add_argument('--token', help='Access-токен')
+        parser.add_argument('--username', help='Логин для получения токена')
+        parser.add_argument('--password', help='Пароль для получения токена')
+        parser.add_argument('--requests', type=int, default=500, help='Всего запросов')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument('--client-delay', type=float, default=0.0,
+                            help='Задержка досылки заголовков, секунд (медленный клиент)')
+
+    def handle(self, *args, **options):
+        """Получает токен, выполняет нагрузку и печатает сводку."""
+        url = urlsplit(options['url'])
+        self.host, self.port = url.hostname, url.port or 80
+        token = options['token'] or asyncio.run(self.obtain_token(options))
+        stats = asyncio.run(self.run(
+            options['path'], token, options['requests'],
+            options['concurrency'], options['client_delay'],
+        ))
+        latencies = sorted(stats['latencies'])
+        self.stdout.write(
+            f"Запросов: {len(latencies)}, ошибок: {stats['errors']}, "
+            f"время: {stats['elapsed']:.2f} с, RPS: {len(latencies) / stats['elapsed']:.1f}"
+        )
+        self.stdout.write('Задержка, мс: ' + ', '.join(
+            f'{name} {percentile(latencies, fraction) * 1000:.1f}'
+            for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+        ))
+
+    async def obtain_token(self, options):
+        """Access-токен по логину и паролю через /api/token/."""
+        if not options['username'] or not options['password']:
+            raise CommandError('Укажите --token или --username и --password.')
+        body = json.dumps({'username': options['username'], 'password': options['password']})
+        code, payload = await self.send('POST', '/api/token/', None, body.encode())
+        if code != 200:
+            raise CommandError(f'Не удалось получить токен: {code} {payload[:200]!r}')
+        return json.loads(payload)['access']
+
+    async def send(self, method, path, token, body=b'', delay=0.0):
+        """Выполняет HTTP/1.1-запрос и возвращает (код, тело)."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            headers = [
+                f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                'Accept: application/json', 'Connection: close',
+            ]
+            if token:
+                headers.append(f'Authorization: Bearer {token}')
+            if body:
+                headers += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+            writer.write('\r\n'.join(headers).encode() + b'\r\n')
+            if delay:
+                await writer.drain()
+                await asyncio.sleep(delay)
+            writer.write(b'\r\n' + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        return int(head.split(b' ', 2)[1]), decode_body(head, payload)
+
+    async def run(self, path, token, total, concurrency, delay):
+        """Запускает клиентов и собирает задержки и число ошибок."""
+        stats = {'latencies': [], 'errors': 0}
+        remaining = iter(range(total))
+
+        async def client():
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    code, _ = await self.send('GET', path, token, delay=delay)
+                except (OSError, ValueError, IndexError):
+                    code = None
+                stats['latencies'].append(time.perf_counter() - started)
+                if code != 200:
+                    stats['errors'] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        stats['elapsed'] = time.perf_counter() - started
+        return stats
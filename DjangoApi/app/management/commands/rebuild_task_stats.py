@@ -0,0 +1,82 @@
+"""
+Команда rebuild_task_stats.
+
+Сверяет счетчики статусов задач (поля TaskSyncState) с фактическим числом
+задач и исправляет расхождения. Счетчики расходятся, только если задачи
+писались в обход модели и app.models.update_status_counters: сырым SQL,
+QuerySet.update(status=...), внешними загрузчиками.
+
+Фактические числа считаются одним GROUP BY по всем задачам. Счетчики
+пользователя с расхождением пересчитываются заново в транзакции под
+блокировкой его строки TaskSyncState - ту же строку блокирует каждая
+запись задач через модель, поэтому пересчет не теряет параллельных
+изменений.
+
+Пример:
+    python manage.py rebuild_task_stats --check
+    python manage.py rebuild_task_stats -v 2
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from app.models import Task, TaskSyncState
+
+
+def actual_counts(queryset):
+    """Число задач выборки по пользователям: {id: {статус: число}}."""
+    counts = {}
+    rows = queryset.values('owner_id', 'status').annotate(count=Count('id')).order_by()
+    for row in rows.iterator():
+        counts.setdefault(row['owner_id'], {})[row['status']] = row['count']
+    return counts
+
+
+def stored_counts():
+    """Значения счетчиков: {id пользователя: {статус: число}}."""
+    statuses = TaskSyncState.statuses()
+    return {
+        row['owner_id']: {status: row[status] for status in statuses if row[status]}
+        for row in TaskSyncState.objects.values('owner_id', *statuses).iterator()
+    }
+
+
+class Command(BaseCommand):
+    """Проверка и пересчет счетчиков статусов задач."""
+    help = 'Сверяет счетчики статусов задач с задачами и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        """Режим только проверки."""
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить; при расхождении завершиться с ошибкой')
+
+    def handle(self, *args, **options):
+        """Находит пользователей с расхождением и пересчитывает их счетчики."""
+        actual, stored = actual_counts(Task.objects.all()), stored_counts()
+        drifted = sorted(
+            owner_id for owner_id in actual.keys() | stored.keys()
+            if actual.get(owner_id, {}) != stored.get(owner_id, {})
+        )
+        for owner_id in drifted:
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'пользователь {owner_id}: счетчики {stored.get(owner_id, {})}, задачи {actual.get(owner_id, {})}'
+                )
+        if options['check']:
+            if drifted:
+                raise CommandError(f'Счетчики расходятся с задачами у {len(drifted)} пользователей')
+            self.stdout.write(self.style.SUCCESS('Счетчики совпадают с задачами'))
+            return
+        for owner_id in drifted:
+            self.rebuild(owner_id)
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано пользователей: {len(drifted)}'))
+
+    @staticmethod
+    def rebuild(owner_id):
+        """Пересчитывает счетчики пользователя под блокировкой его строки TaskSyncState."""
+        with transaction.atomic():
+            list(TaskSyncState.objects.select_for_update().filter(owner_id=owner_id))
+            counts = actual_counts(Task.objects.filter(owner_id=owner_id)).get(owner_id, {})
+            values = {status: counts.get(status, 0) for status in TaskSyncState.statuses()}
+            TaskSyncState.objects.update_or_create(owner_id=owner_id, defaults=values)
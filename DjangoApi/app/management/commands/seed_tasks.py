@@ -0,0 +1,289 @@
+"""
+Команда seed_tasks.
+
+Заполняет базу большим объемом пользователей и задач для нагрузочного
+тестирования и планирования емкости. В отличие от seeded из app.bench
+данные сохраняются.
+
+- Пароль хешируется один раз (make_password) и записывается всем
+  пользователям, вместо set_password на каждого.
+- Задачи вставляются пачками: bulk_create или, в PostgreSQL, COPY
+  (--method auto выбирает COPY, если он доступен).
+- --workers распределяет пользователей между процессами, каждый со
+  своим соединением с БД. SQLite сериализует запись, поэтому для него
+  параллельность не дает выигрыша.
+
+Распределение задач по пользователям (--distribution):
+- fixed - ровно --tasks-per-user каждому;
+- uniform - равномерно от 0 до 2 * --tasks-per-user;
+- pareto - тяжелый хвост (немного пользователей с очень большим числом
+  задач) со средним около --tasks-per-user.
+
+Данные детерминированы при одинаковом --seed. Задачи создаются без
+ревизий синхронизации (revision=0) и попадают в полную синхронизацию.
+Счетчики статусов (GET /api/tasks/stats/) обновляются в транзакции
+каждой пачки. bulk_create не отправляет post_save, поэтому версия данных
+пользователей (ETag /api/users/) меняется после вставки пользователей явно.
+
+Пример:
+    python manage.py seed_tasks --users 10000 --tasks-per-user 300 --workers 8 \\
+        --status-mix new=50,in_progress=30,completed=20 --description-length 20:400
+"""
+
+import io
+import multiprocessing
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from app.models import Task, UserDataVersion, update_status_counters
+
+
+"""
+Слова для генерации названий и описаний.
+"""
+WORDS = (
+    'report plan review meeting release budget design deploy test client server '
+    'invoice draft update backup migrate index query cache search sync export '
+    'import audit support ticket feature bug fix refactor document schedule'
+).split()
+
+"""
+Среднее распределения Парето с параметром формы PARETO_ALPHA равно
+alpha / (alpha - 1); на него нормируется число задач пользователя.
+"""
+PARETO_ALPHA = 1.5
+
+
+def parse_range(value):
+    """Диапазон 'MIN:MAX' (или одно число) в кортеж (min, max)."""
+    low, _, high = value.partition(':')
+    try:
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise CommandError(f'Ожидается диапазон вида MIN:MAX, получено {value!r}')
+    if low < 0 or high < low:
+        raise CommandError(f'Некорректный диапазон {value!r}')
+    return low, high
+
+
+def parse_status_mix(value):
+    """Доли статусов 'new=50,in_progress=30,completed=20' в (статусы, веса)."""
+    statuses = {choice for choice, _ in Task.STATUS_CHOICES}
+    mix = {}
+    for item in value.split(','):
+        status, _, weight = item.partition('=')
+        if status not in statuses:
+            raise CommandError(f'Неизвестный статус {status!r}')
+        try:
+            mix[status] = float(weight)
+        except ValueError:
+            raise CommandError(f'Некорректная доля статуса {item!r}')
+    if sum(mix.values()) <= 0:
+        raise CommandError('Сумма долей статусов должна быть положительной')
+    return list(mix), list(mix.values())
+
+
+def make_text(rng, length):
+    """Текст из WORDS длиной не больше length символов."""
+    words, size = [], 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length].rstrip()
+
+
+def tasks_count(rng, distribution, mean):
+    """Число задач пользователя по распределению."""
+    if distribution == 'fixed':
+        return mean
+    if distribution == 'uniform':
+        return rng.randint(0, 2 * mean)
+    scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    return int(scale * rng.paretovariate(PARETO_ALPHA))
+
+
+def generate_tasks(owner_id, options):
+    """Кортежи (title, description, status) задач пользователя.
+
+    Генератор случайных чисел зависит только от --seed и owner_id,
+    поэтому результат не зависит от числа процессов."""
+    rng = random.Random(f"{options['seed']}:{owner_id}")
+    statuses, weights = options['status_mix']
+    count = tasks_count(rng, options['distribution'], options['tasks_per_user'])
+    for status in rng.choices(statuses, weights, k=count):
+        yield (
+            make_text(rng, rng.randint(*options['title_length'])),
+            make_text(rng, rng.randint(*options['description_length'])),
+            status,
+        )
+
+
+def copy_available():
+    """COPY доступен в PostgreSQL с psycopg2 или psycopg 3."""
+    return connection.vendor == 'postgresql'
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY."""
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def insert_copy(rows, now):
+    """Вставляет пачку задач через COPY FROM STDIN."""
+    buffer = io.StringIO()
+    for owner_id, (title, description, status) in rows:
+        buffer.write('\t'.join(map(copy_value, (title, description, status, now, 0, owner_id))) + '\n')
+    buffer.seek(0)
+    sql = (
+        f'COPY {Task._meta.db_table} (title, description, status, updated_at, revision, owner_id) '
+        f'FROM STDIN'
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.read())
+
+
+def insert_bulk(rows, now):
+    """Вставляет пачку задач через bulk_create."""
+    Task.objects.bulk_create(
+        Task(title=title, description=description, status=status, owner_id=owner_id, updated_at=now)
+        for owner_id, (title, description, status) in rows
+    )
+
+
+def seed_owners(owner_ids, options):
+    """Создает задачи пользователям owner_ids пачками по batch_size.
+
+    Выполняется в основном процессе или в процессе-воркере; возвращает
+    число созданных задач."""
+    insert = insert_copy if options['method'] == 'copy' else insert_bulk
+    now = timezone.now()
+    created, batch = 0, []
+
+    def flush():
+        with transaction.atomic():
+            insert(batch, now)
+            update_status_counters((owner_id, status, 1) for owner_id, (_, _, status) in batch)
+
+    for owner_id in owner_ids:
+        for task in generate_tasks(owner_id, options):
+            batch.append((owner_id, task))
+            if len(batch) >= options['batch_size']:
+                flush()
+                created += len(batch)
+                batch = []
+    if batch:
+        flush()
+        created += len(batch)
+    return created
+
+
+def seed_worker(args):
+    """Точка входа процесса-воркера: собственное соединение с БД."""
+    owner_ids, options = args
+    connections.close_all()
+    try:
+        return seed_owners(owner_ids, options)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Генератор больших объемов тестовых данных."""
+    help = 'Создает пользователей и задачи пачками для нагрузочного тестирования.'
+
+    def add_arguments(self, parser):
+        """Объем, распределения, способ вставки и параллельность."""
+        parser.add_argument('--users', type=int, default=100, help='Количество пользователей')
+        parser.add_argument('--tasks-per-user', type=int, default=100,
+                            help='Задач на пользователя (среднее для uniform и pareto)')
+        parser.add_argument('--distribution', choices=['fixed', 'uniform', 'pareto'], default='fixed',
+                            help='Распределение числа задач по пользователям')
+        parser.add_argument('--status-mix', default='new=34,in_progress=33,completed=33',
+                            help='Доли статусов, например new=50,in_progress=30,completed=20')
+        parser.add_argument('--title-length', default='10:60', help='Длина названия, MIN:MAX символов')
+        parser.add_argument('--description-length', default='0:200',
+                            help='Длина описания, MIN:MAX символов')
+        parser.add_argument('--prefix', default='seed', help='Префикс имен пользователей')
+        parser.add_argument('--password', default='password', help='Пароль всех пользователей')
+        parser.add_argument('--method', choices=['auto', 'bulk', 'copy'], default='auto',
+                            help='Способ вставки задач')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Задач в пачке')
+        parser.add_argument('--workers', type=int, default=1, help='Процессов-воркеров')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+
+    def handle(self, *args, **options):
+        """Создает пользователей, затем задачи, и печатает скорость вставки."""
+        options = self.validate(options)
+        started = time.perf_counter()
+        owner_ids = self.create_users(options)
+        users_elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Пользователей: {len(owner_ids)} за {users_elapsed:.2f} с '
+            f'({len(owner_ids) / max(users_elapsed, 1e-9):.0f} строк/с)'
+        )
+        started = time.perf_counter()
+        created = self.create_tasks(owner_ids, options)
+        tasks_elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Задач: {created} за {tasks_elapsed:.2f} с ({created / max(tasks_elapsed, 1e-9):.0f} строк/с, "
+            f"{options['method']}, воркеров: {options['workers']})"
+        )
+
+    def validate(self, options):
+        """Разбирает диапазоны и доли статусов, выбирает способ вставки."""
+        options = dict(options)
+        options['status_mix'] = parse_status_mix(options['status_mix'])
+        options['title_length'] = parse_range(options['title_length'])
+        options['description_length'] = parse_range(options['description_length'])
+        max_title = Task._meta.get_field('title').max_length
+        if not 1 <= options['title_length'][0] or options['title_length'][1] > max_title:
+            raise CommandError(f'Длина названия должна быть от 1 до {max_title}')
+        if options['users'] < 1 or options['tasks_per_user'] < 0 or options['batch_size'] < 1:
+            raise CommandError('Некорректный объем данных')
+        if options['method'] == 'auto':
+            options['method'] = 'copy' if copy_available() else 'bulk'
+        elif options['method'] == 'copy' and not copy_available():
+            raise CommandError('COPY доступен только в PostgreSQL')
+        options['workers'] = max(1, min(options['workers'], options['users']))
+        if options['workers'] > 1 and connection.vendor == 'sqlite' and \
+                connection.is_in_memory_db():
+            raise CommandError('База SQLite в памяти не разделяется между процессами')
+        return options
+
+    def create_users(self, options):
+        """Создает пользователей с одним заранее вычисленным хешем пароля."""
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Пользователи с префиксом {prefix!r} уже есть, укажите другой --prefix')
+        password = make_password(options['password'])
+        owners = User.objects.bulk_create(
+            (User(username=f'{prefix}_{i}', password=password) for i in range(options['users'])),
+            batch_size=options['batch_size'],
+        )
+        UserDataVersion.bump()
+        if owners and owners[0].pk is None:
+            return list(User.objects.filter(username__startswith=f'{prefix}_').values_list('pk', flat=True))
+        return [owner.pk for owner in owners]
+
+    def create_tasks(self, owner_ids, options):
+        """Создает задачи в текущем процессе или в пуле воркеров."""
+        workers = options['workers']
+        if workers == 1:
+            return seed_owners(owner_ids, options)
+        chunks = [(owner_ids[i::workers], options) for i in range(workers)]
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            return sum(pool.imap_unordered(seed_worker, chunks))
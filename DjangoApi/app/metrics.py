@@ -0,0 +1,394 @@
+"""
+Метрики производительности запросов (включаются настройкой API_METRICS).
+
+Для каждого запроса PerformanceMiddleware собирает RequestTiming: общее
+время, время и число SQL-запросов, время отдельных этапов (serialize -
+построение данных ответа, render - кодирование в JSON) и размер ответа.
+Результаты агрегируются гистограммами по представлению (TaskSet.list,
+UserSet.retrieve, ...) и отдаются в текстовом формате Prometheus на
+/metrics/ вместе со счетчиками (COUNTERS): попаданиями и промахами кеша
+ответов задач.
+
+Текущий RequestTiming хранится в contextvar, поэтому запросы к БД и этапы
+относятся к своему запросу и в потоках WSGI, и в корутинах ASGI (включая
+код в sync_to_async).
+
+Метрики копятся в памяти процесса. Если задан API_METRICS_DIR (его задает
+gunicorn.conf.py при нескольких воркерах), каждый процесс раз в
+API_METRICS_FLUSH_SECONDS пишет снимок своих метрик в <pid>.json этого
+каталога, а /metrics/ суммирует снимки всех процессов - ответ не зависит
+от того, какой воркер его отдал. Завершающийся воркер (worker_exit)
+добавляет свой снимок в общий архив, поэтому счетчики не убывают при
+перезапусках, а число файлов не растет.
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+
+"""
+Таймер текущего запроса; None вне запроса или при выключенных метриках.
+"""
+_current = ContextVar('api_request_timing', default=None)
+
+"""
+Снимок, в который завершившиеся процессы добавляют свои метрики, и файл
+блокировки каталога снимков.
+"""
+ARCHIVE = 'archive.json'
+LOCK = '.lock'
+
+"""
+Границы корзин гистограмм: длительности в секундах, число запросов к БД
+и размер ответа в байтах.
+"""
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestTiming:
+    """Замеры одного запроса."""
+    __slots__ = ('started', 'db', 'queries', 'spans')
+
+    def __init__(self):
+        """Начинает отсчет времени запроса."""
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.spans = {}
+
+    def elapsed(self):
+        """Время с начала запроса, секунд."""
+        return time.perf_counter() - self.started
+
+    def add(self, name, seconds):
+        """Добавляет время к этапу name."""
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+def start():
+    """Начинает замеры запроса; возвращает (таймер, токен для finish)."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def finish(token):
+    """Завершает замеры запроса, начатые start."""
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Засекает время блока как этап name текущего запроса."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL (execute_wrapper): время и число запросов."""
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+def install(connection, **kwargs):
+    """Подключает record_query к соединению (обработчик connection_created)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def server_timing(timing, total):
+    """Значение заголовка Server-Timing."""
+    parts = [f'app;dur={total * 1000:.1f}', f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries"']
+    parts += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timing.spans.items()]
+    return ', '.join(parts)
+
+
+class Histogram:
+    """Гистограмма Prometheus: накопительные корзины, сумма и количество."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        """Пустая гистограмма с границами buckets."""
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Учитывает значение."""
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Метрики процесса: счетчик запросов, гистограммы по представлению и
+    счетчики с метками.
+
+    HISTOGRAMS - имя гистограммы -> (описание, границы корзин),
+    COUNTERS - имя счетчика -> описание."""
+    HISTOGRAMS = {
+        'api_request_duration_seconds': ('Время обработки запроса', DURATION_BUCKETS),
+        'api_request_db_duration_seconds': ('Время запросов к БД за запрос', DURATION_BUCKETS),
+        'api_request_db_queries': ('Число запросов к БД за запрос', QUERY_BUCKETS),
+        'api_request_serialize_duration_seconds': ('Время построения данных ответа', DURATION_BUCKETS),
+        'api_request_render_duration_seconds': ('Время кодирования ответа', DURATION_BUCKETS),
+        'api_response_size_bytes': ('Размер тела ответа', SIZE_BUCKETS),
+    }
+    COUNTERS = {
+        'api_cache_requests_total': 'Обращения к кешу ответов задач (result: hit, miss)',
+    }
+
+    def __init__(self):
+        """Пустой реестр."""
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.requests = {}
+        self.counters = {}
+        self.flush_lock = threading.Lock()
+        self.flusher = None
+        self.dirty = False
+        self.retired = False
+
+    def histogram(self, name, view):
+        """Гистограмма name представления view; вызывается под self.lock."""
+        histogram = self.histograms.get((name, view))
+        if histogram is None:
+            histogram = self.histograms[name, view] = Histogram(self.HISTOGRAMS[name][1])
+        return histogram
+
+    def observe(self, view, status_code, timing, total, size):
+        """Учитывает завершенный запрос представления view."""
+        values = {
+            'api_request_duration_seconds': total,
+            'api_request_db_duration_seconds': timing.db,
+            'api_request_db_queries': timing.queries,
+            'api_request_serialize_duration_seconds': timing.spans.get('serialize'),
+            'api_request_render_duration_seconds': timing.spans.get('render'),
+            'api_response_size_bytes': size,
+        }
+        with self.lock:
+            key = (view, str(status_code))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, value in values.items():
+                if value is not None:
+                    self.histogram(name, view).observe(value)
+        self.changed()
+
+    def increment(self, name, labels):
+        """Увеличивает счетчик name с метками labels (строка вида result="hit")."""
+        with self.lock:
+            self.counters[name, labels] = self.counters.get((name, labels), 0) + 1
+        self.changed()
+
+    def counter(self, name, labels):
+        """Текущее значение счетчика name с метками labels."""
+        return self.counters.get((name, labels), 0)
+
+    def snapshot(self):
+        """Метрики реестра в виде, пригодном для JSON."""
+        with self.lock:
+            return {
+                'requests': [[view, code, count] for (view, code), count in self.requests.items()],
+                'counters': [[name, labels, count] for (name, labels), count in self.counters.items()],
+                'histograms': [
+                    [name, view, list(histogram.counts), histogram.sum, histogram.count]
+                    for (name, view), histogram in self.histograms.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        """Добавляет к реестру метрики снимка (snapshot())."""
+        with self.lock:
+            for view, code, count in snapshot.get('requests', ()):
+                self.requests[view, code] = self.requests.get((view, code), 0) + count
+            for name, labels, count in snapshot.get('counters', ()):
+                self.counters[name, labels] = self.counters.get((name, labels), 0) + count
+            for name, view, counts, total, count in snapshot.get('histograms', ()):
+                histogram = self.histogram(name, view)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def changed(self):
+        """Отмечает новые значения для снимка и запускает запись снимков в процессе."""
+        if not shared_dir():
+            return
+        self.dirty = True
+        if self.flusher != os.getpid():
+            with self.flush_lock:
+                if self.flusher == os.getpid():
+                    return
+                self.flusher = os.getpid()
+            threading.Thread(target=self.flush_loop, name='api-metrics-flush', daemon=True).start()
+
+    def flush_loop(self):
+        """Пишет снимок процесса раз в API_METRICS_FLUSH_SECONDS, если были новые значения."""
+        while not self.retired:
+            time.sleep(settings.API_METRICS_FLUSH_SECONDS)
+            if self.dirty:
+                self.flush()
+
+    def flush(self):
+        """Записывает снимок процесса в API_METRICS_DIR/<pid>.json."""
+        directory = shared_dir()
+        with self.flush_lock:
+            if not directory or self.retired:
+                return
+            self.dirty = False
+            write_json(os.path.join(directory, f'{os.getpid()}.json'), self.snapshot())
+
+    def retire(self):
+        """Переносит метрики завершающегося процесса в архив каталога снимков
+        и удаляет снимок процесса (worker_exit в gunicorn.conf.py)."""
+        directory = shared_dir()
+        with self.flush_lock:
+            if not directory or self.retired:
+                return
+            self.retired = True
+            with locked(directory, fcntl.LOCK_EX):
+                archive = Registry()
+                archive.merge(read_json(os.path.join(directory, ARCHIVE)))
+                archive.merge(self.snapshot())
+                write_json(os.path.join(directory, ARCHIVE), archive.snapshot())
+                try:
+                    os.remove(os.path.join(directory, f'{os.getpid()}.json'))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """Сбрасывает все метрики."""
+        with self.lock:
+            self.histograms.clear()
+            self.requests.clear()
+            self.counters.clear()
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self.lock:
+            lines = [
+                '# HELP api_requests_total Число обработанных запросов',
+                '# TYPE api_requests_total counter',
+            ]
+            for (view, code), count in sorted(self.requests.items()):
+                lines.append(f'api_requests_total{{view="{view}",status="{code}"}} {count}')
+            for name, description in self.COUNTERS.items():
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+                for (metric, labels), count in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{{{labels}}} {count}')
+            for name, (description, _) in self.HISTOGRAMS.items():
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for (metric, view), histogram in sorted(self.histograms.items()):
+                    if metric == name:
+                        lines += self.render_histogram(name, view, histogram)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def render_histogram(name, view, histogram):
+        """Строки одной гистограммы."""
+        lines, cumulative = [], 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        lines += [
+            f'{name}_bucket{{view="{view}",le="+Inf"}} {histogram.count}',
+            f'{name}_sum{{view="{view}"}} {histogram.sum:g}',
+            f'{name}_count{{view="{view}"}} {histogram.count}',
+        ]
+        return lines
+
+
+"""
+Реестр метрик процесса.
+"""
+REGISTRY = Registry()
+
+
+def shared_dir():
+    """Каталог снимков метрик процессов или '' (метрики только процесса)."""
+    return settings.API_METRICS_DIR if settings.API_METRICS else ''
+
+
+def read_json(path):
+    """Снимок из файла или пустой снимок, если файла нет."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_json(path, snapshot):
+    """Атомарно записывает снимок: читатели видят старый или новый файл целиком."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(snapshot, file)
+    os.replace(temporary, path)
+
+
+@contextmanager
+def locked(directory, operation):
+    """Блокировка каталога снимков (fcntl.LOCK_SH - чтение, LOCK_EX - архивирование)."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK), 'a') as file:
+        fcntl.flock(file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def collect():
+    """Метрики для /metrics/: сумма снимков всех процессов или реестр процесса."""
+    directory = shared_dir()
+    if not directory:
+        return REGISTRY
+    REGISTRY.flush()
+    total = Registry()
+    with locked(directory, fcntl.LOCK_SH):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                total.merge(read_json(os.path.join(directory, name)))
+    return total
+
+
+def metrics_view(request):
+    """GET /metrics/ - метрики в формате Prometheus.
+
+    Доступен при API_METRICS; если задан API_METRICS_TOKEN, требуется
+    заголовок Authorization: Bearer <токен>."""
+    if not settings.API_METRICS:
+        raise Http404()
+    token = settings.API_METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=403)
+    return HttpResponse(collect().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
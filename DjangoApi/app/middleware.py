@@ -0,0 +1,165 @@
+"""
+Middleware приложения.
+
+PerformanceMiddleware замеряет каждый запрос (см. app.metrics) и
+добавляет заголовок Server-Timing, QueryCheckMiddleware ищет N+1 и
+медленные SQL-запросы (см. app.querycheck), ReplicaMiddleware ведет
+маршрутизацию чтений на реплики (см. app.routers), CompressionMiddleware
+сжимает ответы (см. app.compression). Выключенные настройками
+middleware Django исключает из цепочки (MiddlewareNotUsed), и
+накладных расходов нет.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+
+from . import compression, metrics, querycheck, routers
+
+
+def view_label(request):
+    """Имя представления запроса для меток метрик и отчетов.
+
+    Для ViewSet - класс и действие (TaskSet.list), для других
+    представлений на классах - класс и метод, иначе имя маршрута."""
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return match.view_name or func.__name__
+    actions = getattr(func, 'actions', None) or {}
+    method = request.method.lower()
+    return f'{cls.__name__}.{actions.get(method, method)}'
+
+
+class ContextMiddleware:
+    """Основа middleware, которое ведет состояние на время запроса.
+
+    start(request) вызывается до обработки запроса и возвращает
+    (состояние, токен contextvar), finish() - после, process() получает ответ.
+    Работает и в синхронном, и в асинхронном стеке."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Включает middleware или исключает его из цепочки."""
+        if not self.enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Обрабатывает запрос в синхронном стеке."""
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(token)
+        return self.process(request, response, state)
+
+    async def __acall__(self, request):
+        """Обрабатывает запрос в асинхронном стеке."""
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(token)
+        return self.process(request, response, state)
+
+
+class PerformanceMiddleware(ContextMiddleware):
+    """Замеры времени, запросов к БД, этапов и размера ответа.
+
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать остальные middleware."""
+    finish = staticmethod(metrics.finish)
+
+    def enabled(self):
+        """Включен при API_METRICS; подключает обертку запросов к БД."""
+        if not settings.API_METRICS:
+            return False
+        connection_created.connect(metrics.install, dispatch_uid='app.metrics.install')
+        for connection in connections.all(initialized_only=True):
+            metrics.install(connection)
+        return True
+
+    def start(self, request):
+        """Таймер запроса."""
+        return metrics.start()
+
+    def process(self, request, response, timing):
+        """Учитывает запрос в метриках и добавляет Server-Timing.
+
+        Размер потоковых ответов неизвестен и не учитывается."""
+        total = timing.elapsed()
+        size = None if response.streaming else len(response.content)
+        metrics.REGISTRY.observe(view_label(request), response.status_code, timing, total, size)
+        response['Server-Timing'] = metrics.server_timing(timing, total)
+        return response
+
+
+class QueryCheckMiddleware(ContextMiddleware):
+    """Проверка запросов к БД на N+1 и медленные запросы (QUERY_CHECK)."""
+    finish = staticmethod(querycheck.finish)
+
+    def enabled(self):
+        """Включен при QUERY_CHECK=warn или strict."""
+        if not settings.QUERY_CHECK:
+            return False
+        querycheck.enable()
+        return True
+
+    def start(self, request):
+        """Журнал запросов к БД."""
+        return querycheck.start()
+
+    def process(self, request, response, log):
+        """Сообщает о проблемах с указанием представления.
+
+        В строгом режиме исключение отдается обработчику Django: в тестах
+        клиент поднимает его и тест проваливается."""
+        log.view = view_label(request)
+        log.check()
+        return response
+
+
+class ReplicaMiddleware(ContextMiddleware):
+    """Состояние маршрутизации чтений на реплики (DB_REPLICAS).
+
+    После запроса с записью чтения пользователя на время
+    DB_REPLICA_STICKY_SECONDS идут на основную базу."""
+    start = staticmethod(routers.start)
+    finish = staticmethod(routers.finish)
+
+    def enabled(self):
+        """Включен, если настроены реплики."""
+        return bool(settings.DB_REPLICA_ALIASES)
+
+    def process(self, request, response, state):
+        """Запоминает запись пользователя для read-after-write."""
+        routers.remember_write(state)
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов zstd/br/gzip по Accept-Encoding (API_COMPRESSION).
+
+    Стоит сразу после PerformanceMiddleware: метрики учитывают время
+    сжатия и размер сжатого ответа."""
+    def __init__(self, get_response):
+        """Включает middleware или исключает его из цепочки."""
+        if not settings.API_COMPRESSION:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        """Сжимает ответ, если клиент это допускает."""
+        return compression.compress_response(request, response)
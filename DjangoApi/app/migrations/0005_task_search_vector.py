@@ -0,0 +1,44 @@
+"""
+Колонка полнотекстового поиска задач (см. app.search).
+
+Только для PostgreSQL: search_vector вычисляется базой при записи
+(GENERATED ... STORED) и индексируется GIN. Колонка не описана в модели,
+поэтому обычные выборки задач ее не читают. Конфигурация 'simple'
+совпадает с app.search.SEARCH_CONFIG. На других базах миграция ничего
+не делает, поиск там идет запасным путем.
+"""
+
+from django.db import migrations
+
+
+ADD_SEARCH_VECTOR = """
+ALTER TABLE app_task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A')
+    || setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX task_search_vector_idx ON app_task USING GIN (search_vector);
+"""
+
+REMOVE_SEARCH_VECTOR = """
+DROP INDEX IF EXISTS task_search_vector_idx;
+ALTER TABLE app_task DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def run_on_postgresql(sql):
+    """Операция миграции, выполняющая sql только на PostgreSQL."""
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_task_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(ADD_SEARCH_VECTOR), run_on_postgresql(REMOVE_SEARCH_VECTOR)),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счетчики статусов по существующим задачам одним GROUP BY."""
+    Task = apps.get_model('app', 'Task')
+    TaskSyncState = apps.get_model('app', 'TaskSyncState')
+    counts = {}
+    for row in Task.objects.values('owner_id', 'status').annotate(count=Count('id')).order_by():
+        counts.setdefault(row['owner_id'], {})[row['status']] = row['count']
+    existing = set(TaskSyncState.objects.filter(owner_id__in=counts).values_list('owner_id', flat=True))
+    TaskSyncState.objects.bulk_create(
+        TaskSyncState(owner_id=owner_id) for owner_id in counts.keys() - existing
+    )
+    for owner_id, statuses in counts.items():
+        TaskSyncState.objects.filter(owner_id=owner_id).update(**statuses)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasksyncstate',
+            name='completed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tasksyncstate',
+            name='in_progress',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tasksyncstate',
+            name='new',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,208 @@
 Модельки DjangoApi.
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.contrib.auth.models import User
 
+from . import cache
+
+
+class TaskSyncState(models.Model):
+    """Состояние задач пользователя: счетчик ревизий для синхронизации и
+    число задач по статусам.
+    Атрибуты:
+        owner - пользователь;
+        revision - последняя выданная ревизия;
+        new, in_progress, completed - число задач в статусе (имена полей
+        совпадают со статусами Task.STATUS_CHOICES).
+
+    Ревизии выдаются UPDATE-ом строки пользователя внутри транзакции записи
+    задачи, поэтому строка заблокирована до коммита: записи одного
+    пользователя получают ревизии в порядке коммита, и токен синхронизации
+    монотонен без пропусков видимых изменений.
+
+    Счетчики статусов меняются тем же UPDATE-ом при создании, смене статуса
+    и удалении задачи, поэтому статистика (GET /api/tasks/stats/) читается
+    одной строкой без GROUP BY по задачам и не стоит записи лишнего запроса."""
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    revision = models.BigIntegerField(default=0)
+    new = models.BigIntegerField(default=0)
+    in_progress = models.BigIntegerField(default=0)
+    completed = models.BigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, owner_id, count=1, statuses=None):
+        """Резервирует count ревизий пользователя и возвращает последнюю из них.
+
+        statuses - изменения счетчиков {статус: разница}, применяемые тем же
+        UPDATE-ом. Вызывается только внутри транзакции."""
+        cls.update_row(owner_id, revision=F('revision') + count, **cls.status_changes(statuses))
+        return cls.objects.filter(owner_id=owner_id).values_list('revision', flat=True).get()
+
+    @classmethod
+    def count_statuses(cls, owner_id, statuses):
+        """Меняет счетчики статусов без выдачи ревизий (загрузка задач в обход синхронизации)."""
+        changes = cls.status_changes(statuses)
+        if changes:
+            cls.update_row(owner_id, **changes)
+
+    @classmethod
+    def update_row(cls, owner_id, **changes):
+        """UPDATE строки пользователя; строка создается при первой записи."""
+        if not cls.objects.filter(owner_id=owner_id).update(**changes):
+            cls.objects.bulk_create([cls(owner_id=owner_id)], ignore_conflicts=True)
+            cls.objects.filter(owner_id=owner_id).update(**changes)
+
+    @classmethod
+    def status_changes(cls, statuses):
+        """Выражения UPDATE для ненулевых изменений счетчиков {статус: разница}."""
+        return {status: F(status) + delta for status, delta in (statuses or {}).items() if delta}
+
+    @classmethod
+    def current(cls, owner_id):
+        """Последняя выданная ревизия пользователя (0, если записей не было)."""
+        return cls.objects.filter(owner_id=owner_id).values_list('revision', flat=True).first() or 0
+
+    @classmethod
+    def version(cls, owner_id):
+        """Кверисет версии задач пользователя для ETag списка: ревизия и счетчики статусов.
+
+        Строка меняется при каждой записи задач, включая удаление (в отличие
+        от MAX(updated_at)) и загрузку в обход ревизий (счетчики), и читается
+        по первичному ключу. Возвращается кверисет: first() или afirst()."""
+        return cls.objects.filter(owner_id=owner_id).values_list('revision', *cls.statuses())
+
+    @staticmethod
+    def statuses():
+        """Статусы задач, они же имена полей счетчиков."""
+        return [status for status, _ in Task.STATUS_CHOICES]
+
+    @classmethod
+    def stats(cls, owner_id=None):
+        """Число задач по статусам и всего: пользователя или всех пользователей."""
+        statuses = cls.statuses()
+        if owner_id is None:
+            counts = cls.objects.aggregate(**{status: Sum(status) for status in statuses})
+        else:
+            counts = cls.objects.filter(owner_id=owner_id).values(*statuses).first() or {}
+        counts = {status: counts.get(status) or 0 for status in statuses}
+        counts['total'] = sum(counts.values())
+        return counts
+
+
+class UserDataVersion(models.Model):
+    """Версия данных пользователей для ETag ответов UserSet.
+    Атрибуты:
+        revision - число изменений пользователей.
+
+    Одна строка (ROW_ID). Версия увеличивается UPDATE-ом в транзакции
+    каждого сохранения и удаления пользователя (app.signals), поэтому
+    меняется вместе с данными при коммите и одна для всех процессов."""
+    ROW_ID = 1
+    revision = models.BigIntegerField(default=0)
+
+    @classmethod
+    def bump(cls):
+        """Отмечает изменение пользователей; строка создается при первом изменении."""
+        rows = cls.objects.filter(pk=cls.ROW_ID)
+        if not rows.update(revision=F('revision') + 1):
+            cls.objects.bulk_create([cls(pk=cls.ROW_ID)], ignore_conflicts=True)
+            rows.update(revision=F('revision') + 1)
+
+    @classmethod
+    def current(cls):
+        """Текущая версия данных пользователей (0, если изменений не было)."""
+        return cls.objects.filter(pk=cls.ROW_ID).values_list('revision', flat=True).first() or 0
+
+
+class TaskTombstone(models.Model):
+    """Отметка об удалении задачи для синхронизации.
+    Атрибуты:
+        owner - владелец удаленной задачи;
+        task_id - id удаленной задачи;
+        revision - ревизия удаления."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    task_id = models.BigIntegerField()
+    revision = models.BigIntegerField()
+
+    class Meta:
+        """Индекс под выборку удалений пользователя после ревизии."""
+        indexes = [
+            models.Index(fields=['owner', 'revision'], name='tombstone_owner_revision_idx'),
+        ]
+
+
+def group_status_changes(changes):
+    """Группирует тройки (id владельца, статус, разница) по владельцам."""
+    by_owner = {}
+    for owner_id, status, delta in changes:
+        statuses = by_owner.setdefault(owner_id, {})
+        statuses[status] = statuses.get(status, 0) + delta
+    return by_owner
+
+
+def assign_revisions(tasks, changes=()):
+    """Выдает ревизии задачам, сохраняемым в обход save() (bulk_create/bulk_update).
+
+    changes - изменения счетчиков статусов, тройки (id владельца, статус, разница)."""
+    by_owner = {}
+    for task in tasks:
+        by_owner.setdefault(task.owner_id, []).append(task)
+    statuses = group_status_changes(changes)
+    for owner_id, owner_tasks in by_owner.items():
+        last = TaskSyncState.allocate(owner_id, len(owner_tasks), statuses.get(owner_id))
+        for offset, task in enumerate(owner_tasks, start=last - len(owner_tasks) + 1):
+            task.revision = offset
+
+
+def record_tombstones(rows):
+    """Создает отметки об удалении для троек (id задачи, id владельца, статус)."""
+    by_owner = {}
+    for task_id, owner_id, status in rows:
+        by_owner.setdefault(owner_id, []).append(task_id)
+    statuses = group_status_changes((owner_id, status, -1) for _, owner_id, status in rows)
+    tombstones = []
+    for owner_id, task_ids in by_owner.items():
+        last = TaskSyncState.allocate(owner_id, len(task_ids), statuses[owner_id])
+        first = last - len(task_ids) + 1
+        tombstones.extend(
+            TaskTombstone(owner_id=owner_id, task_id=task_id, revision=first + offset)
+            for offset, task_id in enumerate(task_ids)
+        )
+    TaskTombstone.objects.bulk_create(tombstones)
+
+
+def update_status_counters(changes):
+    """Меняет счетчики статусов задач, записанных в обход модели и синхронизации
+    (seed_tasks, бенчмарки). changes - тройки (id владельца, статус, разница)."""
+    for owner_id, statuses in group_status_changes(changes).items():
+        TaskSyncState.count_statuses(owner_id, statuses)
+
+
+class TaskQuerySet(models.QuerySet):
+    """Кверисет задач, фиксирующий удаления для синхронизации."""
+    def delete(self):
+        """Удаляет задачи, создав для них отметки об удалении."""
+        with transaction.atomic(savepoint=False):
+            return self.delete_rows(list(self.values_list('id', 'owner_id', 'status')))
+
+    def delete_rows(self, rows):
+        """Удаляет задачи по уже прочитанным тройкам (id задачи, id владельца, статус).
+
+        Задачи удаляются одним DELETE без загрузки моделей и сигналов на
+        каждую строку (на Task нет внешних ключей), поэтому кеш ответов
+        сбрасывается здесь - один раз на владельца, а не на задачу."""
+        if not rows:
+            return 0, {}
+        with transaction.atomic(savepoint=False):
+            record_tombstones(rows)
+            queryset = self.model.objects.filter(id__in=[task_id for task_id, _, _ in rows])
+            deleted = queryset._raw_delete(queryset.db)
+            for owner_id in {owner_id for _, owner_id, _ in rows}:
+                cache.invalidate_user(owner_id)
+        return deleted, {self.model._meta.label: deleted}
+
 
 class Task(models.Model):
     """Модель задачи.
@@ -12,7 +211,9 @@ class Task(models.Model):
         title - название задачи;
         description - описание задачи;
         status - статус задачи;
-        owner - владелец задачи."""
+        owner - владелец задачи;
+        updated_at - время последнего изменения;
+        revision - ревизия последнего изменения (см. TaskSyncState)."""
     STATUS_CHOICES = [
         ('new', 'New'),
         ('in_progress', 'In progress'),
@@ -23,8 +224,68 @@ class Task(models.Model):
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
 
-    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+    revision = models.BigIntegerField(default=0)
+
+    # Отдельный индекс по owner не нужен: owner_id - ведущее поле составных индексов
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        """Индексы под выборки задач одного пользователя с пагинацией по id."""
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='task_owner_id_idx'),
+            models.Index(fields=['owner', 'status', 'id'], name='task_owner_status_id_idx'),
+            models.Index(fields=['owner', 'updated_at'], name='task_owner_updated_idx'),
+            models.Index(fields=['owner', 'revision'], name='task_owner_revision_idx'),
+            models.Index(
+                fields=['owner', 'title'],
+                name='task_owner_title_idx',
+                opclasses=['', 'varchar_pattern_ops'],
+            ),
+        ]
 
     def __str__(self):
         """Возвращает название задачи."""
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает статус из базы для счетчиков статусов."""
+        instance = super().from_db(db, field_names, values)
+        instance.saved_status = instance.__dict__.get('status')
+        return instance
+
+    def get_saved_status(self):
+        """Статус задачи в базе (запрашивается, если задача не читалась из базы)."""
+        if getattr(self, 'saved_status', None) is None:
+            self.saved_status = type(self).objects.filter(pk=self.pk).values_list('status', flat=True).first()
+        return self.saved_status
+
+    def status_changes(self, update_fields):
+        """Изменения счетчиков статусов при сохранении: {статус: разница}."""
+        if self._state.adding:
+            return {self.status: 1}
+        if update_fields is not None and 'status' not in update_fields:
+            return {}
+        saved_status = self.get_saved_status()
+        if saved_status is None or saved_status == self.status:
+            return {}
+        return {saved_status: -1, self.status: 1}
+
+    def save(self, *args, **kwargs):
+        """Сохраняет задачу с новой ревизией в одной транзакции со счетчиками."""
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'revision'}
+        with transaction.atomic(savepoint=False):
+            statuses = self.status_changes(kwargs.get('update_fields'))
+            self.revision = TaskSyncState.allocate(self.owner_id, statuses=statuses)
+            super().save(*args, **kwargs)
+        self.saved_status = self.status
+
+    def delete(self, *args, **kwargs):
+        """Удаляет задачу, создав отметку об удалении."""
+        with transaction.atomic(savepoint=False):
+            record_tombstones([(self.pk, self.owner_id, self.get_saved_status() or self.status)])
+            return super().delete(*args, **kwargs)
@@ -0,0 +1,155 @@
+"""
+Пагинация списков задач и пользователей.
+
+Используется keyset-пагинация (курсор) по первичному ключу:
+- курсор непрозрачен для клиента (base64 от позиции);
+- страница выбирается условием id > позиции, а не OFFSET,
+  поэтому стоимость запроса не растет с номером страницы;
+- новые записи, появившиеся между запросами, не сдвигают страницы;
+- COUNT(*) по таблице не выполняется никогда.
+
+Результаты поиска (?search=) упорядочены по рангу и id: курсор хранит
+пару (ранг, id) последней строки, а следующая страница выбирается
+условием rank < r OR (rank = r AND id < i). Позиция уникальна, поэтому
+строки с равным рангом не отсчитываются смещением и число страниц
+с одинаковым рангом не ограничено.
+"""
+
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+from .search import RANK, RANK_ORDERING
+
+
+"""
+Разделитель значений полей порядка в позиции курсора.
+"""
+POSITION_SEPARATOR = '_'
+
+
+class IdCursorPagination(CursorPagination):
+    """Курсорная пагинация по возрастанию id.
+
+    Размер страницы берется из настройки API_PAGE_SIZE, клиент может
+    запросить другой через ?page_size=, но не больше API_MAX_PAGE_SIZE.
+    Позиция курсора - значения всех полей порядка (по id или по рангу
+    и id), страница фильтруется по ним всем (keyset), а не по первому
+    полю со смещением, как в CursorPagination."""
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        """Возвращает размер страницы с учетом ограничения из настроек."""
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        """По id, для результатов поиска - по рангу и id."""
+        if RANK in queryset.query.annotations:
+            return RANK_ORDERING
+        return super().get_ordering(request, queryset, view)
+
+    def get_paginated_response(self, data):
+        """Ответ страницы.
+
+        Ранг в строках быстрого списка нужен только для ссылок курсора
+        и в ответ не попадает."""
+        response = super().get_paginated_response(data)
+        if self.ordering == RANK_ORDERING:
+            for row in data:
+                row.pop(RANK, None)
+        return response
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Страница выборки по курсору."""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset для ASGI-представлений.
+
+        Страница читается через асинхронный ORM, ссылки next/previous
+        строятся унаследованными методами и совпадают с синхронными."""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def page_queryset(self, queryset, request, view):
+        """Выборка страницы и одной строки после нее; None, если пагинация не нужна."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.position_filter(current_position, reverse))
+        return queryset[offset:offset + self.page_size + 1]
+
+    def position_filter(self, position, reverse):
+        """Условие строк после позиции в порядке выдачи.
+
+        Для порядка (a, b): a > x OR (a = x AND b > y), где сравнение
+        каждого поля зависит от его направления и направления курсора."""
+        values = position.split(POSITION_SEPARATOR)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        conditions, equal = [], {}
+        for order, value in zip(self.ordering, values):
+            field = order.lstrip('-')
+            try:
+                value = int(value)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+            conditions.append(Q(**equal, **{f'{field}__{lookup}': value}))
+            equal[field] = value
+        return reduce(operator.or_, conditions)
+
+    def set_page(self, results):
+        """Запоминает страницу из results (страница и строка после нее) и позиции ссылок."""
+        offset, reverse, current_position = self.cursor or (0, False, None)
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Позиция строки: значения всех полей порядка через POSITION_SEPARATOR."""
+        def value(field):
+            return instance[field] if isinstance(instance, dict) else getattr(instance, field)
+
+        return POSITION_SEPARATOR.join(str(value(order.lstrip('-'))) for order in ordering)
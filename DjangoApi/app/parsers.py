@@ -0,0 +1,30 @@
+"""
+Парсеры тел запросов API.
+
+MessagePackParser разбирает тела в MessagePack (Content-Type:
+application/msgpack) - пара к app.renderers.MessagePackRenderer.
+Подключается в DEFAULT_PARSER_CLASSES, если установлен msgpack.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack не обязателен
+    msgpack = None
+
+
+class MessagePackParser(BaseParser):
+    """Тело запроса в MessagePack.
+
+    Строки разбираются в str, ключи словарей должны быть строками или
+    числами, как в JSON."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Разбирает тело запроса."""
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f'Ошибка разбора MessagePack: {exc}')
@@ -0,0 +1,194 @@
+"""
+Детектор N+1 и медленных SQL-запросов для разработки и тестов
+(включается настройкой QUERY_CHECK).
+
+Выполненные запросы группируются по отпечатку - тексту SQL без
+значений параметров и литералов. Проблемой считаются:
+- N+1: один и тот же SELECT выполнен за запрос QUERY_CHECK_REPEAT и
+  более раз (обычно обращение к связанному объекту в цикле по строкам);
+- медленный запрос: выполнялся дольше QUERY_CHECK_SLOW_MS миллисекунд.
+
+Для первого выполнения каждого отпечатка запоминается, откуда он пришел:
+поле сериализатора DRF, при заполнении которого выполнен запрос
+(TaskSerializer.owner), и ближайшая строка кода проекта. Представление
+(TaskSet.list) добавляет QueryCheckMiddleware.
+
+QUERY_CHECK=warn пишет найденное в лог app.querycheck, QUERY_CHECK=strict
+поднимает QueryCheckFailed - в тестах это проваливает тест, сделавший
+запрос. В тестах также можно проверить произвольный блок кода:
+
+    with querycheck.inspect(strict=True):
+        ...
+"""
+
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.fields import Field
+
+
+logger = logging.getLogger(__name__)
+
+"""
+Журнал запросов текущего запроса или блока inspect.
+"""
+_current = ContextVar('query_check_log', default=None)
+
+MODES = ('', 'warn', 'strict')
+
+"""
+Нормализация SQL в отпечаток: строковые и числовые литералы и параметры
+заменяются на ?, списки параметров (IN, VALUES) сворачиваются.
+"""
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PARAMETER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+REPEATED_LISTS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+SPACES = re.compile(r'\s+')
+
+"""
+Файлы оберток выполнения SQL, которые не считаются источником запроса.
+"""
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SKIP_FILES = {os.path.join(APP_DIR, name) for name in ('querycheck.py', 'metrics.py', 'middleware.py')}
+
+
+class QueryCheckFailed(AssertionError):
+    """Найдены N+1 или медленные запросы в строгом режиме."""
+
+
+def fingerprint(sql):
+    """Отпечаток SQL: текст без значений параметров и литералов."""
+    sql = STRING_LITERAL.sub('?', sql.replace('%s', '?'))
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = REPEATED_LISTS.sub('(...)', PARAMETER_LIST.sub('(...)', sql))
+    return SPACES.sub(' ', sql).strip()
+
+
+def find_origin():
+    """Поле сериализатора и строка кода проекта, вызвавшие запрос."""
+    field = location = None
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None and (field is None or location is None):
+        code = frame.f_code
+        if field is None and code.co_name in ('get_attribute', 'to_representation'):
+            obj = frame.f_locals.get('self')
+            if isinstance(obj, Field) and obj.field_name and obj.parent is not None:
+                field = f'{type(obj.parent).__name__}.{obj.field_name}'
+        filename = code.co_filename
+        if location is None and filename.startswith(base_dir) and filename not in SKIP_FILES \
+                and 'site-packages' not in filename:
+            location = f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} ({code.co_name})'
+        frame = frame.f_back
+    return field, location
+
+
+class QueryLog:
+    """Запросы, выполненные за один запрос к API или блок inspect."""
+
+    def __init__(self, view=''):
+        """Пустой журнал; view - представление для отчета."""
+        self.view = view
+        self.counts = {}
+        self.origins = {}
+        self.slow = []
+
+    def record(self, sql, duration):
+        """Учитывает выполненный запрос длительностью duration секунд."""
+        key = fingerprint(sql)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        slow = duration * 1000 >= settings.QUERY_CHECK_SLOW_MS
+        if count == 1 or slow:
+            origin = find_origin()
+            self.origins.setdefault(key, origin)
+            if slow:
+                self.slow.append((key, duration, origin))
+
+    def problems(self):
+        """Описания найденных проблем."""
+        problems = []
+        for key, count in self.counts.items():
+            if count >= settings.QUERY_CHECK_REPEAT and key.upper().startswith('SELECT'):
+                problems.append(f'N+1: {count} x {key}' + self.describe(self.origins[key]))
+        for key, duration, origin in self.slow:
+            problems.append(f'медленный запрос {duration * 1000:.0f} мс: {key}' + self.describe(origin))
+        return problems
+
+    def describe(self, origin):
+        """Представление, поле сериализатора и строка кода для отчета."""
+        field, location = origin
+        parts = [part for part in (self.view, field and f'поле {field}', location) if part]
+        return f' [{", ".join(parts)}]' if parts else ''
+
+    def check(self, strict=None):
+        """Сообщает о проблемах: в лог или исключением в строгом режиме."""
+        problems = self.problems()
+        if not problems:
+            return
+        if strict is None:
+            strict = settings.QUERY_CHECK == 'strict'
+        if strict:
+            raise QueryCheckFailed('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+
+
+def check_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL (execute_wrapper): запись в текущий журнал."""
+    log = _current.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.record(sql, time.perf_counter() - started)
+
+
+def install(connection, **kwargs):
+    """Подключает check_query к соединению (обработчик connection_created)."""
+    if check_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(check_query)
+
+
+def enable():
+    """Подключает check_query к новым и уже открытым соединениям потока."""
+    if settings.QUERY_CHECK not in MODES:
+        raise ImproperlyConfigured(f'QUERY_CHECK: ожидается одно из {MODES}')
+    connection_created.connect(install, dispatch_uid='app.querycheck.install')
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+def start(view=''):
+    """Начинает журнал; возвращает (журнал, токен для finish)."""
+    log = QueryLog(view)
+    return log, _current.set(log)
+
+
+def finish(token):
+    """Завершает журнал, начатый start."""
+    _current.reset(token)
+
+
+@contextmanager
+def inspect(view='', strict=None):
+    """Проверяет запросы блока; strict=None берет режим из QUERY_CHECK."""
+    enable()
+    log, token = start(view)
+    try:
+        yield log
+    finally:
+        finish(token)
+    log.check(strict)
@@ -0,0 +1,69 @@
+"""
+Рендереры ответов API.
+
+FastJSONRenderer кодирует JSON библиотекой orjson, если она установлена
+(pip install orjson), и стандартным JSONRenderer DRF в противном случае.
+Вывод совпадает с JSONRenderer: компактный JSON в UTF-8.
+
+MessagePackRenderer отдает те же данные в MessagePack (Accept:
+application/msgpack или ?format=msgpack), если установлен msgpack
+(poetry install -E msgpack): ответ меньше JSON и быстрее разбирается
+клиентом. Пара для тел запросов - app.parsers.MessagePackParser.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson не обязателен
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack не обязателен
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Типы, которые orjson не знает (ленивые строки перевода, Decimal,
+    UUID-подобные объекты DRF), кодируются через JSONEncoder DRF.
+    Запрос отступов (Accept: application/json; indent=4) и отсутствие
+    orjson обрабатываются базовым рендерером."""
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Кодирует data в JSON (этап render в app.metrics)."""
+        with metrics.span('render'):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type, renderer_context):
+        """Кодирует data в JSON через orjson или базовый рендерер."""
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_NON_STR_KEYS)
+        # Как и JSONRenderer, экранируем разделители строк, недопустимые в JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответы в MessagePack.
+
+    Типы, которых нет в MessagePack (datetime, Decimal, UUID, ленивые
+    строки перевода), кодируются через JSONEncoder DRF - так же, как в
+    JSON, поэтому значения в обоих форматах совпадают."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Кодирует data в MessagePack (этап render в app.metrics)."""
+        if data is None:
+            return b''
+        with metrics.span('render'):
+            return msgpack.packb(data, default=JSONEncoder().default)
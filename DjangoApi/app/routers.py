@@ -0,0 +1,146 @@
+"""
+Маршрутизация чтений на реплики БД (включается настройкой DB_REPLICAS).
+
+ReplicaRouter отправляет на реплики только чтения в безопасных запросах
+к API (GET, HEAD, OPTIONS). На основной базе остаются:
+- запись и все запросы небезопасных методов (POST, PUT, PATCH, DELETE);
+- чтения внутри транзакции и вне запросов к API (команды, shell);
+- чтения пользователя в течение DB_REPLICA_STICKY_SECONDS после его
+  записи: реплика может отставать, а пользователь должен видеть свои
+  изменения (read-after-write). Отметка хранится в кеше ответов задач,
+  поэтому действует во всех процессах (settings.py не допускает реплик
+  при нескольких воркерах с кешем в памяти процесса);
+- чтения, если ни одна реплика недоступна: реплика, к которой не удалось
+  подключиться, исключается на DB_REPLICA_RETRY_SECONDS.
+
+Состояние запроса ведет ReplicaMiddleware, пользователя привязывает
+ReplicaRoutingMixin представлений после аутентификации.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import cache
+
+
+"""
+Состояние маршрутизации текущего запроса к API; None вне запросов.
+"""
+_current = ContextVar('replica_routing', default=None)
+
+"""
+Недоступные реплики: алиас -> момент, до которого они не используются.
+"""
+_unavailable = {}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Маршрутизация одного запроса.
+
+    safe - чтения можно отправлять на реплики, pinned - только на
+    основную базу, wrote - в запросе была запись, replica - выбранная
+    реплика: все чтения запроса идут в одну, чтобы видеть одно состояние."""
+    __slots__ = ('safe', 'pinned', 'wrote', 'user_id', 'replica')
+
+    def __init__(self, method):
+        """Состояние для запроса с HTTP-методом method."""
+        self.safe = method in SAFE_METHODS
+        self.pinned = False
+        self.wrote = False
+        self.user_id = None
+        self.replica = None
+
+
+def sticky_key(user_id):
+    """Ключ отметки недавней записи пользователя."""
+    return f'db:sticky:{user_id}'
+
+
+def start(request):
+    """Начинает маршрутизацию запроса; возвращает (состояние, токен для finish)."""
+    state = RoutingState(request.method)
+    return state, _current.set(state)
+
+
+def finish(token):
+    """Завершает маршрутизацию запроса, начатую start."""
+    _current.reset(token)
+
+
+def bind_user(user_id):
+    """Привязывает пользователя к запросу; после его недавней записи
+    чтения запроса идут на основную базу."""
+    state = _current.get()
+    if state is None or user_id is None:
+        return
+    state.user_id = user_id
+    if state.safe and not state.pinned:
+        state.pinned = cache.get_cache().get(sticky_key(user_id)) is not None
+
+
+def remember_write(state):
+    """Отмечает запись пользователя запроса на DB_REPLICA_STICKY_SECONDS."""
+    if state.wrote and state.user_id is not None:
+        cache.get_cache().set(sticky_key(state.user_id), 1, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def available_replica():
+    """Случайная доступная реплика или None.
+
+    Реплика, к которой не удается подключиться, исключается на
+    DB_REPLICA_RETRY_SECONDS."""
+    now = time.monotonic()
+    replicas = [alias for alias in settings.DB_REPLICA_ALIASES if _unavailable.get(alias, 0) <= now]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            _unavailable[alias] = now + settings.DB_REPLICA_RETRY_SECONDS
+            continue
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """Роутер БД: безопасные чтения на реплики, остальное на основную базу."""
+
+    def db_for_read(self, model, **hints):
+        """Реплика для чтения в безопасном запросе или основная база."""
+        state = _current.get()
+        if state is None or not state.safe or state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = available_replica() or DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        """Запись - всегда в основную базу; дальнейшие чтения запроса тоже."""
+        state = _current.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же данные, связи между ними разрешены."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной базе."""
+        return db not in settings.DB_REPLICA_ALIASES
+
+
+class ReplicaRoutingMixin:
+    """Привязывает аутентифицированного пользователя к маршрутизации запроса."""
+    def initial(self, request, *args, **kwargs):
+        """Аутентификация и проверки DRF, затем привязка пользователя."""
+        super().initial(request, *args, **kwargs)
+        bind_user(request.user.pk)
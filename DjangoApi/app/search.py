@@ -0,0 +1,76 @@
+"""
+Полнотекстовый поиск задач (?search= списка задач).
+
+На PostgreSQL поиск идет по колонке search_vector таблицы задач:
+tsvector из названия (вес A) и описания (вес B), вычисляемый базой при
+каждой записи (GENERATED ... STORED, миграция 0005), с GIN-индексом.
+Запись задачи любым путем - save(), bulk_create, COPY из seed_tasks -
+обновляет вектор, а поиск читает индекс, не просматривая описания.
+Запрос разбирается websearch_to_tsquery: слова, "фразы", -исключения.
+
+На других базах (SQLite в тестах и разработке) используется переносимый
+запасной путь: каждое слово запроса ищется в названии или описании
+(icontains), ранг - число совпадений, совпадение в названии весит больше.
+
+В обоих случаях выборка получает целочисленный ранг search_rank, по
+которому пагинация упорядочивает результаты (RANK_ORDERING).
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections
+from django.db.models import BigIntegerField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+
+"""
+Конфигурация разбора текста; совпадает с колонкой из миграции 0005.
+"""
+SEARCH_CONFIG = 'simple'
+
+"""
+Ранг в выборке и порядок результатов поиска: по убыванию ранга, затем id.
+"""
+RANK = 'search_rank'
+RANK_ORDERING = ('-search_rank', '-id')
+
+"""
+ts_rank (число от 0 до 1) переводится в целое для курсора пагинации.
+"""
+RANK_SCALE = 1_000_000
+
+"""
+Запасной путь: слов запроса не больше, вес совпадения в названии и описании.
+"""
+MAX_FALLBACK_WORDS = 8
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+
+def search_tasks(queryset, text):
+    """Задачи выборки, найденные по тексту, с рангом search_rank."""
+    if connections[queryset.db].vendor == 'postgresql':
+        return search_vector(queryset, text)
+    return search_words(queryset, text)
+
+
+def search_vector(queryset, text):
+    """Поиск по колонке search_vector и GIN-индексу (PostgreSQL)."""
+    table = connections[queryset.db].ops.quote_name(queryset.model._meta.db_table)
+    vector = RawSQL(f'{table}."search_vector"', (), output_field=SearchVectorField())
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    rank = Cast(SearchRank(vector, query) * RANK_SCALE, BigIntegerField())
+    return queryset.alias(search_vector=vector).filter(search_vector=query).annotate(**{RANK: rank})
+
+
+def search_words(queryset, text):
+    """Переносимый поиск: каждое слово в названии или описании."""
+    words = text.split()[:MAX_FALLBACK_WORDS]
+    if not words:
+        return queryset.none()
+    rank = Value(0)
+    for word in words:
+        queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        rank = rank + Case(When(title__icontains=word, then=Value(TITLE_WEIGHT)), default=Value(0)) \
+            + Case(When(description__icontains=word, then=Value(DESCRIPTION_WEIGHT)), default=Value(0))
+    return queryset.annotate(**{RANK: Cast(rank, IntegerField())})
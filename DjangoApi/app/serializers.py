@@ -2,18 +2,40 @@
 Сериализаторы для моделей задач и пользователей.
 """
 
+import copy
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.contrib.auth.models import User
-from .models import Task
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from . import metrics
+from .models import Task, assign_revisions
+
+
+class TimedDataMixin:
+    """Учитывает построение data сериализатора как этап serialize (app.metrics)."""
+    @property
+    def data(self):
+        """Данные ответа с замером времени."""
+        with metrics.span('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """ListSerializer с замером времени построения data."""
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Сериализатор пользователя с обработкой пароля."""
     class Meta:
         """Конфигурация сериализатора."""
         model = User
         fields = ('id', 'username', 'email', 'password')
         extra_kwargs = {'password': {'write_only': True}}
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         """Создание пользователя с хешированным паролем."""
@@ -24,17 +46,212 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class OwnerUsernameField(serializers.ReadOnlyField):
+    """Имя владельца задачи.
+
+    Если в контексте сериализатора передан владелец (context['owner']),
+    имя берется из него, и загрузка owner для каждой строки не нужна."""
+    def get_attribute(self, instance):
+        """Возвращает имя владельца без обращения к instance.owner, если возможно."""
+        owner = self.context.get('owner')
+        if owner is not None and instance.owner_id == owner.pk:
+            return owner.username
+        return super().get_attribute(instance)
+
+
+def is_task_id(value):
+    """Проверяет, что значение - целочисленный id (bool в Python - подкласс int, но не id)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class TaskListSerializer(TimedListSerializer):
+    """Сериализатор списка задач для пакетных операций.
+
+    Создание и обновление выполняются через bulk_create/bulk_update
+    пачками по TASKS_BULK_BATCH_SIZE строк и должны вызываться внутри
+    транзакции (выдача ревизий, счетчики статусов). Для обновления instance - словарь
+    {id: задача}, каждый элемент данных должен содержать id."""
+    def to_internal_value(self, data):
+        """Валидирует элементы обновления, каждый против своей задачи.
+
+        Хук run_child_validation есть только в DRF 3.15+, а в 3.14
+        ListSerializer вызывает child.run_validation напрямую, поэтому
+        элементы обходятся здесь. Ошибки - список по позициям элементов."""
+        if self.instance is None or not isinstance(data, list):
+            return super().to_internal_value(data)
+        validated, errors = [], []
+        for item in data:
+            try:
+                validated.append(self.validate_item(item))
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def validate_item(self, data):
+        """Валидирует элемент обновления против задачи с его id."""
+        task_id = data.get('id') if isinstance(data, dict) else None
+        if task_id is None:
+            raise serializers.ValidationError({'id': ['Обязательное поле.']})
+        task = self.instance.get(task_id) if is_task_id(task_id) else None
+        if task is None:
+            raise serializers.ValidationError({'id': ['Задача не найдена.']})
+        self.child.instance = task
+        self.child.initial_data = data
+        validated_data = self.child.run_validation(data)
+        validated_data['id'] = task.pk
+        return validated_data
+
+    def create(self, validated_data):
+        """Создает задачи одним INSERT на пачку."""
+        tasks = [self.child.Meta.model(**attrs) for attrs in validated_data]
+        assign_revisions(tasks, [(task.owner_id, task.status, 1) for task in tasks])
+        return self.child.Meta.model.objects.bulk_create(
+            tasks, batch_size=settings.TASKS_BULK_BATCH_SIZE
+        )
+
+    def update(self, instance, validated_data):
+        """Обновляет задачи одним UPDATE на пачку, только измененные поля.
+
+        bulk_update не заполняет auto_now, поэтому updated_at выставляется явно."""
+        now = timezone.now()
+        tasks = []
+        changes = []
+        fields = {'updated_at', 'revision'}
+        for attrs in validated_data:
+            task = instance[attrs.pop('id')]
+            if attrs.get('status', task.status) != task.status:
+                changes += [(task.owner_id, task.status, -1), (task.owner_id, attrs['status'], 1)]
+            for field, value in attrs.items():
+                setattr(task, field, value)
+            task.updated_at = now
+            fields.update(attrs)
+            tasks.append(task)
+        assign_revisions(tasks, changes)
+        self.child.Meta.model.objects.bulk_update(
+            tasks, sorted(fields), batch_size=settings.TASKS_BULK_BATCH_SIZE
+        )
+        for task in tasks:
+            task.saved_status = task.status
+        return tasks
+
+
+class TaskSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Сериализатор для модельки задач с автоматическим назначением владельца."""
-    owner = serializers.ReadOnlyField(source='owner.username')
+    owner = OwnerUsernameField(source='owner.username')
 
     class Meta:
         """Конфигурация сериализатора."""
         model = Task
         fields = ('id', 'title', 'description', 'status', 'owner')
         read_only_fields = ('owner',)
+        list_serializer_class = TaskListSerializer
 
     def create(self, validated_data):
         """Создание задачи и назначение текущего пользователя ее владельцем."""
-        validated_data['owner'] = self.context['request'].user
+        validated_data['owner_id'] = self.context['request'].user.pk
         return super().create(validated_data)
+
+
+class ValuesRowPlan:
+    """План построения элементов списка из строк .values() без сериализатора.
+
+    Составляется один раз по полям сериализатора: поля, представление
+    которых совпадает со значением из БД (числа, строки, выбор), читаются
+    колонками с тем же именем, а OwnerUsernameField (последнее поле)
+    заполняется именем владельца. Модели и объекты Field на строку не
+    создаются, а результат совпадает с serializer(many=True).data.
+    Для сериализатора с другими полями план не строится."""
+    PLAIN_FIELDS = (
+        serializers.IntegerField, serializers.CharField,
+        serializers.ChoiceField, serializers.BooleanField,
+    )
+
+    def __init__(self, serializer_class):
+        """Составляет план по полям serializer_class."""
+        self.columns = []
+        self.owner_name = None
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if self.owner_name is not None:
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}: OwnerUsernameField должно быть последним полем'
+                )
+            if isinstance(field, OwnerUsernameField):
+                self.owner_name = name
+            elif self.is_plain(field) and field.source == name:
+                self.columns.append(name)
+            else:
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name}: поле не поддерживается планом'
+                )
+
+    def is_plain(self, field):
+        """Совпадает ли представление поля со значением из БД."""
+        if type(field) in self.PLAIN_FIELDS:
+            return True
+        # BigIntegerField есть в DRF начиная с 3.15 и может отдавать числа строками
+        big_integer = getattr(serializers, 'BigIntegerField', None)
+        return type(field) is big_integer and not getattr(
+            field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING
+        )
+
+    def select(self, fields):
+        """План только с полями fields (app.fieldsets); None - весь план."""
+        if fields is None:
+            return self
+        plan = copy.copy(self)
+        plan.columns = [name for name in self.columns if name in fields]
+        plan.owner_name = self.owner_name if self.owner_name in fields else None
+        return plan
+
+    def values(self, queryset, owner=None):
+        """Кверисет строк-словарей для плана.
+
+        Аннотации выборки (ранг поиска) тоже читаются: по ним пагинация
+        строит курсор и затем убирает их из элементов ответа.
+        owner - владелец всех задач выборки; без него имя владельца
+        читается из БД (JOIN)."""
+        columns = list(self.columns)
+        if self.owner_name is not None and owner is None:
+            columns.append('owner__username')
+        return queryset.values(*columns, *queryset.query.annotation_select)
+
+    def rows(self, rows, owner=None):
+        """Превращает строки values() в элементы ответа (на месте)."""
+        rows = list(rows)
+        if self.owner_name is None:
+            return rows
+        with metrics.span('serialize'):
+            if owner is not None:
+                for row in rows:
+                    row[self.owner_name] = owner.username
+            else:
+                for row in rows:
+                    row[self.owner_name] = row.pop('owner__username')
+        return rows
+
+
+class TaskTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача JWT-токенов с данными пользователя в claims.
+
+    username, is_staff и is_superuser позволяют StatelessJWTAuthentication
+    обслуживать запросы без загрузки пользователя из БД."""
+    @classmethod
+    def get_token(cls, user):
+        """Добавляет данные пользователя в refresh- и access-токены."""
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+"""
+План быстрого списка задач (TASKS_FAST_LIST).
+"""
+TASK_ROW_PLAN = ValuesRowPlan(TaskSerializer)
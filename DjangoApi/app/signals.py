@@ -0,0 +1,26 @@
+"""
+Обработчики сигналов моделей.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .authentication import forget_user_state
+from .models import Task, UserDataVersion
+
+
+@receiver([post_save, post_delete], sender=User)
+def reset_user_state(sender, instance, **kwargs):
+    """Сбрасывает закешированное состояние пользователя, ответы его задач
+    (в них имя владельца) и меняет версию данных пользователей."""
+    forget_user_state(instance.pk)
+    cache.invalidate_user(instance.pk)
+    UserDataVersion.bump()
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    """Сбрасывает закешированные ответы владельца измененной задачи."""
+    cache.invalidate_user(instance.owner_id)
@@ -1,14 +1,91 @@
 """Файл для тестирования API
 Тесты реализованы для пользователей, задач, токенов."""
 
+import csv
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import runpy
+import tempfile
+import threading
+import time
+from base64 import b64decode, b64encode
+from contextlib import contextmanager
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory, LiveServerTestCase, RequestFactory, SimpleTestCase, TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
-from .models import Task
+from DjangoApi import yasg
+from . import cache, compression, export, hashers, metrics, querycheck, renderers, routers, throttling
+from .async_views import AsyncTaskDetailView, AsyncTaskListView
+from .authentication import forget_user_state
+from .middleware import PerformanceMiddleware, QueryCheckMiddleware
+from .models import Task, TaskTombstone, UserDataVersion
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, TaskTokenObtainPairSerializer, UserSerializer, ValuesRowPlan
 
 User = get_user_model()
 
+"""
+Лимиты запросов в тестах отключены, ThrottlingTests включают их явно.
+"""
+THROTTLE_OFF = override_settings(API_THROTTLE=False)
+
+
+def setUpModule():
+    """
+    Отключение лимитов запросов на время тестов модуля.
+    """
+    THROTTLE_OFF.enable()
+
+
+def tearDownModule():
+    """
+    Возврат настройки лимитов запросов.
+    """
+    THROTTLE_OFF.disable()
+
+
+class QueryBudgetMixin:
+    """
+    Проверка бюджета SQL-запросов на эндпоинт.
+    """
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """
+        Проверяет, что внутри блока выполнено не больше budget запросов.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = [query['sql'] for query in ctx.captured_queries]
+        self.assertLessEqual(
+            len(executed), budget,
+            f'Бюджет {budget} запросов превышен ({len(executed)}):\n' + '\n'.join(executed)
+        )
+
 
 class UserModelTest(APITestCase):
     """
@@ -71,6 +148,105 @@ class AuthTests(APITestCase):
         self.assertIn('refresh', resp.data)
 
 
+class StatelessAuthTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование JWT-аутентификации задач без запроса пользователя.
+    """
+    def setUp(self):
+        """
+        Создание пользователя, задачи и получение access-токена.
+        """
+        forget_user_state()
+        self.user = User.objects.create_user(username='stateless', password='testpass123')
+        Task.objects.create(title='Task', description='Description', owner=self.user)
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            {'username': 'stateless', 'password': 'testpass123'},
+            format='json'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+
+    def tearDown(self):
+        """
+        Очистка кеша флагов пользователей.
+        """
+        forget_user_state()
+
+    def user_queries(self, ctx):
+        """
+        Возвращает запросы к таблице пользователей.
+        """
+        return [query['sql'] for query in ctx.captured_queries if 'auth_user' in query['sql']]
+
+    def test_list_without_user_query(self):
+        """
+        Тест: при действующем кеше флагов пользователь не загружается.
+        """
+        self.client.get(reverse('task-list'))
+        with self.assertMaxQueries(2) as ctx:
+            response = self.client.get(reverse('task-list'), {'page_size': 10})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['owner'], 'stateless')
+        self.assertEqual(self.user_queries(ctx), [])
+
+    def test_trust_token_without_state_check(self):
+        """
+        Тест: при JWT_USER_STATE_TTL=0 токену доверяют полностью.
+        """
+        with self.settings(JWT_USER_STATE_TTL=0), self.assertMaxQueries(2) as ctx:
+            response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user_queries(ctx), [])
+
+    def test_create_task_with_token_user(self):
+        """
+        Тест создания задачи пользователем из токена.
+        """
+        response = self.client.post(
+            reverse('task-list'), {'title': 'New', 'description': 'New'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['owner'], 'stateless')
+        self.assertEqual(Task.objects.get(id=response.data['id']).owner, self.user)
+
+    def test_inactive_user_rejected(self):
+        """
+        Тест: деактивированный пользователь теряет доступ до истечения токена.
+        """
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renamed_owner(self):
+        """
+        Тест: новое имя владельца видно в задачах до истечения токена, ETag меняется.
+        """
+        first = self.client.get(reverse('task-list'))
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['owner'], 'renamed')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_renamed_owner_other_process(self):
+        """
+        Тест: без сигнала в процессе (переименование в другом процессе) имя
+        обновляется после истечения JWT_USER_STATE_TTL.
+        """
+        self.client.get(reverse('task-list'))
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.data['results'][0]['owner'], 'stateless')
+        expired = time.monotonic() + settings.JWT_USER_STATE_TTL + 1
+        cache.invalidate_user(self.user.pk)
+        with mock.patch('app.authentication.time.monotonic', return_value=expired):
+            response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.data['results'][0]['owner'], 'renamed')
+
+
 class TaskAPITests(APITestCase):
     """
     Тестирование API задач.
@@ -99,7 +275,7 @@ class TaskAPITests(APITestCase):
         url = reverse('task-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_create_task(self):
         """
@@ -124,7 +300,7 @@ class TaskAPITests(APITestCase):
         Task.objects.create(title='Other Task', owner=new_user)
 
         response = self.client.get(reverse('task-list'))
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_update_task(self):
         """
@@ -147,44 +323,1981 @@ class TaskAPITests(APITestCase):
         self.assertEqual(Task.objects.count(), 0)
 
 
-class UserAPITests(APITestCase):
-    """Тестирование API пользователя."""
+class TaskQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование количества запросов к БД в эндпоинтах задач.
+    """
     def setUp(self):
-        """Создание пользователя для тестирования."""
-        self.admin = User.objects.create_superuser(
-            username='admin',
-            password='adminpass'
+        """
+        Создание пользователя и набора задач.
+        """
+        self.user = User.objects.create_user(username='budget', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='First', description='', owner=self.user)
+
+    def test_list_budget_independent_of_rows(self):
+        """
+        Тест: число запросов списка не зависит от числа задач.
+        """
+        with self.assertMaxQueries(2) as small:
+            self.client.get(reverse('task-list'))
+        Task.objects.bulk_create(
+            Task(title=f'Task {i}', description='', owner=self.user) for i in range(30)
         )
-        self.client.force_authenticate(user=self.admin)
+        cache.invalidate_user(self.user.pk)
+        with self.assertMaxQueries(2) as large:
+            response = self.client.get(reverse('task-list'))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual({item['owner'] for item in response.data['results']}, {'budget'})
 
-    def test_get_users(self):
-        """Тест получения пользователей."""
-        url = reverse('user-list')
+    def test_detail_budget(self):
+        """
+        Тест бюджета запросов для получения задачи.
+        """
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('task-detail', args=[self.task.id]))
+        self.assertEqual(response.data['owner'], 'budget')
+
+    def test_update_budget(self):
+        """
+        Тест бюджета запросов для обновления задачи (с выдачей ревизии).
+        """
+        with self.assertMaxQueries(4):
+            response = self.client.patch(
+                reverse('task-detail', args=[self.task.id]), {'status': 'completed'}, format='json'
+            )
+        self.assertEqual(response.data['owner'], 'budget')
+
+
+class TaskBulkTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование пакетных операций с задачами.
+    """
+    def setUp(self):
+        """
+        Создание пользователя, его задачи и задачи другого пользователя.
+        """
+        self.user = User.objects.create_user(username='bulk', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-bulk')
+        self.task = Task.objects.create(title='Mine', description='', owner=self.user)
+        self.foreign = Task.objects.create(title='Foreign', description='', owner=self.other)
+
+    def test_bulk_create(self):
+        """
+        Тест пакетного создания задач фиксированным числом запросов.
+        """
+        data = [{'title': f'Task {i}', 'description': 'Bulk'} for i in range(50)]
+        with self.assertMaxQueries(5):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 50)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 51)
+        self.assertEqual(response.data[0]['owner'], 'bulk')
+        self.assertIsNotNone(response.data[0]['id'])
+
+    def test_bulk_create_invalid_item(self):
+        """
+        Тест: ошибка в одном элементе отменяет весь пакет.
+        """
+        data = [
+            {'title': 'Ok', 'description': 'Valid'},
+            {'title': 'Bad', 'description': 'Invalid', 'status': 'unknown'},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data[1])
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+
+    def test_bulk_create_limit(self):
+        """
+        Тест ограничения размера пакета.
+        """
+        with self.settings(TASKS_BULK_MAX_ITEMS=2):
+            response = self.client.post(self.url, [{'title': 'x', 'description': 'x'}] * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """
+        Тест пакетного обновления задач.
+        """
+        second = Task.objects.create(title='Second', description='', owner=self.user)
+        data = [
+            {'id': self.task.id, 'status': 'completed'},
+            {'id': second.id, 'title': 'Renamed'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+        self.assertEqual(second.title, 'Renamed')
+        self.assertEqual([item['id'] for item in response.data], [self.task.id, second.id])
+
+    def test_bulk_update_foreign_task(self):
+        """
+        Тест: чужие задачи недоступны для пакетного обновления.
+        """
+        data = [
+            {'id': self.task.id, 'status': 'completed'},
+            {'id': self.foreign.id, 'status': 'completed'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', response.data[1])
+        self.task.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.task.status, 'new')
+        self.assertEqual(self.foreign.status, 'new')
+
+    def test_bulk_delete(self):
+        """
+        Тест пакетного удаления задач.
+        """
+        response = self.client.delete(self.url, [self.task.id, self.foreign.id], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'id': self.task.id, 'deleted': True},
+            {'id': self.foreign.id, 'deleted': False},
+        ])
+        self.assertFalse(Task.objects.filter(id=self.task.id).exists())
+        self.assertTrue(Task.objects.filter(id=self.foreign.id).exists())
+
+    def test_bulk_delete_queries(self):
+        """
+        Тест: задачи читаются одним запросом, кеш сбрасывается один раз на владельца.
+        """
+        ids = [self.task.id] + [
+            task.id for task in Task.objects.bulk_create(
+                Task(title=f'Task {i}', description='', owner=self.user) for i in range(20)
+            )
+        ]
+        with mock.patch.object(cache, 'invalidate_user', wraps=cache.invalidate_user) as invalidate, \
+                self.assertMaxQueries(7) as ctx:
+            response = self.client.delete(self.url, ids, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(all(item['deleted'] for item in response.data))
+        invalidate.assert_called_once_with(self.user.pk)
+        selects = [
+            query['sql'] for query in ctx.captured_queries if query['sql'].startswith('SELECT "app_task".')
+        ]
+        self.assertEqual(len(selects), 1, selects)
+        self.assertEqual(
+            set(TaskTombstone.objects.filter(owner=self.user).values_list('task_id', flat=True)), set(ids)
+        )
+
+    def test_bulk_update_missing_id(self):
+        """
+        Тест: элементы без id - отдельная ошибка, а не повторяющиеся id.
+        """
+        data = [{'title': 'No id'}, {'title': 'No id either'}]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([str(error) for error in response.data[0]['id']], ['Обязательное поле.'])
+        self.assertEqual([str(error) for error in response.data[1]['id']], ['Обязательное поле.'])
+
+    def test_bulk_update_bool_id(self):
+        """
+        Тест: true не принимается за id 1.
+        """
+        Task.objects.filter(id=1).delete()
+        Task.objects.create(id=1, title='First', description='', owner=self.user)
+        response = self.client.patch(self.url, [{'id': True, 'status': 'completed'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([str(error) for error in response.data[0]['id']], ['Задача не найдена.'])
+        self.assertFalse(Task.objects.filter(status='completed').exists())
+
+
+class TaskCacheTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование кеша ответов задач.
+    """
+    def setUp(self):
+        """
+        Создание двух пользователей с задачами.
+        """
+        self.user = User.objects.create_user(username='cached', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.task = Task.objects.create(title='Task', description='Description', owner=self.user)
+        self.foreign = Task.objects.create(title='Other', description='Other', owner=self.other)
+        self.client.force_authenticate(user=self.user)
+
+    def cache_stats(self):
+        """
+        Возвращает счетчики (попадания, промахи) кеша из реестра метрик.
+        """
+        return tuple(
+            metrics.REGISTRY.counter(cache.STATS_METRIC, f'result="{result}"') for result in ('hit', 'miss')
+        )
+
+    def test_list_served_from_cache(self):
+        """
+        Тест: повторный запрос списка обслуживается из кеша без запросов к БД.
+        """
+        stats = self.cache_stats()
+        first = self.client.get(reverse('task-list'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertMaxQueries(0):
+            second = self.client.get(reverse('task-list'))
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(self.cache_stats(), (stats[0] + 1, stats[1] + 1))
+        self.assertIn('api_cache_requests_total{result="hit"}', metrics.REGISTRY.render())
+
+    def test_query_params_cached_separately(self):
+        """
+        Тест: разные параметры запроса кешируются отдельно.
+        """
+        self.client.get(reverse('task-list'))
+        response = self.client.get(reverse('task-list'), {'status': 'completed'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_create_invalidates_only_owner(self):
+        """
+        Тест: создание задачи сбрасывает кеш только ее владельца.
+        """
+        self.client.get(reverse('task-list'))
+        self.client.force_authenticate(user=self.other)
+        self.client.get(reverse('task-list'))
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('task-list'), {'title': 'New', 'description': 'New'}, format='json')
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(reverse('task-list'))['X-Cache'], 'HIT')
+
+    def test_update_and_delete_invalidate_detail(self):
+        """
+        Тест: изменение и удаление задачи сбрасывают кеш карточки.
+        """
+        url = reverse('task-detail', args=[self.task.id])
+        self.client.get(url)
+        self.client.patch(url, {'title': 'Changed'}, format='json')
         response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Changed')
+
+        self.client.delete(url)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_update_invalidates(self):
+        """
+        Тест: пакетное обновление сбрасывает кеш.
+        """
+        self.client.get(reverse('task-list'))
+        self.client.patch(
+            reverse('task-bulk'), [{'id': self.task.id, 'status': 'completed'}], format='json'
+        )
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.data['results'][0]['status'], 'completed')
+
+    @override_settings(TASKS_CACHE_ENABLED=False)
+    def test_disabled(self):
+        """
+        Тест: выключенный кеш (TASKS_CACHE_ENABLED=False) ответы не хранит.
+        """
+        stats = self.cache_stats()
+        self.client.get(reverse('task-list'))
+        response = self.client.get(reverse('task-list'))
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.cache_stats(), stats)
+
+
+class ConditionalRequestTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование ETag и условных запросов.
+    """
+    def setUp(self):
+        """
+        Создание администратора и его задачи.
+        """
+        self.user = User.objects.create_superuser(username='etag', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Task', description='Description', owner=self.user)
+        self.url = reverse('task-detail', args=[self.task.id])
+
+    def test_list_not_modified(self):
+        """
+        Тест: список с актуальным ETag возвращает 304, в том числе без кеша.
+        """
+        response = self.client.get(reverse('task-list'))
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertMaxQueries(0):
+            cached = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        cache.invalidate_user(self.user.pk)
+        with self.assertMaxQueries(1):
+            computed = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(computed.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(computed['ETag'], etag)
+
+    def test_list_etag_changes(self):
+        """
+        Тест: ETag списка меняется при создании и удалении задач.
+        """
+        first = self.client.get(reverse('task-list'))['ETag']
+        extra = Task.objects.create(title='Extra', description='Extra', owner=self.user)
+        second = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second['ETag'], first)
+        extra.delete()
+        third = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+
+    def test_list_delete_older_task(self):
+        """
+        Тест: удаление не самой новой задачи меняет ETag списка, а If-Modified-Since не дает 304.
+        """
+        Task.objects.create(title='Newer', description='Newer', owner=self.user)
+        first = self.client.get(reverse('task-list'))
+        self.task.delete()
+        response = self.client.get(
+            reverse('task-list'), HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(reverse('task-list'), HTTP_IF_MODIFIED_SINCE=http_date())
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-    def test_create_user_via_api(self):
-        """Тест создания пользователя через API."""
-        url = reverse('user-list')
-        data = {
-            'username': 'newuser',
-            'email': 'new@example.com',
-            'password': 'newpass123'
-        }
-        response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertFalse('password' in response.data)
-        self.assertTrue(User.objects.filter(username='newuser').exists())
+    def test_detail_not_modified(self):
+        """
+        Тест: задача с актуальным ETag возвращает 304.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
 
+    def test_update_if_match(self):
+        """
+        Тест оптимистической блокировки через If-Match.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'title': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
 
-class DocumentationTests(APITestCase):
-    """Тестирование документации."""
-    def test_swagger_docs(self):
-        """Тест документации Swagger."""
-        response = self.client.get('/swagger/')
+        stale = self.client.patch(self.url, {'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'First')
+
+    def test_if_match_any_representation(self):
+        """
+        Тест: If-Match сравнивает только состояние задачи, If-None-Match - представление.
+        """
+        sparse = self.client.get(self.url, {'fields': 'title'}, HTTP_ACCEPT='application/json; indent=2')
+        self.assertNotEqual(sparse['ETag'], self.client.get(self.url)['ETag'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=sparse['ETag'])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-    def test_redoc_docs(self):
-        """Тест документации Redoc."""
-        response = self.client.get('/redoc/')
+        response = self.client.patch(self.url, {'title': 'First'}, format='json', HTTP_IF_MATCH=sparse['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(self.url, HTTP_IF_MATCH=f"W/{response['ETag']}")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_delete_if_match(self):
+        """
+        Тест удаления с устаревшим If-Match.
+        """
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Task.objects.filter(id=self.task.id).exists())
+
+    def test_users_etag(self):
+        """
+        Тест ETag списка пользователей: версия хранится в БД, а не в кеше процесса.
+        """
+        etag = self.client.get(reverse('user-list'))['ETag']
+        cache.get_cache().clear()
+        response = self.client.get(reverse('user-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.user.email = 'changed@example.com'
+        self.user.save(update_fields=['email'])
+        response = self.client.get(reverse('user-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        User.objects.create_user(username='fresh', password='testpass123')
+        response = self.client.get(reverse('user-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PaginationTests(APITestCase):
+    """Тестирование курсорной пагинации списков."""
+    def setUp(self):
+        """Создание пользователя с набором задач."""
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.bulk_create(
+            Task(title=f'Task {i}', description='', owner=self.user) for i in range(5)
+        )
+        cache.invalidate_user(self.user.pk)
+
+    def collect_ids(self, url):
+        """Проходит все страницы по ссылкам next и собирает id задач."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_page_size(self):
+        """Тест ограничения размера страницы параметром page_size."""
+        response = self.client.get(reverse('task-list'), {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+    def test_walk_all_pages(self):
+        """Тест обхода всех страниц по курсору."""
+        ids = self.collect_ids(reverse('task-list') + '?page_size=2')
+        expected = list(Task.objects.filter(owner=self.user).order_by('id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_stable_under_inserts(self):
+        """Тест стабильности курсора при вставке новых задач между запросами."""
+        first = self.client.get(reverse('task-list'), {'page_size': 2})
+        seen = [item['id'] for item in first.data['results']]
+        Task.objects.create(title='Inserted', description='', owner=self.user)
+        seen += self.collect_ids(first.data['next'])
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 6)
+
+    def test_max_page_size(self):
+        """Тест верхней границы размера страницы."""
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get(reverse('task-list'), {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_users_paginated(self):
+        """Тест пагинации списка пользователей."""
+        User.objects.create_user(username='other', password='testpass123')
+        response = self.client.get(reverse('user-list'), {'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+
+
+class TaskFilterTests(APITestCase):
+    """
+    Тестирование фильтрации списка задач.
+    """
+    def setUp(self):
+        """
+        Создание задач с разными статусами.
+        """
+        self.user = User.objects.create_user(username='filter', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.new = Task.objects.create(title='Alpha', description='', owner=self.user)
+        self.progress = Task.objects.create(
+            title='Beta', description='', status='in_progress', owner=self.user
+        )
+        self.done = Task.objects.create(
+            title='Alpha done', description='', status='completed', owner=self.user
+        )
+
+    def result_ids(self, params):
+        """
+        Возвращает id задач из ответа на список с параметрами.
+        """
+        response = self.client.get(reverse('task-list'), params)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_filter_by_status(self):
+        """
+        Тест фильтрации по статусу.
+        """
+        self.assertEqual(self.result_ids({'status': 'in_progress'}), [self.progress.id])
+        self.assertEqual(
+            self.result_ids({'status': ['new', 'completed']}), [self.new.id, self.done.id]
+        )
+
+    def test_filter_invalid_status(self):
+        """
+        Тест недопустимого значения статуса.
+        """
+        response = self.client.get(reverse('task-list'), {'status': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_title_prefix(self):
+        """
+        Тест фильтрации по префиксу названия.
+        """
+        self.assertEqual(self.result_ids({'title__startswith': 'Alpha'}), [self.new.id, self.done.id])
+
+    def test_filter_by_id_range(self):
+        """
+        Тест фильтрации по диапазону id.
+        """
+        self.assertEqual(
+            self.result_ids({'id__gt': self.new.id, 'id__lte': self.progress.id}), [self.progress.id]
+        )
+
+    def test_explain_uses_indexes(self):
+        """
+        Тест: планировщик использует составные индексы задач.
+        """
+        out = StringIO()
+        call_command('explain_tasks', users=10, tasks_per_user=30, stdout=out)
+        self.assertIn('Все выборки используют индексы', out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith='explain_').exists())
+
+
+class TaskSearchTests(APITestCase):
+    """
+    Тестирование полнотекстового поиска задач.
+    """
+    def setUp(self):
+        """
+        Создание задач с совпадениями в названии и описании.
+        """
+        self.user = User.objects.create_user(username='search', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.described = Task.objects.create(
+            title='Deploy', description='Set up Docker image', owner=self.user
+        )
+        self.titled = Task.objects.create(title='Docker compose', description='Local stack', owner=self.user)
+        self.both = Task.objects.create(title='Docker', description='Docker registry', owner=self.user)
+        Task.objects.create(title='Other', description='Nothing here', owner=self.user)
+        other = User.objects.create_user(username='stranger', password='testpass123')
+        Task.objects.create(title='Docker', description='Not mine', owner=other)
+
+    def search(self, text, **params):
+        """
+        Возвращает id найденных задач первой страницы и ответ.
+        """
+        response = self.client.get(reverse('task-list'), {'search': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']], response
+
+    def test_ranked_results(self):
+        """
+        Тест: найдены только задачи пользователя, по убыванию релевантности.
+        """
+        ids, response = self.search('docker')
+        self.assertEqual(ids, [self.both.id, self.titled.id, self.described.id])
+        self.assertNotIn('search_rank', response.data['results'][0])
+        self.assertEqual(self.search('docker image')[0], [self.described.id])
+        self.assertEqual(self.search('kubernetes')[0], [])
+
+    def test_pagination(self):
+        """
+        Тест: страницы по курсору проходят все результаты без повторов.
+        """
+        ids, response = self.search('docker', page_size=1)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.both.id, self.titled.id, self.described.id])
+
+    def test_pagination_equal_ranks(self):
+        """
+        Тест: несколько страниц задач с равным рангом проходятся по (ранг, id) без смещения.
+        """
+        same = [
+            Task.objects.create(title='Docker', description='Docker registry', owner=self.user).id
+            for _ in range(5)
+        ]
+        expected = sorted(same + [self.both.id], reverse=True)
+        ids, response = self.search('docker registry', page_size=2)
+        pages = [response]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append(response)
+            ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        for page in pages:
+            for link in (page.data['next'], page.data['previous']):
+                if link:
+                    cursor = parse_qs(urlparse(link).query)['cursor'][0]
+                    self.assertNotIn('o=', b64decode(cursor).decode())
+
+        previous = self.client.get(pages[-1].data['previous'])
+        self.assertEqual([item['id'] for item in previous.data['results']], expected[2:4])
+
+        response = self.client.get(reverse('task-list'), {'search': 'docker', 'cursor': b64encode(b'p=1').decode()})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paths_match(self):
+        """
+        Тест: быстрый путь, сериализатор и асинхронное представление дают одинаковый ответ.
+        """
+        _, fast = self.search('docker', page_size=2)
+        cache.invalidate_user(self.user.pk)
+        with self.settings(TASKS_FAST_LIST=False):
+            _, slow = self.search('docker', page_size=2)
+        self.assertEqual(fast.data, slow.data)
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        request = AsyncRequestFactory().get(
+            reverse('task-list'), {'search': 'docker', 'page_size': 2},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        cache.invalidate_user(self.user.pk)
+        response = async_to_sync(AsyncTaskListView.as_view())(request)
+        self.assertEqual(json.loads(response.content), fast.data)
+
+
+class SparseFieldsetTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование выборочных полей ответа (?fields= / ?omit=).
+    """
+    def setUp(self):
+        """
+        Создание пользователя с задачами и администратора.
+        """
+        self.user = User.objects.create_user(username='sparse', password='testpass123')
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='First', description='Long text', owner=self.user)
+        Task.objects.create(title='Second', description='More text', owner=self.user, status='completed')
+
+    def get(self, url, params):
+        """
+        Возвращает ответ и SQL-запросы GET-запроса.
+        """
+        with self.assertMaxQueries(2) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, ' '.join(query['sql'] for query in ctx.captured_queries)
+
+    def test_list_fields(self):
+        """
+        Тест: список задач с выбранными полями не читает описание из БД на обоих путях.
+        """
+        for fast in (True, False):
+            cache.invalidate_user(self.user.pk)
+            with self.settings(TASKS_FAST_LIST=fast):
+                response, sql = self.get(reverse('task-list'), {'fields': 'title,status'})
+            self.assertEqual(response.data['results'][0], {'id': self.task.id, 'title': 'First', 'status': 'new'})
+            self.assertNotIn('description', sql)
+
+            cache.invalidate_user(self.user.pk)
+            with self.settings(TASKS_FAST_LIST=fast):
+                response, sql = self.get(reverse('task-list'), {'omit': 'description'})
+            self.assertEqual(list(response.data['results'][0]), ['id', 'title', 'status', 'owner'])
+            self.assertEqual(response.data['results'][0]['owner'], 'sparse')
+            self.assertNotIn('description', sql)
+
+    def test_detail_fields(self):
+        """
+        Тест: задача с выбранными полями и условный запрос по ее ETag.
+        """
+        url = reverse('task-detail', args=[self.task.id])
+        response, sql = self.get(url, {'fields': 'status'})
+        self.assertEqual(response.data, {'id': self.task.id, 'status': 'new'})
+        self.assertNotIn('description', sql)
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(url, {'fields': 'status'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_fields(self):
+        """
+        Тест: неизвестные поля и оба параметра сразу - ошибка 400.
+        """
+        response = self.client.get(reverse('task-list'), {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(response.data['fields']))
+        response = self.client.get(reverse('task-list'), {'fields': 'title', 'omit': 'status'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write_response_is_full(self):
+        """
+        Тест: ответ изменения содержит все поля независимо от параметров.
+        """
+        response = self.client.patch(
+            reverse('task-detail', args=[self.task.id]) + '?fields=title', {'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['description'], 'Long text')
+
+    def test_user_fields(self):
+        """
+        Тест: выборочные поля списка пользователей.
+        """
+        self.client.force_authenticate(user=self.admin)
+        response, sql = self.get(reverse('user-list'), {'fields': 'username'})
+        self.assertEqual(response.data['results'][0], {'id': self.user.id, 'username': 'sparse'})
+        self.assertNotIn('email', sql)
+
+
+class TaskSyncTests(APITestCase):
+    """
+    Тестирование инкрементальной синхронизации задач.
+    """
+    def setUp(self):
+        """
+        Создание пользователя, его задач и задачи другого пользователя.
+        """
+        self.user = User.objects.create_user(username='sync', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.first = Task.objects.create(title='First', description='', owner=self.user)
+        self.second = Task.objects.create(title='Second', description='', owner=self.user)
+        Task.objects.create(title='Foreign', description='', owner=self.other)
+
+    def changes(self, since=None):
+        """
+        Возвращает разобранный ответ эндпоинта изменений.
+        """
+        params = {} if since is None else {'since': since}
+        response = self.client.get(reverse('task-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_full_sync(self):
+        """
+        Тест: без токена отдаются все задачи пользователя.
+        """
+        data = self.changes()
+        self.assertEqual(
+            [item['id'] for item in data['upserted']], [self.first.id, self.second.id]
+        )
+        self.assertEqual(data['upserted'][0]['owner'], 'sync')
+        self.assertEqual(data['deleted'], [])
+
+    def test_full_sync_includes_tasks_without_revision(self):
+        """
+        Тест: полная синхронизация отдает и задачи, созданные в обход ревизий.
+        """
+        Task.objects.bulk_create([Task(title='Legacy', description='', owner=self.user)])
+        self.client.delete(reverse('task-detail', args=[self.second.id]))
+        data = self.changes()
+        self.assertEqual(sorted(item['title'] for item in data['upserted']), ['First', 'Legacy'])
+        self.assertEqual(data['deleted'], [])
+
+    def test_incremental_sync(self):
+        """
+        Тест: после токена отдаются только измененные, созданные и удаленные задачи.
+        """
+        token = self.changes()['sync_token']
+        self.assertEqual(self.changes(token), {'sync_token': token, 'upserted': [], 'deleted': []})
+        self.client.patch(
+            reverse('task-detail', args=[self.first.id]), {'status': 'completed'}, format='json'
+        )
+        created = self.client.post(
+            reverse('task-list'), {'title': 'Third', 'description': 'New'}, format='json'
+        ).data['id']
+        self.client.delete(reverse('task-detail', args=[self.second.id]))
+        data = self.changes(token)
+        self.assertEqual([item['id'] for item in data['upserted']], [self.first.id, created])
+        self.assertEqual(data['upserted'][0]['status'], 'completed')
+        self.assertEqual(data['deleted'], [self.second.id])
+        self.assertGreater(int(data['sync_token']), int(token))
+
+    def test_bulk_changes_tracked(self):
+        """
+        Тест: пакетные операции тоже попадают в изменения.
+        """
+        token = self.changes()['sync_token']
+        self.client.patch(
+            reverse('task-bulk'), [{'id': self.first.id, 'title': 'Renamed'}], format='json'
+        )
+        self.client.delete(reverse('task-bulk'), [self.second.id], format='json')
+        data = self.changes(token)
+        self.assertEqual([item['title'] for item in data['upserted']], ['Renamed'])
+        self.assertEqual(data['deleted'], [self.second.id])
+        self.assertEqual(TaskTombstone.objects.filter(owner=self.other).count(), 0)
+
+    def test_invalid_token(self):
+        """
+        Тест: некорректный токен отклоняется.
+        """
+        for since in ('abc', '-1'):
+            response = self.client.get(reverse('task-changes'), {'since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskStatsTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование статистики задач по статусам.
+    """
+    def setUp(self):
+        """
+        Создание пользователя с задачами, другого пользователя и администратора.
+        """
+        self.user = User.objects.create_user(username='stats', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='First', description='One', owner=self.user)
+        Task.objects.create(title='Second', description='Two', owner=self.user, status='completed')
+        Task.objects.create(title='Foreign', description='Three', owner=self.other)
+
+    def stats(self):
+        """
+        Возвращает статистику текущего пользователя.
+        """
+        response = self.client.get(reverse('task-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_stats(self):
+        """
+        Тест: статистика пользователя читается одним запросом из счетчиков.
+        """
+        with self.assertMaxQueries(1):
+            data = self.stats()
+        self.assertEqual(data, {'new': 1, 'in_progress': 0, 'completed': 1, 'total': 2})
+
+    def test_counters_follow_writes(self):
+        """
+        Тест: счетчики меняются при создании, смене статуса и удалении задач.
+        """
+        self.client.patch(
+            reverse('task-detail', args=[self.task.id]), {'status': 'in_progress'}, format='json'
+        )
+        self.client.patch(reverse('task-detail', args=[self.task.id]), {'title': 'Renamed'}, format='json')
+        self.client.post(reverse('task-bulk'), [
+            {'title': 'Bulk', 'description': 'New'},
+            {'title': 'Done', 'description': 'Done', 'status': 'completed'},
+        ], format='json')
+        self.assertEqual(self.stats(), {'new': 1, 'in_progress': 1, 'completed': 2, 'total': 4})
+
+        done = Task.objects.get(title='Done')
+        self.client.patch(reverse('task-bulk'), [{'id': done.id, 'status': 'new'}], format='json')
+        self.client.delete(reverse('task-detail', args=[self.task.id]))
+        self.assertEqual(self.stats(), {'new': 2, 'in_progress': 0, 'completed': 1, 'total': 3})
+
+        Task.objects.filter(owner=self.user).delete()
+        self.assertEqual(self.stats(), {'new': 0, 'in_progress': 0, 'completed': 0, 'total': 0})
+
+    def test_admin_stats(self):
+        """
+        Тест: общая статистика доступна только администратору.
+        """
+        response = self.client.get(reverse('user-tasks-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('user-tasks-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'new': 2, 'in_progress': 0, 'completed': 1, 'total': 3})
+
+    def test_rebuild_command(self):
+        """
+        Тест: команда находит расхождение после записи в обход модели и исправляет его.
+        """
+        Task.objects.filter(owner=self.user).update(status='in_progress')
+        with self.assertRaisesMessage(CommandError, '1 пользователей'):
+            call_command('rebuild_task_stats', check=True, stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_task_stats', stdout=out)
+        self.assertIn('Пересчитано пользователей: 1', out.getvalue())
+        call_command('rebuild_task_stats', check=True, stdout=StringIO())
+        self.assertEqual(self.stats(), {'new': 0, 'in_progress': 2, 'completed': 0, 'total': 2})
+
+
+class AsyncTaskViewTests(APITestCase):
+    """
+    Тестирование асинхронных представлений задач.
+    """
+    def setUp(self):
+        """
+        Создание пользователя, задач и access-токена.
+        """
+        self.user = User.objects.create_user(username='async', password='testpass123')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='', owner=self.user) for i in range(3)
+        ]
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.factory = AsyncRequestFactory()
+
+    def call(self, view, method, path, data=None, **kwargs):
+        """
+        Выполняет запрос к асинхронному представлению.
+        """
+        if method == 'get':
+            request = self.factory.get(path, data, headers=self.headers)
+        else:
+            request = getattr(self.factory, method)(
+                path, json.dumps(data), content_type='application/json', headers=self.headers
+            )
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    @skipUnless(renderers.msgpack, 'нужен msgpack')
+    def test_msgpack(self):
+        """
+        Тест: формат ответа выбирается по Accept и ?format=, как в синхронном TaskSet.
+        """
+        url = reverse('task-detail', args=[self.tasks[0].id])
+        headers = {**self.headers, 'Accept': 'application/msgpack'}
+        request = self.factory.get(reverse('task-list'), headers=headers)
+        response = async_to_sync(AsyncTaskListView.as_view())(request)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        expected = self.client.get(reverse('task-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = self.call(AsyncTaskDetailView, 'get', url, {'format': 'msgpack'}, pk=self.tasks[0].id)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content)['title'], 'Task 0')
+
+        body = renderers.msgpack.packb({'title': 'Packed', 'description': 'Binary'})
+        request = self.factory.post(reverse('task-list'), body, content_type='application/msgpack', headers=headers)
+        response = async_to_sync(AsyncTaskListView.as_view())(request)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(renderers.msgpack.unpackb(response.content)['title'], 'Packed')
+
+    def test_list_matches_sync(self):
+        """
+        Тест: страницы списка и ссылки курсора совпадают с синхронными.
+        """
+        url, params = reverse('task-list'), {'page_size': 2}
+        for _ in range(2):
+            response = self.call(AsyncTaskListView, 'get', url, params)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            cache.invalidate_user(self.user.pk)
+            expected = self.client.get(url, params)
+            self.assertEqual(json.loads(response.content), expected.data)
+            self.assertEqual(response['ETag'], expected['ETag'])
+            cache.invalidate_user(self.user.pk)
+            url, params = expected.data['next'], None
+        self.assertEqual(len(expected.data['results']), 1)
+
+    def test_list_fields(self):
+        """
+        Тест: выборочные поля списка на обоих путях, как в синхронном TaskSet, без чтения описания.
+        """
+        url = reverse('task-list')
+        for fast in (True, False):
+            for params in ({'fields': 'title'}, {'omit': 'description,status'}):
+                cache.invalidate_user(self.user.pk)
+                with self.settings(TASKS_FAST_LIST=fast), CaptureQueriesContext(connection) as ctx:
+                    response = self.call(AsyncTaskListView, 'get', url, params)
+                self.assertNotIn('description', ' '.join(query['sql'] for query in ctx.captured_queries))
+                cache.invalidate_user(self.user.pk)
+                with self.settings(TASKS_FAST_LIST=fast):
+                    expected = self.client.get(url, params)
+                self.assertEqual(json.loads(response.content), expected.data)
+        self.assertEqual(
+            json.loads(response.content)['results'][0],
+            {'id': self.tasks[0].id, 'title': 'Task 0', 'owner': 'async'},
+        )
+        response = self.call(AsyncTaskListView, 'get', url, {'fields': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_not_modified(self):
+        """
+        Тест: карточка задачи и ответ 304 по ETag.
+        """
+        url = reverse('task-detail', args=[self.tasks[0].id])
+        response = self.call(AsyncTaskDetailView, 'get', url, pk=self.tasks[0].id)
+        self.assertEqual(json.loads(response.content)['title'], 'Task 0')
+        self.headers['If-None-Match'] = response['ETag']
+        response = self.call(AsyncTaskDetailView, 'get', url, pk=self.tasks[0].id)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_create(self):
+        """
+        Тест создания задачи через асинхронное представление.
+        """
+        data = {'title': 'Async', 'description': 'Created'}
+        response = self.call(AsyncTaskListView, 'post', reverse('task-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)['owner'], 'async')
+        self.assertTrue(Task.objects.filter(title='Async', owner=self.user).exists())
+        response = self.call(AsyncTaskListView, 'post', reverse('task-list'), {'title': ''})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('title', json.loads(response.content))
+
+    def test_update_delegated_to_sync(self):
+        """
+        Тест: изменение задачи обрабатывает синхронный TaskSet.
+        """
+        task = self.tasks[0]
+        response = self.call(
+            AsyncTaskDetailView, 'patch', reverse('task-detail', args=[task.id]),
+            {'status': 'completed'}, pk=task.id,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'completed')
+
+    def test_errors(self):
+        """
+        Тест ответов 401, 400 и 404 в формате DRF.
+        """
+        response = self.call(AsyncTaskListView, 'get', reverse('task-list'), {'status': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.call(AsyncTaskDetailView, 'get', reverse('task-detail', args=[0]), pk=0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.headers = {}
+        response = self.call(AsyncTaskListView, 'get', reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('detail', json.loads(response.content))
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """
+    Тестирование команды нагрузочного теста.
+    """
+    def test_loadtest(self):
+        """
+        Тест: команда получает токен и выполняет запросы без ошибок.
+        """
+        User.objects.create_user(username='load', password='testpass123')
+        out = StringIO()
+        call_command(
+            'loadtest', url=self.live_server_url, username='load', password='testpass123',
+            requests=6, concurrency=3, stdout=out,
+        )
+        self.assertIn('Запросов: 6, ошибок: 0', out.getvalue())
+
+
+class TaskExportTests(QueryBudgetMixin, APITestCase):
+    """
+    Тестирование потоковой выгрузки задач.
+    """
+    def setUp(self):
+        """
+        Создание пользователей и их задач.
+        """
+        self.user = User.objects.create_user(username='export', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123')
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='Строка, с "кавычками"', owner=self.user)
+            for i in range(5)
+        ] + [Task(title='Foreign', description='', status='completed', owner=self.other)])
+        self.client.force_authenticate(user=self.user)
+
+    def content(self, response):
+        """
+        Возвращает тело потокового ответа.
+        """
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson(self):
+        """
+        Тест выгрузки NDJSON одним запросом к БД при нескольких пачках.
+        """
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('task-export'))
+            lines = self.content(response).splitlines()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], [f'Task {i}' for i in range(5)])
+        self.assertEqual(rows[0]['owner'], 'export')
+        self.assertEqual(rows[0]['description'], 'Строка, с "кавычками"')
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+    def test_csv_with_filter(self):
+        """
+        Тест выгрузки CSV с фильтром списка.
+        """
+        response = self.client.get(reverse('task-export'), {'type': 'csv', 'title__startswith': 'Task 1'})
+        self.assertIn('attachment; filename="tasks.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(self.content(response))))
+        self.assertEqual(rows[0], ['id', 'title', 'description', 'status', 'owner'])
+        self.assertEqual(rows[1][1:], ['Task 1', 'Строка, с "кавычками"', 'new', 'export'])
+        self.assertEqual(len(rows), 2)
+
+    def test_invalid_type(self):
+        """
+        Тест: неизвестный формат отклоняется.
+        """
+        response = self.client.get(reverse('task-export'), {'type': 'xml'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('type', response.data)
+
+    def test_admin_export(self):
+        """
+        Тест: выгрузка задач всех пользователей доступна только админу.
+        """
+        response = self.client.get(reverse('user-tasks-export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('user-tasks-export'))
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]['owner'], 'other')
+
+    def test_async_iteration(self):
+        """
+        Тест: асинхронная обертка отдает те же пачки.
+        """
+        async def collect():
+            return [chunk async for chunk in export.aiterate(iter(['a', 'b']))]
+        self.assertEqual(async_to_sync(collect)(), ['a', 'b'])
+
+
+class WireFormatTests(APITestCase):
+    """
+    Тестирование MessagePack и сжатия ответов.
+    """
+    def setUp(self):
+        """
+        Создание пользователя с задачами на ответ больше порога сжатия.
+        """
+        self.user = User.objects.create_user(username='wire', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description=f'Description of task {i}', owner=self.user)
+            for i in range(50)
+        ])
+        cache.invalidate_user(self.user.pk)
+
+    def test_choose_encoding(self):
+        """
+        Тест выбора кодировки по Accept-Encoding.
+        """
+        self.assertEqual(compression.choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(compression.choose_encoding('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(compression.choose_encoding('identity, gzip;q=0'))
+        self.assertIsNone(compression.choose_encoding(''))
+        self.assertEqual(compression.choose_encoding('*'), next(iter(compression.COMPRESSORS)))
+
+    def test_gzip_response(self):
+        """
+        Тест: большой ответ сжимается, маленький - нет.
+        """
+        plain = self.client.get(reverse('task-list'))
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], f"W/{plain['ETag']}")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        task = Task.objects.filter(owner=self.user).first()
+        response = self.client.get(reverse('task-detail', args=[task.id]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with self.settings(API_COMPRESSION_MIN_SIZE=len(plain.content) + 1):
+            response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag_conditions(self):
+        """
+        Тест: слабый ETag сжатого ответа дает 304 по If-None-Match и подходит для If-Match.
+        """
+        etag = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        for encoding, expected in (('gzip', etag), ('', etag[2:])):
+            response = self.client.get(
+                reverse('task-list'), HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING=encoding
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], expected)
+
+        task = Task.objects.create(title='Long', description='Long description. ' * 100, owner=self.user)
+        url = reverse('task-detail', args=[task.id])
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.client.patch(url, {'title': 'Renamed'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {'title': 'Stale'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_streaming_response(self):
+        """
+        Тест: потоковая выгрузка сжимается по пачкам.
+        """
+        with self.settings(TASKS_EXPORT_CHUNK_SIZE=10):
+            response = self.client.get(reverse('task-export'), HTTP_ACCEPT_ENCODING='gzip')
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertGreater(len(chunks), 2)
+        lines = gzip.decompress(b''.join(chunks)).decode().splitlines()
+        self.assertEqual(len(lines), 50)
+
+    @skipUnless(compression.brotli and compression.zstandard, 'нужны brotli и zstandard')
+    def test_brotli_and_zstd(self):
+        """
+        Тест: br и zstd выбираются по Accept-Encoding и распаковываются в тот же ответ.
+        """
+        plain = self.client.get(reverse('task-list')).content
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), plain)
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip, br, zstd')
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        decompressor = compression.zstandard.ZstdDecompressor().decompressobj()
+        self.assertEqual(decompressor.decompress(response.content), plain)
+
+    @skipUnless(renderers.msgpack, 'нужен msgpack')
+    def test_msgpack(self):
+        """
+        Тест: MessagePack в ответах и телах запросов с теми же данными, что и JSON.
+        """
+        data = self.client.get(reverse('task-list')).data
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content), json.loads(json.dumps(data)))
+
+        body = renderers.msgpack.packb([{'title': 'Packed', 'description': 'Binary'}])
+        response = self.client.post(
+            reverse('task-bulk'), body, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(renderers.msgpack.unpackb(response.content)[0]['title'], 'Packed')
+
+        response = self.client.post(reverse('task-bulk'), b'\xc1', content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bench_command(self):
+        """
+        Тест: команда bench_wire_formats печатает строку на формат и кодировку.
+        """
+        out = StringIO()
+        call_command('bench_wire_formats', rows=[5], repeat=1, stdout=out)
+        formats = 2 if renderers.msgpack else 1
+        self.assertEqual(len(out.getvalue().splitlines()), 1 + formats * (1 + len(compression.COMPRESSORS)))
+
+
+class FastListTests(APITestCase):
+    """
+    Тестирование быстрого пути списка задач.
+    """
+    def setUp(self):
+        """
+        Создание пользователя и задач.
+        """
+        self.user = User.objects.create_user(username='fast', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.bulk_create(
+            Task(
+                title=f'Задача {i}', description='Текст\u2028строка', status='in_progress', owner=self.user
+            )
+            for i in range(5)
+        )
+        cache.invalidate_user(self.user.pk)
+
+    def test_same_output_as_serializer(self):
+        """
+        Тест: ответ быстрого пути совпадает с ответом через TaskSerializer.
+        """
+        params = {'page_size': 3}
+        fast = self.client.get(reverse('task-list'), params)
+        cache.invalidate_user(self.user.pk)
+        with self.settings(TASKS_FAST_LIST=False):
+            slow = self.client.get(reverse('task-list'), params)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast['ETag'], slow['ETag'])
+        self.assertEqual(len(fast.data['results']), 3)
+
+    def test_plan_rejects_unsupported_fields(self):
+        """
+        Тест: план не строится для полей с преобразованием значения.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesRowPlan(UserSerializer)
+
+    def test_renderer_matches_drf(self):
+        """
+        Тест: FastJSONRenderer дает тот же JSON, что и JSONRenderer.
+        """
+        data = {'text': 'Юникод \u2028', 'items': [1, 2.5, None, True], 0: {'error': ['x']}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_benchmark_command(self):
+        """
+        Тест команды сравнения путей сериализации.
+        """
+        out = StringIO()
+        call_command('bench_serialization', rows=[10, 20], repeat=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+class BenchCommandTests(APITestCase):
+    """Тестирование команды bench_api."""
+    def run_bench(self, path, **options):
+        """Запускает bench_api на малых объемах с выводом в path."""
+        call_command(
+            'bench_api', users=2, tasks_per_user=5, requests=3, warmup=1,
+            scenario=['tasks_list', 'tasks_update'], output=path, stdout=StringIO(), **options
+        )
+        with open(path, encoding='utf-8') as result:
+            return json.load(result)
+
+    def test_results_and_baseline(self):
+        """
+        Тест: результаты сохраняются в JSON и сравниваются с baseline.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            document = self.run_bench(baseline, micro=True)
+            self.assertEqual(document['meta']['tasks_per_user'], 5)
+            stats = document['results']['tasks_list']
+            self.assertEqual(stats['errors'], 0)
+            self.assertEqual(stats['requests'], 3)
+            self.assertIn('micro.render_page_fast_json', document['results'])
+            self.assertFalse(Task.objects.exists())
+
+            for stats in document['results'].values():
+                stats['median'] /= 1000
+            with open(baseline, 'w', encoding='utf-8') as result:
+                json.dump(document, result)
+            with self.assertRaisesMessage(CommandError, 'tasks_list'):
+                self.run_bench(os.path.join(directory, 'current.json'), baseline=baseline)
+
+    def test_unknown_scenario(self):
+        """
+        Тест: неизвестный сценарий - ошибка команды.
+        """
+        with self.assertRaisesMessage(CommandError, 'missing'):
+            call_command('bench_api', users=1, tasks_per_user=1, scenario=['missing'], stdout=StringIO())
+
+
+class ConnectionBenchCommandTests(APITestCase):
+    """Тестирование команды bench_connections."""
+    def test_modes(self):
+        """
+        Тест: замеряются все режимы, пул без PostgreSQL и psycopg 3 пропускается.
+        """
+        out = StringIO()
+        call_command('bench_connections', requests=3, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines],
+                         ['per_request', 'persistent', 'persistent_checked', 'pool'])
+        self.assertIn('p50', lines[1])
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10, PASSWORD_HASH_WORKERS=2)
+class PasswordHashingTests(APITestCase):
+    """
+    Тестирование хеширования паролей.
+    """
+    def obtain_token(self, password='testpass123'):
+        """
+        Получение токена пользователем hasher.
+        """
+        return self.client.post(
+            reverse('token_obtain_pair'), {'username': 'hasher', 'password': password}, format='json'
+        )
+
+    def test_rehash_on_login(self):
+        """
+        Тест: при входе хеш с прежней стоимостью или алгоритмом пересчитывается.
+        """
+        user = User.objects.create_user(username='hasher', password='testpass123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.obtain_token().status_code, status.HTTP_200_OK)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        scrypt_first = [settings.PASSWORD_HASH_ALGORITHMS['scrypt'], *settings.PASSWORD_HASHERS]
+        with self.settings(PASSWORD_HASHERS=scrypt_first):
+            self.assertEqual(self.obtain_token('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.obtain_token().status_code, status.HTTP_200_OK)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('scrypt$1024$'))
+            self.assertTrue(user.check_password('testpass123'))
+
+    def test_pool(self):
+        """
+        Тест: хеширование идет в пуле, при перегрузке - ошибка 503.
+        """
+        self.assertTrue(hashers.in_pool(lambda: threading.current_thread().name).startswith('password-hash'))
+        with self.settings(PASSWORD_HASH_WORKERS=0):
+            self.assertEqual(hashers.in_pool(threading.current_thread), threading.current_thread())
+        with self.settings(PASSWORD_HASH_TIMEOUT=0.01):
+            with self.assertRaises(hashers.PasswordHashingBusy) as ctx:
+                hashers.in_pool(time.sleep, 0.2)
+        self.assertEqual(ctx.exception.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_bench_command(self):
+        """
+        Тест: команда bench_passwords замеряет алгоритмы и подбирает стоимость.
+        """
+        out = StringIO()
+        call_command('bench_passwords', algorithm=['pbkdf2', 'scrypt'], requests=2, target_ms=1, stdout=out)
+        output = out.getvalue()
+        self.assertIn('входов/с на ядро', output)
+        self.assertIn('PASSWORD_PBKDF2_ITERATIONS=', output)
+        self.assertIn('PASSWORD_SCRYPT_WORK_FACTOR=1024', output)
+
+
+class SeedTasksCommandTests(APITestCase):
+    """Тестирование команды seed_tasks."""
+    def seed(self, **options):
+        """Запускает seed_tasks с выводом в строку."""
+        out = StringIO()
+        call_command('seed_tasks', stdout=out, **options)
+        return out.getvalue()
+
+    def test_seed(self):
+        """
+        Тест: пользователи с общим паролем и задачи по заданным распределениям.
+        """
+        version = UserDataVersion.current()
+        output = self.seed(users=3, tasks_per_user=4, status_mix='completed=1',
+                           title_length='5:5', description_length='0', password='seedpass')
+        self.assertGreater(UserDataVersion.current(), version)
+        self.assertIn('Задач: 12', output)
+        users = get_user_model().objects.filter(username__startswith='seed_')
+        self.assertEqual(users.count(), 3)
+        self.assertTrue(all(user.check_password('seedpass') for user in users))
+        self.assertEqual(set(Task.objects.values_list('status', flat=True)), {'completed'})
+        self.assertTrue(all(0 < len(title) <= 5 for title in Task.objects.values_list('title', flat=True)))
+        self.assertEqual(set(Task.objects.values_list('description', flat=True)), {''})
+        call_command('rebuild_task_stats', check=True, stdout=StringIO())
+
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'seed_0', 'password': 'seedpass'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_existing_prefix_and_validation(self):
+        """
+        Тест: повторный префикс и некорректные параметры - ошибка команды.
+        """
+        self.seed(users=1, tasks_per_user=1, distribution='uniform')
+        with self.assertRaisesMessage(CommandError, 'префиксом'):
+            self.seed(users=1, tasks_per_user=1)
+        with self.assertRaisesMessage(CommandError, 'статус'):
+            self.seed(users=1, prefix='other', status_mix='done=1')
+        with self.assertRaisesMessage(CommandError, 'COPY'):
+            self.seed(users=1, prefix='other', method='copy')
+
+
+@override_settings(API_METRICS=True, API_METRICS_TOKEN='')
+class PerformanceMetricsTests(APITestCase):
+    """Тестирование PerformanceMiddleware и /metrics/."""
+    def setUp(self):
+        """
+        Пользователь с задачами, чистые метрики и кеш ответов.
+        """
+        self.user = User.objects.create_user(username='metrics', password='testpass123')
+        Task.objects.create(title='Task', description='', owner=self.user)
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        cache.invalidate_user(self.user.pk)
+        metrics.REGISTRY.clear()
+
+    def test_server_timing_and_metrics(self):
+        """
+        Тест: Server-Timing в ответе и гистограммы по представлению.
+        """
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.client.get(reverse('task-detail', args=[0]))
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('api_requests_total{view="TaskSet.list",status="200"} 1', body)
+        self.assertIn('api_requests_total{view="TaskSet.retrieve",status="404"} 1', body)
+        self.assertIn('api_request_duration_seconds_count{view="TaskSet.list"} 1', body)
+        self.assertIn('api_request_db_queries_bucket{view="TaskSet.list",le="+Inf"} 1', body)
+        self.assertIn('api_response_size_bytes_sum{view="TaskSet.list"} %d' % len(response.content), body)
+
+    @override_settings(API_METRICS_TOKEN='scrape')
+    def test_metrics_token(self):
+        """
+        Тест: с API_METRICS_TOKEN метрики отдаются только с токеном.
+        """
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        client.credentials(HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_200_OK)
+
+    def test_async_stack(self):
+        """
+        Тест: в асинхронном стеке учитываются запросы к БД из sync_to_async.
+        """
+        async def view(request):
+            await Task.objects.filter(owner=self.user).acount()
+            return HttpResponse(b'ok')
+
+        middleware = PerformanceMiddleware(view)
+        response = async_to_sync(middleware)(AsyncRequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    @override_settings(API_METRICS_FLUSH_SECONDS=3600)
+    def test_workers_aggregated(self):
+        """
+        Тест: /metrics/ суммирует снимки процессов из API_METRICS_DIR и архив завершившихся.
+        """
+        other = {
+            'requests': [['TaskSet.list', '200', 2]],
+            'counters': [[cache.STATS_METRIC, 'result="hit"', 5]],
+            'histograms': [['api_request_db_queries', 'TaskSet.list', [0] * len(metrics.QUERY_BUCKETS), 4, 2]],
+        }
+        with tempfile.TemporaryDirectory() as directory, self.settings(API_METRICS_DIR=directory):
+            metrics.write_json(os.path.join(directory, '1.json'), other)
+            metrics.write_json(os.path.join(directory, metrics.ARCHIVE), {'requests': [['TaskSet.list', '200', 3]]})
+            self.client.get(reverse('task-list'))
+            body = self.client.get(reverse('metrics')).content.decode()
+            self.assertIn('api_requests_total{view="TaskSet.list",status="200"} 6', body)
+            self.assertIn('api_cache_requests_total{result="hit"} 5', body)
+            self.assertIn('api_request_db_queries_count{view="TaskSet.list"} 3', body)
+
+            retired = metrics.Registry()
+            retired.merge(other)
+            retired.retire()
+            archive = metrics.read_json(os.path.join(directory, metrics.ARCHIVE))
+            self.assertEqual(archive['requests'], [['TaskSet.list', '200', 5]])
+            self.assertFalse(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+
+    @override_settings(API_METRICS=False)
+    def test_disabled(self):
+        """
+        Тест: без API_METRICS middleware не подключается, а /metrics/ не отдается.
+        """
+        with self.assertRaises(MiddlewareNotUsed):
+            PerformanceMiddleware(lambda request: None)
+        response = self.client.get(reverse('task-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(QUERY_CHECK='strict', QUERY_CHECK_REPEAT=3, QUERY_CHECK_SLOW_MS=1000)
+class QueryCheckTests(APITestCase):
+    """Тестирование детектора N+1 и медленных запросов."""
+    def setUp(self):
+        """
+        Пользователь с несколькими задачами.
+        """
+        self.user = User.objects.create_user(username='querycheck', password='testpass123')
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', description='', owner=self.user)
+
+    def test_fingerprint(self):
+        """
+        Тест: отпечаток не зависит от значений параметров и длины списков.
+        """
+        self.assertEqual(
+            querycheck.fingerprint('SELECT * FROM t WHERE id IN (%s, %s)  AND name = \'x\' LIMIT 21'),
+            querycheck.fingerprint('SELECT * FROM t WHERE id IN (%s) AND name = \'yy\' LIMIT 1'),
+        )
+        self.assertEqual(
+            querycheck.fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...)',
+        )
+
+    def test_n_plus_one_attributed_to_serializer_field(self):
+        """
+        Тест: имя владельца без context['owner'] - N+1 в поле TaskSerializer.owner.
+        """
+        tasks = list(Task.objects.filter(owner=self.user))
+        expected = r'N\+1: 3 x SELECT .*auth_user.*TaskSerializer\.owner'
+        with self.assertRaisesRegex(querycheck.QueryCheckFailed, expected):
+            with querycheck.inspect():
+                TaskSerializer(tasks, many=True).data
+        with querycheck.inspect():
+            TaskSerializer(tasks, many=True, context={'owner': self.user}).data
+
+    def test_middleware(self):
+        """
+        Тест: в строгом режиме проблема в представлении - исключение, иначе - лог.
+        """
+        def view(request):
+            for task in Task.objects.filter(owner=self.user):
+                task.owner.username
+            return HttpResponse(b'ok')
+
+        request = RequestFactory().get('/')
+        with self.assertRaises(querycheck.QueryCheckFailed):
+            QueryCheckMiddleware(view)(request)
+        with override_settings(QUERY_CHECK='warn', QUERY_CHECK_SLOW_MS=0):
+            with self.assertLogs('app.querycheck', 'WARNING') as logs:
+                QueryCheckMiddleware(view)(request)
+        self.assertTrue(any('N+1: 3 x' in line for line in logs.output))
+        self.assertTrue(any('медленный запрос' in line for line in logs.output))
+
+    def test_api_has_no_problems(self):
+        """
+        Тест: список и карточка задач проходят строгую проверку.
+        """
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+        task = Task.objects.filter(owner=self.user).first()
+        self.assertEqual(self.client.get(reverse('task-detail', args=[task.pk])).status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_CHECK='loud')
+    def test_invalid_mode(self):
+        """
+        Тест: неизвестный режим QUERY_CHECK - ошибка конфигурации.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            QueryCheckMiddleware(lambda request: None)
+
+
+@override_settings(
+    DATABASE_ROUTERS=['app.routers.ReplicaRouter'], DB_REPLICA_ALIASES=['replica'], JWT_USER_STATE_TTL=0
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Тестирование маршрутизации чтений на реплику.
+
+    Реплику изображает отдельная база SQLite во временном файле с той же
+    схемой, но без данных: ответ из пустой реплики показывает, куда ушло чтение."""
+    @classmethod
+    def setUpClass(cls):
+        """Подключает базу реплики и применяет к ней миграции.
+
+        Алиас добавляется при настройке класса, поэтому раннер тестов не
+        создает для него тестовую базу."""
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = connections.configure_settings({
+            'default': connections.settings['default'],
+            'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(cls.directory.name, 'r.db')},
+        })['replica']
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Отключает базу реплики."""
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        """
+        Пользователь с задачей в основной базе.
+        """
+        routers._unavailable.clear()
+        self.user = User.objects.create_user(username='replica', password='testpass123')
+        Task.objects.create(title='Primary', description='', owner=self.user)
+        cache.invalidate_user(self.user.pk)
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def titles(self):
+        """Названия задач из списка (без кеша ответов)."""
+        cache.invalidate_user(self.user.pk)
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['title'] for task in response.data['results']]
+
+    def test_reads_go_to_replica(self):
+        """
+        Тест: GET читает из реплики, вне запросов чтения идут в основную базу.
+        """
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(self.titles(), [])
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_read_after_write_is_sticky(self):
+        """
+        Тест: после записи чтения пользователя идут в основную базу, затем снова в реплику.
+        """
+        response = self.client.post(reverse('task-list'), {'title': 'New', 'description': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.using('replica').count(), 0)
+        self.assertEqual(sorted(self.titles()), ['New', 'Primary'])
+
+        cache.get_cache().delete(routers.sticky_key(self.user.pk))
+        self.assertEqual(self.titles(), [])
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        """
+        Тест: если реплика недоступна, чтения идут в основную базу.
+        """
+        replica = connections['replica']
+        name = replica.settings_dict['NAME']
+        replica.close()
+        replica.settings_dict['NAME'] = os.path.join(self.directory.name, 'missing', 'r.db')
+        try:
+            self.assertEqual(self.titles(), ['Primary'])
+            self.assertIn('replica', routers._unavailable)
+        finally:
+            replica.settings_dict['NAME'] = name
+
+
+class ServerConfigTests(SimpleTestCase):
+    """Тестирование конфигурации gunicorn."""
+    def load(self, **env):
+        """Значения gunicorn.conf.py при переменных окружения env."""
+        with mock.patch.dict(os.environ, {'API_ASYNC': 'False', **env}):
+            if 'WEB_CONCURRENCY' not in env:
+                os.environ.pop('WEB_CONCURRENCY', None)
+            return runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+
+    def test_metrics_dir_for_workers(self):
+        """
+        Тест: при нескольких воркерах метрики собираются через каталог снимков.
+        """
+        for workers, expected in (('4', True), ('1', False)):
+            with mock.patch.dict(os.environ, {'API_ASYNC': 'False', 'WEB_CONCURRENCY': workers}):
+                os.environ.pop('API_METRICS_DIR', None)
+                runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+                self.assertEqual('API_METRICS_DIR' in os.environ, expected)
+
+    def load_settings(self, **env):
+        """Значения settings.py при переменных окружения env; проверяемые тестами переменные
+        вне env сбрасываются."""
+        with mock.patch.dict(os.environ, env):
+            checked = {'REDIS_URL', 'TASKS_CACHE', 'WEB_CONCURRENCY', 'PASSWORD_HASH_WORKERS', 'DB_REPLICAS'}
+            for name in checked.difference(env):
+                os.environ.pop(name, None)
+            return runpy.run_path(str(settings.BASE_DIR / 'DjangoApi' / 'settings.py'))
+
+    def test_sync_and_async_workers(self):
+        """
+        Тест: воркеры по числу ядер, WSGI-потоки или uvicorn для API_ASYNC.
+        """
+        config = self.load()
+        self.assertEqual(config['wsgi_app'], 'DjangoApi.wsgi:application')
+        self.assertEqual(config['worker_class'], 'gthread')
+        self.assertEqual(config['workers'], multiprocessing.cpu_count() * 2 + 1)
+        self.assertTrue(config['preload_app'])
+
+        config = self.load(API_ASYNC='True', WEB_CONCURRENCY='3')
+        self.assertEqual(config['wsgi_app'], 'DjangoApi.asgi:application')
+        self.assertEqual(config['worker_class'], 'uvicorn_worker.UvicornWorker')
+        self.assertEqual(config['workers'], 3)
+
+    def test_whitenoise_only_for_wsgi(self):
+        """
+        Тест: WhiteNoise добавляется только для WSGI, а под ASGI цепочка middleware
+        остается асинхронной и асинхронные представления не переводятся в поток.
+        """
+        real_find_spec = find_spec
+
+        def installed(name, *args):
+            return object() if name == 'whitenoise' else real_find_spec(name, *args)
+
+        with mock.patch('importlib.util.find_spec', installed):
+            wsgi = self.load_settings(API_ASYNC='False')['MIDDLEWARE']
+            asgi = self.load_settings(API_ASYNC='True')['MIDDLEWARE']
+        self.assertIn('whitenoise.middleware.WhiteNoiseMiddleware', wsgi)
+        self.assertNotIn('whitenoise.middleware.WhiteNoiseMiddleware', asgi)
+
+        with override_settings(MIDDLEWARE=asgi, DEBUG=True), self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('load_middleware')
+            ASGIHandler().load_middleware(is_async=True)
+        self.assertFalse([line for line in logs.output if 'adapted' in line])
+
+    def test_response_cache_needs_shared_backend(self):
+        """
+        Тест: кеш ответов в памяти процесса выключается при нескольких воркерах.
+        """
+        self.assertTrue(self.load_settings()['TASKS_CACHE_ENABLED'])
+        self.assertFalse(self.load_settings(WEB_CONCURRENCY='4')['TASKS_CACHE_ENABLED'])
+        config = self.load_settings(WEB_CONCURRENCY='4', REDIS_URL='redis://localhost:6379/0')
+        self.assertTrue(config['TASKS_CACHE_ENABLED'])
+        with self.assertRaises(ImproperlyConfigured):
+            self.load_settings(WEB_CONCURRENCY='4', TASKS_CACHE='True')
+
+    def test_replicas_need_shared_backend(self):
+        """
+        Тест: отметка read-after-write реплик требует общего кеша при нескольких воркерах.
+        """
+        self.assertEqual(self.load_settings(DB_REPLICAS='replica')['DB_REPLICA_ALIASES'], ['replica_1'])
+        with self.assertRaises(ImproperlyConfigured):
+            self.load_settings(WEB_CONCURRENCY='4', DB_REPLICAS='replica')
+        config = self.load_settings(
+            WEB_CONCURRENCY='4', DB_REPLICAS='replica', REDIS_URL='redis://localhost:6379/0'
+        )
+        self.assertEqual(config['DB_REPLICA_ALIASES'], ['replica_1'])
+
+    def test_password_hash_workers_per_process(self):
+        """
+        Тест: пул хеширования по умолчанию делит ядра между воркерами.
+        """
+        with mock.patch('os.cpu_count', return_value=8):
+            self.assertEqual(self.load_settings()['PASSWORD_HASH_WORKERS'], 8)
+            self.assertEqual(self.load_settings(WEB_CONCURRENCY='3')['PASSWORD_HASH_WORKERS'], 2)
+            self.assertEqual(self.load_settings(WEB_CONCURRENCY='17')['PASSWORD_HASH_WORKERS'], 1)
+        with mock.patch.dict(os.environ, {'API_ASYNC': 'False'}):
+            os.environ.pop('WEB_CONCURRENCY', None)
+            runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+            self.assertEqual(os.environ['WEB_CONCURRENCY'], str(multiprocessing.cpu_count() * 2 + 1))
+
+
+@override_settings(API_THROTTLE=True, REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'token': '2/minute', 'tasks_read': '3/minute', 'tasks_write': '1/minute'},
+})
+class ThrottlingTests(APITestCase):
+    """
+    Тестирование лимитов запросов.
+    """
+    def setUp(self):
+        """
+        Пользователь с access-токеном и пустые счетчики лимитов.
+        """
+        throttling.get_cache().clear()
+        throttling._previous.clear()
+        self.user = User.objects.create_user(username='limited', password='testpass123')
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_token_scope(self):
+        """
+        Тест: получение токена ограничено по IP, ответ 429 с Retry-After.
+        """
+        url, data = reverse('token_obtain_pair'), {'username': 'limited', 'password': 'wrong'}
+        responses = [self.client.post(url, data, format='json') for _ in range(3)]
+        self.assertEqual([r.status_code for r in responses], [401, 401, 429])
+        self.assertEqual([r['RateLimit-Remaining'] for r in responses], ['1', '0', '0'])
+        self.assertEqual(responses[0]['RateLimit-Limit'], '2')
+        self.assertEqual(responses[0]['RateLimit-Policy'], '2;w=60')
+        self.assertTrue(1 <= int(responses[2]['Retry-After']) <= 60)
+
+    def test_read_and_write_buckets(self):
+        """
+        Тест: чтение и изменение задач считаются отдельно и по пользователю.
+        """
+        url = reverse('task-list')
+        statuses = [self.client.get(url).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        response = self.client.post(url, {'title': 'T', 'description': 'D'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+        other = User.objects.create_user(username='other', password='testpass123')
+        token = TaskTokenObtainPairSerializer.get_token(other).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_async_view(self):
+        """
+        Тест: асинхронные представления делят лимит с синхронными.
+        """
+        token = TaskTokenObtainPairSerializer.get_token(self.user).access_token
+        request_factory = AsyncRequestFactory()
+        for _ in range(3):
+            self.client.get(reverse('task-list'))
+        request = request_factory.get(reverse('task-list'), headers={'Authorization': f'Bearer {token}'})
+        response = async_to_sync(AsyncTaskListView.as_view())(request)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+        self.assertIn('Retry-After', response)
+
+    def test_redis_hit(self):
+        """
+        Тест: в Redis счетчик увеличивается вместе с установкой срока жизни одной транзакцией.
+        """
+        store = RedisCache('redis://localhost:6379/0', {})
+        store._cache = mock.Mock()
+        pipeline = store._cache.get_client.return_value.pipeline.return_value
+        pipeline.execute.return_value = [3, True]
+        with mock.patch('app.throttling.get_cache', return_value=store):
+            self.assertEqual(throttling.hit('throttle:anon:ip:1:100', 60), 3)
+        key = store.make_and_validate_key('throttle:anon:ip:1:100')
+        store._cache.get_client.assert_called_once_with(key, write=True)
+        self.assertEqual(pipeline.mock_calls, [
+            mock.call.incr(key), mock.call.expire(key, 120), mock.call.execute(),
+        ])
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'anon': '1/minute', 'docs': '3/minute'},
+    })
+    def test_docs_scope(self):
+        """
+        Тест: документация считается в своей области, а не в лимите anon.
+        """
+        self.client.credentials()
+        statuses = [self.client.get(reverse('swagger-ui')).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 200])
+        response = self.client.get(reverse('swagger-ui'), {'format': 'openapi'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['RateLimit-Policy'], '3;w=60')
+
+    def test_sliding_window(self):
+        """
+        Тест: запросы прошлого окна учитываются пропорционально его остатку.
+        """
+        url = reverse('task-list')
+        with mock.patch('app.throttling.time.time', return_value=6000.0):
+            for _ in range(3):
+                self.client.get(url)
+        with mock.patch('app.throttling.time.time', return_value=6060.0 + 10):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch('app.throttling.time.time', return_value=6060.0 + 40):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['RateLimit-Reset'], '20')
+
+
+class UserAPITests(APITestCase):
+    """Тестирование API пользователя."""
+    def setUp(self):
+        """Создание пользователя для тестирования."""
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpass'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_get_users(self):
+        """Тест получения пользователей."""
+        url = reverse('user-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_user_via_api(self):
+        """Тест создания пользователя через API."""
+        url = reverse('user-list')
+        data = {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'password': 'newpass123'
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse('password' in response.data)
+        self.assertTrue(User.objects.filter(username='newuser').exists())
+
+
+class DocumentationTests(APITestCase):
+    """Тестирование документации."""
+    def test_swagger_docs(self):
+        """Тест документации Swagger."""
+        response = self.client.get('/swagger/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_redoc_docs(self):
+        """Тест документации Redoc."""
+        response = self.client.get('/redoc/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_schema_built_once(self):
+        """Тест: схема строится один раз на процесс и отдается с ETag."""
+        yasg.forget_schema()
+        with mock.patch.object(yasg, 'build_schema', wraps=yasg.build_schema) as build:
+            response = self.client.get('/swagger/', {'format': 'openapi'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('/tasks/stats/', json.loads(response.content)['paths'])
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            cached = self.client.get('/redoc/', {'format': 'openapi'}, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(self.client.get('/swagger/', {'format': 'openapi'}).content, response.content)
+        self.assertEqual(build.call_count, 1)
+
+    def test_schema_file(self):
+        """Тест: схема из файла generate_swagger совпадает со схемой в памяти и отдается без построения."""
+        yasg.forget_schema()
+        memory = json.loads(self.client.get('/swagger/', {'format': 'openapi'}).content)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json')
+            # generate_swagger отключает логирование процесса и не восстанавливает его
+            self.addCleanup(logging.disable, logging.NOTSET)
+            call_command('generate_swagger', path, format='json', overwrite=True, stdout=StringIO())
+            yasg.forget_schema()
+            with self.settings(API_SCHEMA_FILE=path), mock.patch.object(yasg, 'build_schema') as build:
+                response = self.client.get('/swagger/', {'format': 'openapi'})
+            with open(path, 'rb') as file:
+                self.assertEqual(response.content, file.read())
+        build.assert_not_called()
+        self.assertEqual(json.loads(response.content), memory)
+        yasg.forget_schema()
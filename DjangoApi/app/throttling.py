@@ -0,0 +1,191 @@
+"""
+Ограничение частоты запросов к API (включается настройкой API_THROTTLE).
+
+Лимиты задаются по областям (scope) в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+- token - получение и обновление JWT (по IP клиента);
+- tasks_read / tasks_write - чтение и изменение задач (по пользователю);
+- docs - схема OpenAPI и страницы /swagger/, /redoc/;
+- user / anon - остальные представления для пользователя и для анонима.
+Область представления задает атрибут throttle_scope.
+
+Счет ведется скользящим окном: число запросов в текущем окне плюс
+доля запросов предыдущего окна, пропорциональная его еще не вышедшей
+части. Каждый запрос делает одну атомарную операцию с кешем - incr
+счетчика текущего окна (в Redis - INCR и EXPIRE одной транзакцией); итог предыдущего окна после его завершения не
+меняется и читается процессом один раз за окно. Счетчики хранятся в кеше
+API_THROTTLE_CACHE_ALIAS: с общим кешем (Redis) лимит действует во всех
+процессах и воркерах, с LocMemCache - в каждом процессе отдельно.
+
+Ответы содержат заголовки RateLimit-Limit, RateLimit-Remaining,
+RateLimit-Reset и RateLimit-Policy, ответ 429 - еще и Retry-After.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+"""
+Итоги завершенных окон, прочитанные процессом: префикс ключа -> (окно, число).
+"""
+_previous = {}
+PREVIOUS_CACHE_SIZE = 10000
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Лимит вида '20/minute' -> (число запросов, длина окна в секундах)."""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+def tasks_scope(request):
+    """Область лимита запроса к задачам: чтение или изменение."""
+    return 'tasks_read' if request.method in SAFE_METHODS else 'tasks_write'
+
+
+class RateLimit:
+    """Состояние лимита для заголовков ответа."""
+    __slots__ = ('limit', 'remaining', 'reset', 'window')
+
+    def __init__(self, limit, remaining, reset, window):
+        """limit запросов за window секунд, осталось remaining, окно
+        сменится через reset секунд."""
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.window = window
+
+    def headers(self):
+        """Заголовки RateLimit-*."""
+        return {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': f'{self.limit};w={self.window}',
+        }
+
+
+def get_cache():
+    """Кеш счетчиков лимитов."""
+    return caches[settings.API_THROTTLE_CACHE_ALIAS]
+
+
+def hit(key, window):
+    """Увеличивает счетчик окна и возвращает новое значение.
+
+    Обычно это один incr; счетчик нового окна создается add, при гонке
+    с другим процессом add не проходит и повторяется incr. В Redis
+    incr Django проверяет ключ отдельной командой EXISTS, и ключ, истекший
+    между EXISTS и INCR, создался бы без срока жизни, поэтому там
+    используется redis_hit."""
+    store = get_cache()
+    if isinstance(store, RedisCache):
+        return redis_hit(store, key, window * 2)
+    try:
+        return store.incr(key)
+    except ValueError:
+        if store.add(key, 1, window * 2):
+            return 1
+        return store.incr(key)
+
+
+def redis_hit(store, key, timeout):
+    """INCR и EXPIRE счетчика одной транзакцией (MULTI/EXEC).
+
+    Срок жизни обновляется каждым запросом окна: счетчик живет timeout
+    секунд после последнего запроса и всегда с TTL."""
+    key = store.make_and_validate_key(key)
+    pipeline = store._cache.get_client(key, write=True).pipeline()
+    pipeline.incr(key)
+    pipeline.expire(key, timeout)
+    return pipeline.execute()[0]
+
+
+def previous_count(prefix, window_index):
+    """Итог предыдущего окна; из кеша читается один раз за окно."""
+    cached = _previous.get(prefix)
+    if cached is not None and cached[0] == window_index:
+        return cached[1]
+    count = get_cache().get(f'{prefix}:{window_index}', 0)
+    if len(_previous) >= PREVIOUS_CACHE_SIZE:
+        _previous.clear()
+    _previous[prefix] = (window_index, count)
+    return count
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Лимит запросов скользящим окном по области представления.
+
+    Идентификатор клиента - пользователь, для анонимов - IP (с учетом
+    NUM_PROXIES). Состояние лимита сохраняется в request.rate_limit для
+    заголовков ответа (RateLimitHeadersMixin)."""
+
+    def __init__(self):
+        """Пауза до следующей попытки известна после отказа."""
+        self.retry_after = None
+
+    def get_scope(self, request, view):
+        """Область из throttle_scope представления или user / anon."""
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+    def get_client(self, request):
+        """Пользователь или IP клиента."""
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        """Учитывает запрос и решает, пропустить ли его."""
+        if not settings.API_THROTTLE:
+            return True
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        limit, window = parse_rate(rate)
+        now = time.time()
+        window_index, offset = divmod(now, window)
+        window_index = int(window_index)
+        prefix = f'throttle:{scope}:{self.get_client(request)}'
+        count = hit(f'{prefix}:{window_index}', window)
+        previous = previous_count(prefix, window_index - 1)
+        used = previous * (1 - offset / window) + count
+        reset = max(1, math.ceil(window - offset))
+        request.rate_limit = RateLimit(limit, max(0, math.floor(limit - used)), reset, window)
+        if used <= limit:
+            return True
+        self.retry_after = reset
+        return False
+
+    def wait(self):
+        """Секунд до смены окна (Retry-After)."""
+        return self.retry_after
+
+
+def add_headers(request, response):
+    """Добавляет в ответ заголовки RateLimit-* запроса, если лимит проверялся."""
+    rate_limit = getattr(request, 'rate_limit', None)
+    if rate_limit is not None:
+        for header, value in rate_limit.headers().items():
+            response[header] = value
+    return response
+
+
+class RateLimitHeadersMixin:
+    """Заголовки RateLimit-* в ответах представления, в том числе в 429."""
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Ответ DRF с заголовками лимита."""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return add_headers(request, response)
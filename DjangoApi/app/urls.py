@@ -4,15 +4,17 @@ URL-конфигурация приложения app.
 Включает:
 - API эндпоинты для задач и пользователей
 - JWT аутентификацию
-- Документацию Swagger/Redoc
+- Документацию Swagger/Redoc (схема из памяти процесса, DjangoApi.yasg)
+- Метрики в формате Prometheus (при API_METRICS)
 """
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from DjangoApi.yasg import schema_view
-from .api import TaskSet, UserSet
+from DjangoApi.yasg import CachedSchemaView
+from .api import TaskSet, TokenObtainView, TokenRefreshView, UserSet
+from .metrics import metrics_view
 
 
 """
@@ -29,9 +31,19 @@ URL-конфигурация приложения app.
 urlpatterns = [
     path('api/', include(router.urls)),
 
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', TokenObtainView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='redoc'),
+    path('swagger/', CachedSchemaView.with_ui('swagger'), name='swagger-ui'),
+    path('redoc/', CachedSchemaView.with_ui('redoc'), name='redoc'),
+
+    path('metrics/', metrics_view, name='metrics'),
 ]
+
+
+"""
+Асинхронный стек: список, карточка и создание задач на корутинах (под ASGI).
+"""
+if settings.API_ASYNC:
+    from .async_views import urlpatterns as async_urlpatterns
+    urlpatterns = async_urlpatterns + urlpatterns
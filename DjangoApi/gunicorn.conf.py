@@ -0,0 +1,95 @@
+"""
+Конфигурация gunicorn для продакшена.
+
+    gunicorn -c gunicorn.conf.py
+
+- Число воркеров по умолчанию считается по ядрам: 2 * ядра + 1 для
+  синхронного стека (воркеры gthread с GUNICORN_THREADS потоками) и по
+  одному на ядро для асинхронного (API_ASYNC=True, воркеры uvicorn).
+  WEB_CONCURRENCY задает число воркеров явно; итоговое число
+  записывается в WEB_CONCURRENCY до загрузки приложения, и settings.py
+  по нему выключает кеш ответов задач, если кеш не общий (LocMemCache).
+- У каждого воркера свой пул хеширования паролей (app.hashers), поэтому
+  PASSWORD_HASH_WORKERS по умолчанию - доля ядер на процесс:
+  max(1, ядра // WEB_CONCURRENCY). Задавая его явно, учитывайте, что
+  хешировать одновременно может WEB_CONCURRENCY * PASSWORD_HASH_WORKERS
+  потоков.
+- Приложение загружается до fork (preload_app): код и данные импорта
+  разделяются воркерами через copy-on-write, а ошибка конфигурации
+  видна сразу при старте. Соединения с БД, открытые до fork, закрываются
+  в post_fork, чтобы воркеры не делили сокеты. Схема OpenAPI тоже
+  строится в мастере (when_ready), и воркеры получают ее готовой.
+- Воркер перезапускается после GUNICORN_MAX_REQUESTS запросов (со
+  случайным разбросом), что ограничивает рост памяти.
+- При нескольких воркерах метрики (app.metrics) собираются через каталог
+  снимков API_METRICS_DIR (по умолчанию api-metrics во временном
+  каталоге): /metrics/ отдает сумму по всем воркерам. Каталог очищается
+  при старте (on_starting), завершающийся воркер переносит свои метрики
+  в архив каталога (worker_exit).
+
+Миграции в команду запуска не входят: их применяет отдельный шаг
+(сервис migrate в docker-compose.yml) один раз на релиз.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+
+def env_bool(name, default='False'):
+    """Логическое значение переменной окружения, как в settings.py."""
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+API_ASYNC = env_bool('API_ASYNC')
+CORES = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+if API_ASYNC:
+    wsgi_app = 'DjangoApi.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    workers = int(os.getenv('WEB_CONCURRENCY', CORES))
+else:
+    wsgi_app = 'DjangoApi.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', CORES * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+os.environ['WEB_CONCURRENCY'] = str(workers)
+if workers > 1:
+    os.environ.setdefault('API_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'api-metrics'))
+
+preload_app = True
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = 5
+accesslog = '-' if env_bool('GUNICORN_ACCESS_LOG') else None
+errorlog = '-'
+
+
+def on_starting(server):
+    """Удаляет снимки метрик предыдущего запуска."""
+    metrics_dir = os.getenv('API_METRICS_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def when_ready(server):
+    """Строит документы схемы OpenAPI до запуска воркеров."""
+    from DjangoApi.yasg import warm_schema
+    warm_schema()
+
+
+def post_fork(server, worker):
+    """Воркер открывает собственные соединения с БД."""
+    from django.db import connections
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    """Переносит метрики воркера в архив каталога снимков."""
+    from app.metrics import REGISTRY
+    REGISTRY.retire()